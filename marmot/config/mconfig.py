@@ -17,6 +17,88 @@ dir_path = os.path.dirname(path)
 configfile_path = os.path.join(dir_path,CONFIGFILE_NAME)
 
 
+def default_config() -> dict:
+    """Returns the Marmot default config settings.
+
+    See createConfig for a description of each setting.
+
+    Returns:
+        dict: Default config settings.
+    """
+    return dict(
+        
+        font_settings = dict(
+            xtick_size = 12,
+            ytick_size = 12,
+            axes_label_size = 16,
+            legend_size = 12,
+            title_size = 16,
+            font_family = 'serif'
+            ),
+        
+        text_position = dict(
+            title_height = 40
+            ),
+        
+        figure_size = dict(
+            xdimension = 6,
+            ydimension = 4),
+        
+        axes_options = dict(
+            x_axes_minticks = 4,
+            x_axes_maxticks = 8,
+            y_axes_decimalpt = 1),
+        
+        axes_label_options = dict(
+            rotate_x_labels = True,
+            rotate_at_num_labels = 7,
+            rotation_angle = 45),
+        
+        plot_data = dict(
+            curtailment_property = 'Curtailment',
+            include_total_pumped_load_line = True,
+            include_timeseries_pumped_load_line = True),
+
+        multithreading_workers = 16,
+
+        formatter_settings = dict(
+            num_workers = 1,
+            scenario_workers = 1,
+            max_workers = None,
+            streaming = False,
+            storage_layout = 'long',
+            storage_backend = 'hdf5',
+            storage_profile = 'archive',
+            incremental = False,
+            native_reader = False,
+            max_open_partitions = 16,
+            memory_budget = None,
+            performance_report = False,
+            spatial_rollups = False,
+            temporal_rollups = [],
+            watch_poll_interval = 60,
+            watch_settle_time = 120,
+            watch_idle_timeout = None,
+            queue_claim_timeout = 600),
+
+        figure_file_format = 'svg',
+        
+        shift_leapday = False,
+        skip_existing_properties = True,
+        auto_convert_units = True,
+        plot_title_as_region = True,
+        
+        user_defined_inputs_file = 'Marmot_user_defined_inputs.csv',
+
+        plot_select_file = 'Marmot_plot_select.csv',
+
+        plexos_properties_file = 'plexos_properties.csv',
+        
+        color_dictionary_file = 'colour_dictionary.csv',
+        ordered_gen_categories = 'ordered_gen_categories.csv'
+        )
+
+
 def createConfig(configfile_path: str):
     """Creates config.yml file using default values.
 
@@ -84,6 +166,60 @@ def createConfig(configfile_path: str):
     `include_timeseries_pumped_load_line` specifies whether to include the line representing pumped load 
     in timeseries generation plots*
 
+    - **formatter_settings:**
+
+        - num_workers: 1
+        - scenario_workers: 1
+        - max_workers: null
+        - streaming: false
+        - storage_layout: long
+        - storage_backend: hdf5
+        - storage_profile: archive
+        - incremental: false
+        - native_reader: false
+        - max_open_partitions: 16
+        - memory_budget: null
+        - performance_report: false
+        - spatial_rollups: false
+        - temporal_rollups: []
+        - watch_poll_interval: 60
+        - watch_settle_time: 120
+        - watch_idle_timeout: null
+        - queue_claim_timeout: 600
+
+    *Controls how the formatter processes data. `num_workers` sets the number of worker 
+    processes used to process properties in parallel, the default of 1 processes properties 
+    sequentially in the main process. `scenario_workers` sets the number of scenarios 
+    formatted concurrently, each in its own process and log file. `max_workers` caps the total 
+    number of worker processes, null uses the number of CPUs. `streaming` appends each h5plexos 
+    partition to the formatted file as soon as it is processed, bounding memory use to a single 
+    partition. `storage_layout` sets how properties are saved, long (default) or wide, a 
+    timestamp x object matrix with a shared dimension table per object class. `storage_backend` 
+    sets where properties are saved, hdf5 (default) or parquet (requires pyarrow). 
+    `storage_profile` selects the compression settings, archive (default), balanced or fast. 
+    `incremental` records a manifest of the h5plexos partitions next to the formatted file, 
+    when a partition is re-run only the properties and time ranges it affects are reformatted, 
+    false (default) reformats properties from all partitions. 
+    `native_reader` reads property data directly from the h5plexos files into arrays instead 
+    of through h5plexos PLEXOSSolution, false (default) uses PLEXOSSolution. 
+    `max_open_partitions` limits the number of h5plexos partitions held open at once. 
+    `memory_budget` in MB splits partitions of properties that do not fit into object chunks, 
+    null processes whole partitions. `performance_report` saves the read, process, overlap 
+    removal and write time, rows, bytes written and peak memory increase of each property and partition 
+    to {Scenario}_formatted.performance.json and .csv, false (default) saves no report. 
+    `spatial_rollups` also saves generator properties summed by technology and region, zone 
+    and each Region_Mapping aggregation, 
+    which the plotter reads when a plot does not need generator level detail. 
+    `temporal_rollups` lists the resolutions, hourly, daily and/or monthly, at which interval 
+    properties are also saved as the energy of each period, which the plotter reads for plots 
+    of totals and monthly values. The `watch_` settings apply to watch mode 
+    (`python marmot_h5_formatter.py --watch`), which formats the partitions of running scenarios 
+    as they finish. `watch_poll_interval` sets the seconds between polls of the h5plexos folders, 
+    `watch_settle_time` the seconds a partition must be unchanged before it is formatted and 
+    `watch_idle_timeout` the seconds without new partitions after which watching stops, 
+    null watches until interrupted. `queue_claim_timeout` sets the seconds after which work units 
+    claimed by a distributed worker which stopped are released to other workers*
+
     - **figure_file_format:** svg
 
     *Adjust the plot image format. The default is **svg**, a vector-based image. 
@@ -130,57 +266,7 @@ def createConfig(configfile_path: str):
     Args:
         configfile_path (str): Path to config.yml file
     """
-    data = dict(
-        
-        font_settings = dict(
-            xtick_size = 12,
-            ytick_size = 12,
-            axes_label_size = 16,
-            legend_size = 12,
-            title_size = 16,
-            font_family = 'serif'
-            ),
-        
-        text_position = dict(
-            title_height = 40
-            ),
-        
-        figure_size = dict(
-            xdimension = 6,
-            ydimension = 4),
-        
-        axes_options = dict(
-            x_axes_minticks = 4,
-            x_axes_maxticks = 8,
-            y_axes_decimalpt = 1),
-        
-        axes_label_options = dict(
-            rotate_x_labels = True,
-            rotate_at_num_labels = 7,
-            rotation_angle = 45),
-        
-        plot_data = dict(
-            curtailment_property = 'Curtailment',
-            include_total_pumped_load_line = True,
-            include_timeseries_pumped_load_line = True),
-
-        multithreading_workers = 16,
-        figure_file_format = 'svg',
-        
-        shift_leapday = False,
-        skip_existing_properties = True,
-        auto_convert_units = True,
-        plot_title_as_region = True,
-        
-        user_defined_inputs_file = 'Marmot_user_defined_inputs.csv',
-
-        plot_select_file = 'Marmot_plot_select.csv',
-
-        plexos_properties_file = 'plexos_properties.csv',
-        
-        color_dictionary_file = 'colour_dictionary.csv',
-        ordered_gen_categories = 'ordered_gen_categories.csv'
-        )
+    data = default_config()
 
     with open(configfile_path, "w") as cfgfile:
         yaml.safe_dump(data, cfgfile,default_flow_style=False, sort_keys=False)
@@ -209,10 +295,18 @@ def parser(top_level: str, second_level: str = None) -> Union[dict, str, int, fl
     with open(configfile_path, "r") as ymlfile:
         cfg = yaml.safe_load(ymlfile.read())
     
-    if not second_level:
-        value = cfg[top_level]
-    else:
-        value = cfg[top_level][second_level]
+    try:
+        if not second_level:
+            value = cfg[top_level]
+        else:
+            value = cfg[top_level][second_level]
+    except KeyError:
+        # Setting was added after the config.yml file was created, use the default
+        cfg = default_config()
+        if not second_level:
+            value = cfg[top_level]
+        else:
+            value = cfg[top_level][second_level]
     return value 
     
 
@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+"""Formatted properties calculated from other formatted properties.
+
+Derived properties are declared in the DERIVED_PROPERTIES registry with the
+keys of their inputs and a function which calculates them, or as an alias of
+another property. The formatter passes each property to a DerivedPropertyGraph
+as soon as it has been processed, so derived properties are calculated from
+the frames already in memory, or partition by partition in streaming mode.
+Aliases are saved as links to the property they alias.
+
+Additional derived properties can be registered before running the formatter,
+e.g a net load property:
+
+    from marmot.formatterutils.derived import register_derived_property
+
+    def net_load(load, generation, **kwargs):
+        return load - generation.groupby(['timestamp', 'region']).sum()
+
+    register_derived_property('region_Net_Load',
+                              ['region_Load', 'generator_Generation'],
+                              net_load)
+"""
+
+import logging
+import pandas as pd
+
+# Registered derived properties, {key: dict(inputs, function, alias_of, aggregated)}
+DERIVED_PROPERTIES = {}
+
+
+def register_derived_property(key: str, inputs: list = None, function=None,
+                              alias_of: str = None, aggregated: bool = False,
+                              registry: dict = None) -> None:
+    """Registers a derived property, replacing any property with the same key.
+
+    Args:
+        key (str): formatted property identifier of the derived property,
+            e.g generator_Curtailment
+        inputs (list, optional): formatted property identifiers of the inputs,
+            which may themselves be derived properties. Defaults to None.
+        function (callable, optional): Calculates the derived property. Called
+            with the input frames in the order of inputs and the formatter
+            settings as keyword arguments, e.g VoLL, and returns the long
+            formatted property. Defaults to None.
+        alias_of (str, optional): formatted property identifier of a property
+            this property is an alias of. Aliases are saved as links and do not
+            need inputs or a function. Defaults to None.
+        aggregated (bool, optional): If True the function sums its inputs across
+            objects or periods, e.g generators by region or intervals by month, 
+            and returns a property with a timestamp level. In streaming mode the 
+            results of the object chunks and partitions of the inputs are then 
+            summed where their index overlaps, rather than appended. 
+            Defaults to False.
+        registry (dict, optional): Registry to add the derived property to, e.g
+            the registry of a single formatter run. Defaults to None, 
+            DERIVED_PROPERTIES.
+
+    Raises:
+        ValueError: If neither a function and inputs nor alias_of are given.
+    """
+    registry = DERIVED_PROPERTIES if registry is None else registry
+    if alias_of is not None:
+        registry[key] = dict(inputs=[alias_of], function=None, alias_of=alias_of,
+                             aggregated=False)
+    elif function is not None and inputs:
+        registry[key] = dict(inputs=list(inputs), function=function, alias_of=None,
+                             aggregated=aggregated)
+    else:
+        raise ValueError(f"Derived property {key} requires inputs and a function, or alias_of")
+
+
+def curtailment(available_capacity: pd.DataFrame, generation: pd.DataFrame,
+                **kwargs) -> pd.DataFrame:
+    """Calculates generator curtailment as available capacity minus generation."""
+    return available_capacity - generation
+
+
+def cost_unserved_energy(unserved_energy: pd.DataFrame, VoLL: int = 10000,
+                         **kwargs) -> pd.DataFrame:
+    """Calculates the cost of unserved energy using the value of lost load."""
+    return unserved_energy * VoLL
+
+
+register_derived_property('generator_Curtailment',
+                          ['generator_Available_Capacity', 'generator_Generation'],
+                          curtailment)
+register_derived_property('generator_Upward_Available_Capacity',
+                          alias_of='generator_Curtailment')
+register_derived_property('region_Cost_Unserved_Energy',
+                          ['region_Unserved_Energy'], cost_unserved_energy)
+register_derived_property('zone_Cost_Unserved_Energy',
+                          ['zone_Unserved_Energy'], cost_unserved_energy)
+
+
+def base_inputs(key: str, registry: dict = None) -> set:
+    """Gets the formatted properties a derived property is ultimately calculated from.
+
+    Args:
+        key (str): formatted property identifier.
+        registry (dict, optional): Registry of derived properties. 
+            Defaults to None, DERIVED_PROPERTIES.
+
+    Returns:
+        set: Non derived formatted property identifiers.
+    """
+    registry = DERIVED_PROPERTIES if registry is None else registry
+    if key not in registry:
+        return {key}
+    inputs = set()
+    for input_key in registry[key]['inputs']:
+        inputs |= base_inputs(input_key, registry)
+    return inputs
+
+
+def derived_order(keys: list, registry: dict = None) -> list:
+    """Orders derived properties so that each comes after any derived property it uses.
+
+    Args:
+        keys (list): Derived formatted property identifiers.
+        registry (dict, optional): Registry of derived properties. 
+            Defaults to None, DERIVED_PROPERTIES.
+
+    Raises:
+        ValueError: If derived properties depend on each other in a cycle.
+
+    Returns:
+        list: Derived formatted property identifiers in calculation order.
+    """
+    registry = DERIVED_PROPERTIES if registry is None else registry
+    ordered = []
+    visiting = set()
+
+    def visit(key):
+        if key in ordered or key not in registry:
+            return
+        if key in visiting:
+            raise ValueError(f"Derived property {key} depends on itself")
+        visiting.add(key)
+        for input_key in registry[key]['inputs']:
+            visit(input_key)
+        visiting.discard(key)
+        ordered.append(key)
+
+    for key in keys:
+        visit(key)
+    selected = set(keys)
+    return [key for key in ordered if key in selected]
+
+
+class DerivedPropertyGraph():
+    """Calculates and saves derived properties as their inputs become available.
+
+    Input frames are only held while a pending derived property still needs them.
+    """
+
+    def __init__(self, keys: list, backend, logger: logging.Logger = None,
+                 registry: dict = None, **params):
+        """
+        Args:
+            keys (list): Derived formatted property identifiers to calculate.
+            backend (PropertyWriter, HDF5Backend, ParquetBackend): Writer or 
+                storage backend to save to.
+            logger (logging.Logger, optional): logger object from SetupLogger.
+                Defaults to None.
+            registry (dict, optional): Registry of the derived properties, e.g 
+                DERIVED_PROPERTIES along with the rollups of a formatter run. 
+                Defaults to None, DERIVED_PROPERTIES.
+            **params: Formatter settings passed to the derived property functions,
+                e.g VoLL.
+        """
+        self.registry = DERIVED_PROPERTIES if registry is None else registry
+        self.pending = derived_order(keys, self.registry)
+        self.backend = backend
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self.params = params
+        self.frames = {}
+
+    def required_inputs(self) -> set:
+        """set: Inputs of the pending derived properties."""
+        return {input_key for key in self.pending
+                for input_key in self.registry[key]['inputs']}
+
+    def _calculate(self, key: str, frames: dict) -> pd.DataFrame:
+        """Calculates a derived property from its input frames.
+
+        Args:
+            key (str): Derived formatted property identifier.
+            frames (dict): Input frames, keys are formatted property identifiers.
+
+        Returns:
+            pd.DataFrame: Derived property.
+        """
+        spec = self.registry[key]
+        return spec['function'](*[frames[input_key] for input_key in spec['inputs']],
+                                **self.params)
+
+    def _save(self, key: str, df: pd.DataFrame = None) -> None:
+        """Saves a derived property, or links an alias, and marks it as complete."""
+        alias_of = self.registry[key]['alias_of']
+        if alias_of is not None:
+            self.backend.link(alias_of, key)
+            self.logger.info(f"{key} saved as a link to {alias_of}\n")
+        else:
+            self.backend.save(df, key)
+        self.pending.remove(key)
+
+    def _release(self) -> None:
+        """Releases input frames no longer needed by a pending derived property."""
+        required = self.required_inputs()
+        for input_key in list(self.frames):
+            if input_key not in required:
+                del self.frames[input_key]
+
+    def add(self, key: str, df: pd.DataFrame) -> None:
+        """Passes a processed property to the graph.
+
+        Any pending derived property whose inputs are now all available is
+        calculated and saved. Frames no longer needed are released.
+
+        Args:
+            key (str): formatted property identifier.
+            df (pd.DataFrame): Processed property, as saved.
+        """
+        if key in self.required_inputs():
+            self.frames[key] = df
+        for derived_key in list(self.pending):
+            inputs = self.registry[derived_key]['inputs']
+            if derived_key not in self.pending or not all(i in self.frames for i in inputs):
+                continue
+            self.logger.info(f"Calculating {derived_key}")
+            try:
+                if self.registry[derived_key]['alias_of'] is not None:
+                    self._save(derived_key)
+                    continue
+                derived = self._calculate(derived_key, self.frames)
+                self._save(derived_key, derived)
+            except Exception as e:
+                self.logger.warning(f"NOTE!! {derived_key} not calculated, {e}\n")
+                self.pending.remove(derived_key)
+                continue
+            if derived_key in self.required_inputs():
+                self.frames[derived_key] = derived
+            del derived
+        self._release()
+
+    def calculate_chunk(self, chunks: dict) -> dict:
+        """Calculates derived properties from a single partition of their inputs.
+
+        Used in streaming mode, aliases are not included.
+
+        Args:
+            chunks (dict): Processed data of a partition, keys are formatted
+                property identifiers.
+
+        Returns:
+            dict: Derived data of the partition, keys are formatted property
+            identifiers.
+        """
+        frames = dict(chunks)
+        derived_chunks = {}
+        for key in self.pending:
+            spec = self.registry[key]
+            if spec['alias_of'] is not None:
+                continue
+            if all(input_key in frames for input_key in spec['inputs']):
+                try:
+                    frames[key] = derived_chunks[key] = self._calculate(key, frames)
+                except Exception as e:
+                    self.logger.warning(f"NOTE!! {key} not calculated for this partition, {e}")
+        return derived_chunks
+
+    def stream_groups(self, keys: list) -> list:
+        """Groups properties which are inputs of the same pending derived property.
+
+        In streaming mode the properties of a group are processed together
+        partition by partition, so that derived properties can be calculated
+        from each partition while it is in memory.
+
+        Args:
+            keys (list): formatted property identifiers to be processed.
+
+        Returns:
+            list: Groups of formatted property identifiers, in the order of keys.
+        """
+        groups = {key: {key} for key in keys}
+        for derived_key in self.streamable(keys):
+            merged = set().union(*(groups[key] for key in base_inputs(derived_key, self.registry)))
+            for key in merged:
+                groups[key] = merged
+        ordered_groups = []
+        for key in keys:
+            group = [k for k in keys if k in groups[key]]
+            if group not in ordered_groups:
+                ordered_groups.append(group)
+        return ordered_groups
+
+    def streamable(self, keys: list) -> list:
+        """Gets the pending derived properties that can be calculated from the given 
+        properties alone, aliases are not included.
+
+        Args:
+            keys (list): formatted property identifiers.
+
+        Returns:
+            list: Derived formatted property identifiers.
+        """
+        return [key for key in self.pending if self.registry[key]['alias_of'] is None
+                and base_inputs(key, self.registry).issubset(keys)]
+
+    def streamed(self, key: str) -> None:
+        """Marks a derived property calculated by calculate_chunk as complete,
+        and links any pending aliases of it.
+
+        Args:
+            key (str): Derived formatted property identifier.
+        """
+        self.pending.remove(key)
+        for alias in list(self.pending):
+            if self.registry[alias]['alias_of'] == key:
+                self._save(alias)
+
+    def finish(self) -> None:
+        """Calculates the remaining pending derived properties.
+
+        Inputs which were not passed to the graph, e.g properties formatted
+        in a previous run, are read from the storage backend. Aliases are linked
+        if the property they alias is saved, without reading it. Derived properties
+        with unavailable inputs are skipped.
+        """
+        for key in list(self.pending):
+            if key not in self.pending:
+                continue
+            self.logger.info(f"Calculating {key}")
+            try:
+                alias_of = self.registry[key]['alias_of']
+                if alias_of is not None:
+                    if alias_of not in self.frames and alias_of not in self.backend.keys():
+                        raise KeyError(alias_of)
+                    self._save(key)
+                else:
+                    for input_key in self.registry[key]['inputs']:
+                        if input_key not in self.frames:
+                            self.frames[input_key] = self.backend.read(input_key)
+                    self.frames[key] = self._calculate(key, self.frames)
+                    self._save(key, self.frames[key])
+            except (KeyError, FileNotFoundError, OSError):
+                self.logger.warning(f"NOTE!! {key} inputs "
+                                    f"{self.registry[key]['inputs']} not available, "
+                                    "processing skipped\n")
+                self.pending.remove(key)
+            except Exception as e:
+                self.logger.warning(f"NOTE!! {key} not calculated, {e}\n")
+                self.pending.remove(key)
+            self._release()
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""Reads property data directly from h5plexos files.
+
+PLEXOSSolution returns each property as a Series indexed by a MultiIndex of
+category, name, property, band and timestamp, built from a python tuple per
+row. The formatter only uses the codes of that index, so H5PlexosReader reads
+the raw /data/ST/{timescale}/{class}/{property} dataset, the object names and
+the period timestamps into numpy, and builds the index levels and codes
+directly. Objects are ordered by category and name, as in PLEXOSSolution, so
+the formatted output is identical.
+"""
+
+import re
+import h5py
+import numpy as np
+import pandas as pd
+
+
+def parse_version(version_string) -> tuple:
+    """Parses the h5plexos version attribute of a h5plexos file.
+
+    Args:
+        version_string (str, bytes): Version attribute, e.g v0.6.2
+
+    Returns:
+        tuple: Version, e.g (0, 6, 2), (0, 5, 0) if the attribute is missing.
+    """
+    if version_string is None:
+        return (0, 5, 0)
+    if isinstance(version_string, bytes):
+        version_string = version_string.decode('UTF-8')
+    return tuple(int(v) for v in re.findall(r'\d+', version_string))
+
+
+def timescales_in_window(h5filepath: str, start: pd.Timestamp = None,
+                         end: pd.Timestamp = None) -> set:
+    """Gets the timescales of a h5plexos file with any period in a time window.
+
+    The year timescale is included if any other timescale is in the window.
+
+    Args:
+        h5filepath (str): Path to h5plexos file.
+        start (pd.Timestamp, optional): Start of the window, inclusive.
+            Defaults to None, no start.
+        end (pd.Timestamp, optional): End of the window, inclusive.
+            Defaults to None, no end.
+
+    Returns:
+        set: Timescales, e.g {'interval', 'year'}
+    """
+    timescales = set()
+    with h5py.File(h5filepath, 'r') as f:
+        if 'metadata/times' not in f:
+            return timescales
+        for timescale, dset in f['metadata/times'].items():
+            if timescale == 'year' or len(dset) == 0:
+                continue
+            times = pd.to_datetime(np.char.decode(dset[()], 'UTF-8'),
+                                   format="%Y-%m-%dT%H:%M:%S")
+            in_window = np.ones(len(times), dtype=bool)
+            if start is not None:
+                in_window &= times >= start
+            if end is not None:
+                in_window &= times <= end
+            if in_window.any():
+                timescales.add(timescale)
+        if timescales and 'year' in f['metadata/times']:
+            timescales.add('year')
+    return timescales
+
+
+class PropertyArrays():
+    """Raw data of a h5plexos property, as the index levels and codes of each row
+    and a values array.
+    """
+
+    def __init__(self, values: np.ndarray, names: list, levels: list,
+                 codes: list, units: str):
+        """
+        Args:
+            values (np.ndarray): Property values, one per row.
+            names (list): Index level names.
+            levels (list): Unique values of each index level, as pd.Index.
+            codes (list): Position in the level of each row, as np.ndarray.
+            units (str): Units of the property in the h5plexos file.
+        """
+        self.values = values
+        self.names = names
+        self.levels = levels
+        self.codes = codes
+        self.units = units
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class H5PlexosReader():
+    """Reads properties of a h5plexos file as PropertyArrays.
+
+    Has the h5file, version and close attributes of PLEXOSSolution, so it can
+    be used in its place by the formatter. Object names and timestamps are read
+    once per class and timescale.
+    """
+
+    def __init__(self, h5filepath: str):
+        """
+        Args:
+            h5filepath (str): Path to h5plexos file.
+        """
+        self.h5file = h5py.File(h5filepath, 'r')
+        self.version = parse_version(self.h5file.attrs.get('h5plexos'))
+        self._objects = {}
+        self._times = {}
+
+    def close(self) -> None:
+        """Closes the h5plexos file."""
+        self.h5file.close()
+
+    def _class_path(self, plexos_class: str) -> str:
+        """Handles the h5plexos naming discrepancy of object classes."""
+        if "_" not in plexos_class and (0, 6, 0) <= self.version < (0, 7, 0):
+            return f"{plexos_class}s"
+        return plexos_class
+
+    def _object_codes(self, plexos_class: str) -> tuple:
+        """Gets the object levels and codes of a class or relation.
+
+        Args:
+            plexos_class (str): PLEXOS class or relation e.g generator,
+                reserves_generators
+
+        Returns:
+            tuple: (names, levels, codes, order), order sorts the objects
+            by category and name, or parent and child.
+        """
+        if plexos_class not in self._objects:
+            if "_" in plexos_class:
+                names = ['parent', 'child']
+                objects = self.h5file[f'metadata/relations/{plexos_class}'][()]
+            else:
+                names = ['category', 'name']
+                objects = self.h5file[f'metadata/objects/{self._class_path(plexos_class)}'][()]
+            levels = []
+            codes = []
+            for name in names:
+                # Sorted unique values, only the uniques are decoded
+                uniques, inverse = np.unique(objects[name], return_inverse=True)
+                levels.append(pd.Index(np.char.decode(uniques, 'UTF-8').astype(object),
+                                       name=name))
+                codes.append(inverse.astype(np.int32))
+            order = np.lexsort((codes[1], codes[0]))
+            self._objects[plexos_class] = (names, levels,
+                                           [c[order] for c in codes], order)
+        return self._objects[plexos_class]
+
+    def _timestamps(self, timescale: str) -> pd.DatetimeIndex:
+        """Gets the timestamps of a timescale."""
+        if timescale not in self._times:
+            times = self.h5file[f'metadata/times/{timescale}'][()]
+            self._times[timescale] = pd.to_datetime(np.char.decode(times, 'UTF-8'),
+                                                    format="%Y-%m-%dT%H:%M:%S")
+        return self._times[timescale]
+
+    def dataset_shape(self, plexos_class: str, plexos_prop: str,
+                      timescale: str = 'interval') -> tuple:
+        """Gets the shape of the dataset of a property, without reading it.
+
+        Args:
+            plexos_class (str): PLEXOS class or relation e.g generator,
+                reserves_generators
+            plexos_prop (str): PLEXOS property e.g Max Capacity, Generation etc.
+            timescale (str, optional): Data timescale, e.g interval.
+                Defaults to 'interval'.
+
+        Returns:
+            tuple: (objects, periods, bands), None if the property is not
+            in the h5plexos file.
+        """
+        data_path = f'/data/ST/{timescale}/{self._class_path(plexos_class)}/{plexos_prop}'
+        if data_path not in self.h5file:
+            return None
+        return self.h5file[data_path].shape
+
+    def dataset_timestamps(self, plexos_class: str, plexos_prop: str,
+                           timescale: str = 'interval') -> pd.DatetimeIndex:
+        """Gets the timestamps of the periods of a property, without reading its data.
+
+        Args:
+            plexos_class (str): PLEXOS class or relation e.g generator,
+                reserves_generators
+            plexos_prop (str): PLEXOS property e.g Max Capacity, Generation etc.
+            timescale (str, optional): Data timescale, e.g interval.
+                Defaults to 'interval'.
+
+        Returns:
+            pd.DatetimeIndex: Timestamp of each period of the dataset, None if
+            the property is not in the h5plexos file.
+        """
+        data_path = f'/data/ST/{timescale}/{self._class_path(plexos_class)}/{plexos_prop}'
+        if data_path not in self.h5file:
+            return None
+        dset = self.h5file[data_path]
+        period_offset = int(dset.attrs.get('period_offset', 0))
+        return self._timestamps(timescale)[period_offset:period_offset + dset.shape[1]]
+
+    @staticmethod
+    def _read_objects(dset: h5py.Dataset, objects: np.ndarray, periods: slice) -> np.ndarray:
+        """Reads the rows of a subset of objects from a dataset.
+
+        A contiguous block is read if the objects are close together,
+        otherwise only the objects are read.
+
+        Args:
+            dset (h5py.Dataset): Property dataset.
+            objects (np.ndarray): Object positions in the dataset, in output order.
+            periods (slice): Periods to read.
+
+        Returns:
+            np.ndarray: Data of the objects, in the order of objects.
+        """
+        first, last = objects.min(), objects.max() + 1
+        if last - first <= 2 * len(objects):
+            return dset[first:last, periods, :][objects - first]
+        selection = np.sort(objects)
+        return dset[selection, periods, :][np.searchsorted(selection, objects)]
+
+    def query_property(self, plexos_class: str, plexos_prop: str,
+                       timescale: str = 'interval', start: pd.Timestamp = None,
+                       end: pd.Timestamp = None, object_chunk: tuple = None) -> PropertyArrays:
+        """Reads a property of a PLEXOS class or relation.
+
+        Rows are ordered by object, timestamp and band. The band level is
+        only included when the property has more than one band. If a start
+        or end is given, only the periods in that time window are read.
+        If an object chunk is given, only that range of the objects is read.
+
+        Args:
+            plexos_class (str): PLEXOS class or relation e.g generator,
+                reserves_generators
+            plexos_prop (str): PLEXOS property e.g Max Capacity, Generation etc.
+            timescale (str, optional): Data timescale, e.g interval.
+                Defaults to 'interval'.
+            start (pd.Timestamp, optional): Start of the time window, inclusive.
+                Defaults to None, no start.
+            end (pd.Timestamp, optional): End of the time window, inclusive.
+                Defaults to None, no end.
+            object_chunk (tuple, optional): (chunk, n_chunks), the objects are
+                split into n_chunks ranges of equal size in category and name
+                order and only the chunk-th range is read. Defaults to None,
+                all objects are read.
+
+        Raises:
+            KeyError: If the property is not in the h5plexos file.
+
+        Returns:
+            PropertyArrays: Property data and units.
+        """
+        data_path = f'/data/ST/{timescale}/{self._class_path(plexos_class)}/{plexos_prop}'
+        if data_path not in self.h5file:
+            raise KeyError(data_path)
+        dset = self.h5file[data_path]
+        if (0, 6, 0) <= self.version < (0, 7, 0):
+            units = dset.attrs['units'].decode('UTF-8')
+        else:
+            units = dset.attrs['unit']
+
+        names, levels, object_codes, order = self._object_codes(plexos_class)
+        period_offset = int(dset.attrs.get('period_offset', 0))
+        timestamps = self._timestamps(timescale)[period_offset:period_offset + dset.shape[1]]
+        first, last = 0, len(timestamps)
+        if start is not None:
+            first = timestamps.searchsorted(start, side='left')
+        if end is not None:
+            last = max(first, timestamps.searchsorted(end, side='right'))
+        periods = slice(first, last)
+        timestamps = timestamps[periods]
+        if object_chunk is not None:
+            chunk, n_chunks = object_chunk
+            objects = slice(len(order) * chunk // n_chunks, len(order) * (chunk + 1) // n_chunks)
+            order = order[objects]
+            object_codes = [c[objects] for c in object_codes]
+            data = self._read_objects(dset, order, periods)
+        elif (first, last) != (0, dset.shape[1]):
+            data = dset[:, periods, :][order]
+        else:
+            data = dset[()][order]
+        n_objects, n_periods, n_bands = data.shape
+
+        rows_per_object = n_periods * n_bands
+        codes = [np.repeat(c, rows_per_object) for c in object_codes]
+        names = names + ['timestamp']
+        levels = levels + [timestamps.rename('timestamp')]
+        codes.append(np.tile(np.repeat(np.arange(n_periods, dtype=np.int32), n_bands),
+                             n_objects))
+        if n_bands > 1:
+            names.append('band')
+            levels.append(pd.Index(np.arange(1, n_bands + 1), name='band'))
+            codes.append(np.tile(np.arange(n_bands, dtype=np.int32), n_objects * n_periods))
+        return PropertyArrays(data.reshape(-1), names, levels, codes, units)
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""Manifest of the h5plexos partitions used to create a formatted file.
+
+The manifest is saved as a json sidecar next to the formatted h5 file,
+{Scenario}_formatted.manifest.json. It records the path, size, modification
+time and the time range of each timescale of every input partition, along
+with the timescale, source partitions and any time window of each formatted
+property. A sha256 content hash is only calculated for a recorded partition
+whose size or modification time has changed, so a partition rewritten 
+with the same contents as its recorded hash is not treated as changed.
+
+On a rerun the formatter compares the partitions in the h5plexos folder
+against the manifest, so that only the properties and time ranges affected
+by re-run partitions need to be recomputed.
+"""
+
+import os
+import json
+import hashlib
+import h5py
+import pandas as pd
+
+MANIFEST_VERSION = 1
+
+
+def manifest_path(file_name: str) -> str:
+    """Gets the manifest sidecar path of a formatted h5 file.
+
+    Args:
+        file_name (str): Path to formatted h5 file.
+
+    Returns:
+        str: Path to manifest json file.
+    """
+    return f"{os.path.splitext(file_name)[0]}.manifest.json"
+
+
+def file_hash(path: str, chunk_size: int = 1 << 24) -> str:
+    """Calculates the sha256 hash of a file's contents.
+
+    Args:
+        path (str): Path to file.
+        chunk_size (int, optional): Number of bytes read at once.
+            Defaults to 16 MB.
+
+    Returns:
+        str: Hex digest of the file contents.
+    """
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def partition_times(path: str) -> dict:
+    """Gets the first and last timestamp of each timescale in a h5plexos partition.
+
+    Args:
+        path (str): Path to h5plexos file.
+
+    Returns:
+        dict: Keys are the timescales, e.g interval, values are
+        [start, end] as iso formatted strings.
+    """
+    times = {}
+    with h5py.File(path, 'r') as f:
+        if 'metadata/times' not in f:
+            return times
+        for timescale, dset in f['metadata/times'].items():
+            if len(dset) == 0:
+                continue
+            first, last = dset[0], dset[-1]
+            first = first.decode('UTF-8') if isinstance(first, bytes) else str(first)
+            last = last.decode('UTF-8') if isinstance(last, bytes) else str(last)
+            times[timescale] = [pd.Timestamp(first).isoformat(),
+                                pd.Timestamp(last).isoformat()]
+    return times
+
+
+class PartitionManifest():
+    """Partition and property manifest of a formatted h5 file.
+
+    Partitions are compared by size and modification time, and only hashed 
+    when these have changed, so checking an unchanged scenario is cheap.
+    """
+
+    def __init__(self, file_name: str):
+        """
+        Args:
+            file_name (str): Path to formatted h5 file.
+        """
+        self.path = manifest_path(file_name)
+        self.partitions = {}
+        self.keys = {}
+        if os.path.isfile(self.path):
+            with open(self.path, 'r') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == MANIFEST_VERSION:
+                self.partitions = manifest.get('partitions', {})
+                self.keys = manifest.get('keys', {})
+
+    @property
+    def exists(self) -> bool:
+        """bool: True if partitions have previously been recorded."""
+        return bool(self.partitions)
+
+    def fingerprint(self, path: str) -> dict:
+        """Gets the size, modification time, content hash and time ranges of a partition.
+
+        The recorded entry is reused if the size and modification time of the 
+        partition are unchanged. The content hash is only calculated if the 
+        partition was recorded with a different size or modification time, 
+        otherwise it is None.
+
+        Args:
+            path (str): Path to h5plexos file.
+
+        Returns:
+            dict: Partition entry of the manifest.
+        """
+        stat = os.stat(path)
+        previous = self.partitions.get(os.path.basename(path), {})
+        if (previous.get('size') == stat.st_size
+                and previous.get('mtime') == stat.st_mtime):
+            return previous
+        return {'path': os.path.abspath(path),
+                'size': stat.st_size,
+                'mtime': stat.st_mtime,
+                'sha256': file_hash(path) if previous else None,
+                'times': partition_times(path)}
+
+    def compare(self, HDF5_folder_in: str, files_list: list) -> dict:
+        """Compares the partitions in the h5plexos folder against the manifest.
+
+        Args:
+            HDF5_folder_in (str): Location of original PLEXOS solutions h5 files.
+            files_list (list): List of all h5 files in hdf5 folder in alpha numeric order.
+
+        Partitions with a changed size or modification time are changed unless 
+        their contents have the same hash as recorded.
+
+        Returns:
+            dict: Current partition entries under 'current' and lists of the
+            'changed', 'added' and 'removed' partitions.
+        """
+        current = {partition: self.fingerprint(os.path.join(HDF5_folder_in, partition))
+                   for partition in files_list}
+        changed = [partition for partition in files_list if partition in self.partitions
+                   and current[partition] is not self.partitions[partition]
+                   and current[partition]['sha256'] != self.partitions[partition].get('sha256')]
+        added = [partition for partition in files_list if partition not in self.partitions]
+        removed = [partition for partition in self.partitions if partition not in current]
+        return {'current': current, 'changed': changed,
+                'added': added, 'removed': removed}
+
+    def affected_keys(self, partitions: list) -> list:
+        """Gets the recorded properties which were created from any of the given partitions.
+
+        Args:
+            partitions (list): Partition file names.
+
+        Returns:
+            list: formatted property identifiers.
+        """
+        partitions = set(partitions)
+        return [key for key, entry in self.keys.items()
+                if partitions.intersection(entry['partitions'])]
+
+    @staticmethod
+    def kept_range(partitions: dict, partition: str, timescale: str,
+                   files_list: list) -> tuple:
+        """Gets the time range a partition reports in the formatted output.
+
+        Periods overlapping the previous partition are reported by the
+        previous partition, so a partition reports the timestamps after
+        the end of the previous partition up to its own end.
+
+        Args:
+            partitions (dict): Partition entries of a manifest.
+            partition (str): Partition file name.
+            timescale (str): Data timescale, e.g interval.
+            files_list (list): List of the h5 files in alpha numeric order
+                the partition entries belong to.
+
+        Returns:
+            tuple: (start, end) pd.Timestamps, start is exclusive and is None
+            for the first partition. Returns None if the time range of the
+            timescale is unknown.
+        """
+        end = partitions[partition]['times'].get(timescale)
+        if end is None:
+            return None
+        position = files_list.index(partition)
+        start = None
+        if position > 0:
+            previous = partitions[files_list[position - 1]]['times'].get(timescale)
+            if previous is None:
+                return None
+            start = pd.Timestamp(previous[1])
+        return start, pd.Timestamp(end[1])
+
+    def record_key(self, key: str, timescale: str, partitions: list,
+                   window: list = None) -> None:
+        """Records the timescale, source partitions and time window of a formatted property.
+
+        Args:
+            key (str): formatted property identifier, e.g generator_Generation
+            timescale (str): Data timescale, e.g interval.
+            partitions (list): Partition file names the property was created from.
+            window (list, optional): [start, end] of the time window the property 
+                was formatted for, as iso formatted strings. Defaults to None, 
+                the full horizon.
+        """
+        self.keys[key] = {'timescale': timescale, 'partitions': list(partitions),
+                          'window': window}
+
+    def remove_key(self, key: str) -> None:
+        """Removes a formatted property from the manifest.
+
+        Args:
+            key (str): formatted property identifier, e.g generator_Generation
+        """
+        self.keys.pop(key, None)
+
+    def save(self, partitions: dict = None) -> None:
+        """Saves the manifest, replacing any previous version in one step.
+
+        Args:
+            partitions (dict, optional): Partition entries to record, as returned
+                by compare. Defaults to None, in which case the current
+                entries are kept.
+        """
+        if partitions is not None:
+            self.partitions = partitions
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': MANIFEST_VERSION,
+                       'partitions': self.partitions,
+                       'keys': self.keys}, f, indent=2)
+        os.replace(tmp_path, self.path)
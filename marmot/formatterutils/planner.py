@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""Estimates the cost of formatting properties before they are processed.
+
+MarmotFormat.plan reads only the shape, attributes and period timestamps of
+each property dataset in the h5plexos partitions. The output rows of each
+property are counted the way the formatter combines partitions, with periods
+reported by the previous partition and periods outside the time window
+removed. Memory, file size and duration are estimated from the rows with the
+rates measured by the last performance report of the scenario, if there is
+one, otherwise with the default rates below.
+"""
+
+import os
+import json
+
+try:
+    import psutil
+except ModuleNotFoundError:
+    psutil = None
+
+# Approximate on disk bytes per row, by storage backend and whether the property
+# is appended partition by partition. Appended hdf5 properties are saved as PyTables
+# tables, which store the index as fixed width strings
+DEFAULT_BYTES_PER_ROW = {('hdf5', False): 3.5, ('hdf5', True): 38,
+                         ('parquet', False): 4.5, ('parquet', True): 4.5}
+
+# Approximate seconds to read, process and save each row, by storage profile
+DEFAULT_SECONDS_PER_ROW = {'archive': 3.5e-6, 'balanced': 1.3e-6, 'fast': 1e-6}
+
+# Approximate seconds to append each row to a PyTables table, used instead of the
+# profile rate for appended hdf5 properties
+HDF5_APPEND_SECONDS_PER_ROW = 6e-5
+
+# Approximate bytes of memory per row of a property held in memory in the long format
+PROPERTY_BYTES_PER_ROW = 170
+
+
+def available_memory_mb() -> float:
+    """Gets the memory available to the formatter.
+
+    Uses psutil if it is installed, otherwise the free physical memory
+    reported by the operating system.
+
+    Returns:
+        float: Available memory in MB, None if it cannot be determined.
+    """
+    if psutil is not None:
+        return psutil.virtual_memory().available / 1e6
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except (AttributeError, ValueError, OSError):
+        # sysconf is not available on Windows
+        return None
+
+
+def measured_rates(report_file: str, **settings) -> dict:
+    """Gets the measured seconds and bytes per row of each property from a
+    performance report.
+
+    Args:
+        report_file (str): Path to a {Scenario}_formatted.performance.json file.
+        **settings: Formatter settings the report must have been run with,
+            e.g storage_backend='hdf5'.
+
+    Returns:
+        dict: (seconds per row, bytes per row) of each property with rows,
+        empty if the report does not exist or was run with other settings.
+    """
+    if not os.path.isfile(report_file):
+        return {}
+    with open(report_file, 'r') as f:
+        report = json.load(f)
+    run = report.get('run', {})
+    if any(run.get(setting) != value for setting, value in settings.items()):
+        return {}
+    return {p['property']: (p['total_time'] / p['rows'], p['bytes_written'] / p['rows'])
+            for p in report.get('properties', []) if p['rows'] > 0}
+
+
+def count_rows(partitions: list, trim_overlap: bool = True, window: tuple = None) -> dict:
+    """Counts the rows a property is formatted to from the shapes of its partitions.
+
+    Args:
+        partitions (list): (timestamps, objects, bands) of each partition
+            with the property, in alpha numeric order.
+        trim_overlap (bool, optional): If True, periods reported by a previous
+            partition are removed, as for all timescales except year. Defaults to True.
+        window (tuple, optional): (start, end) time window, with None for an open end.
+            Defaults to None, no window, as for the year timescale.
+
+    Returns:
+        dict: 'rows' saved, 'values' read, the most values read from a single
+        partition ('partition_values') and from a single object of a partition
+        ('object_values').
+    """
+    counts = dict(rows=0, values=0, partition_values=0, object_values=0)
+    previous_end = None
+    for timestamps, objects, bands in partitions:
+        if window is not None:
+            start, end = window
+            if start is not None:
+                timestamps = timestamps[timestamps >= start]
+            if end is not None:
+                timestamps = timestamps[timestamps <= end]
+        values = len(timestamps) * objects * bands
+        kept = len(timestamps)
+        if trim_overlap and len(timestamps):
+            if previous_end is not None:
+                kept = int((timestamps > previous_end).sum())
+            previous_end = max(timestamps.max(), previous_end or timestamps.max())
+        counts['rows'] += kept * objects * bands
+        counts['values'] += values
+        counts['partition_values'] = max(counts['partition_values'], values)
+        counts['object_values'] = max(counts['object_values'], len(timestamps) * bands)
+    return counts
@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+"""Performance report of a formatter run.
+
+The formatter records the time spent reading, processing, removing partition
+overlaps from and writing each property, per partition, along with the number
+of rows and the bytes written. Memory is recorded as the peak increase of the
+process memory while each partition of a property is read and processed, so
+the properties and partitions which dominate memory use can be found, and as
+the resident memory of the process after each step. The report is
+saved next to the formatted file as {Scenario}_formatted.performance.json and
+{Scenario}_formatted.performance.csv, and can also be passed to a callback,
+e.g to track performance across Marmot versions.
+
+Properties saved in a single write, rather than appended partition by
+partition, have their write recorded under the partition 'all'.
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import threading
+import pandas as pd
+
+try:
+    import resource
+except ModuleNotFoundError:
+    # Not available on Windows
+    resource = None
+
+try:
+    import psutil
+except ModuleNotFoundError:
+    psutil = None
+
+# Fields of each record, in report order
+RECORD_FIELDS = ('property', 'partition', 'read_time', 'process_time', 'dedup_time',
+                 'write_time', 'rows', 'bytes_written', 'peak_memory_mb', 'rss_mb')
+
+# Fields which are summed when recorded more than once for the same property and partition
+SUMMED_FIELDS = ('read_time', 'process_time', 'dedup_time', 'write_time',
+                 'rows', 'bytes_written')
+
+# Fields which keep their maximum when recorded more than once
+MAX_FIELDS = ('peak_memory_mb', 'rss_mb')
+
+# Linux process files used to read the current and peak resident memory, 
+# and to reset the peak
+PROC_STATUS = '/proc/self/status'
+PROC_CLEAR_REFS = '/proc/self/clear_refs'
+
+# Peak resident memory in MB before the peak was last reset by memory_checkpoint
+_peak_before_reset = None
+
+
+def _max(a: float, b: float) -> float:
+    """Gets the maximum of two values which may be None."""
+    if a is None or b is None:
+        return b if a is None else a
+    return max(a, b)
+
+
+def peak_rss_mb() -> float:
+    """Gets the peak resident memory of the current process over its lifetime.
+
+    Returns:
+        float: Peak resident memory in MB, None if it is not available.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on other platforms
+    peak = peak / 1e6 if sys.platform == 'darwin' else peak * 1024 / 1e6
+    # The peak is lowered when it is reset by memory_checkpoint
+    return round(_max(peak, _peak_before_reset), 1)
+
+
+def _proc_status_mb(field: str) -> float:
+    """Reads a memory field of the current process from /proc/self/status, e.g VmRSS.
+
+    Returns:
+        float: Memory in MB, None if it is not available.
+    """
+    try:
+        with open(PROC_STATUS, 'r') as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) * 1024 / 1e6
+    except OSError:
+        pass
+    return None
+
+
+def current_rss_mb() -> float:
+    """Gets the current resident memory of the current process.
+
+    Returns:
+        float: Resident memory in MB, None if it is not available.
+    """
+    rss = _proc_status_mb('VmRSS')
+    if rss is None and psutil is not None:
+        rss = psutil.Process().memory_info().rss / 1e6
+    return None if rss is None else round(rss, 1)
+
+
+def memory_checkpoint() -> tuple:
+    """Starts measuring the peak memory increase of a step, see memory_since.
+
+    On Linux the peak resident memory of the process is reset to its current
+    value, elsewhere only the current memory is recorded.
+
+    Returns:
+        tuple: (resident memory in MB, True if the peak was reset)
+    """
+    global _peak_before_reset
+    _peak_before_reset = peak_rss_mb()
+    try:
+        with open(PROC_CLEAR_REFS, 'w') as f:
+            f.write('5')
+        reset = True
+    except OSError:
+        reset = False
+    return current_rss_mb(), reset
+
+
+def memory_since(checkpoint: tuple) -> float:
+    """Gets the peak memory increase of the process since a checkpoint.
+
+    Where the peak could not be reset, the increase of the current 
+    resident memory is returned.
+
+    Args:
+        checkpoint (tuple): Checkpoint returned by memory_checkpoint.
+
+    Returns:
+        float: Memory increase in MB, None if memory is not available.
+    """
+    start, reset = checkpoint
+    end = _proc_status_mb('VmHWM') if reset else current_rss_mb()
+    if start is None or end is None:
+        return None
+    return round(max(end - start, 0), 1)
+
+
+def report_path(file_name: str, extension: str) -> str:
+    """Gets the performance report path of a formatted h5 file.
+
+    Args:
+        file_name (str): Path to formatted h5 file.
+        extension (str): Report file extension, json or csv.
+
+    Returns:
+        str: Path to report file.
+    """
+    return f"{os.path.splitext(file_name)[0]}.performance.{extension}"
+
+
+class PerformanceReport():
+    """Timings, row counts and memory of each property and partition of a run.
+
+    Records are keyed by property and partition, values recorded more than
+    once are summed, so a partition processed in several object chunks has
+    a single record. Records can be added from the writer thread while 
+    properties are processed.
+    """
+
+    def __init__(self):
+        self.records = {}
+        self.start = time.time()
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        # The lock cannot be passed to worker processes
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def record(self, key: str, partition: str = 'all', **values) -> None:
+        """Adds values to the record of a property and partition.
+
+        The resident memory of the process is updated on every call.
+
+        Args:
+            key (str): formatted property identifier, e.g generator_Generation
+            partition (str, optional): Partition file name. Defaults to 'all'.
+            **values: Any of the summed fields, e.g read_time=1.2, rows=100, 
+                or peak_memory_mb, of which the maximum is kept.
+        """
+        with self._lock:
+            record = self.records.get((key, partition))
+            if record is None:
+                record = dict.fromkeys(RECORD_FIELDS)
+                record.update(property=key, partition=partition)
+                record.update(dict.fromkeys(SUMMED_FIELDS, 0))
+                self.records[(key, partition)] = record
+            values['rss_mb'] = current_rss_mb()
+            for field, value in values.items():
+                if field in MAX_FIELDS:
+                    record[field] = _max(record[field], value)
+                else:
+                    record[field] += value
+
+    def take(self) -> list:
+        """Removes and returns all records, used to pass records from worker processes.
+
+        Returns:
+            list: Records, as dictionaries.
+        """
+        with self._lock:
+            records = list(self.records.values())
+            self.records = {}
+        return records
+
+    def merge(self, records: list) -> None:
+        """Adds records taken from another report.
+
+        Args:
+            records (list): Records, as returned by take.
+        """
+        with self._lock:
+            for record in records:
+                key, partition = record['property'], record['partition']
+                if (key, partition) not in self.records:
+                    self.records[(key, partition)] = dict(record)
+                    continue
+                existing = self.records[(key, partition)]
+                for field in SUMMED_FIELDS:
+                    existing[field] += record[field]
+                for field in MAX_FIELDS:
+                    existing[field] = _max(existing[field], record[field])
+
+    def to_frame(self) -> pd.DataFrame:
+        """Gets the records as a DataFrame, one row per property and partition.
+
+        Returns:
+            pd.DataFrame: Records, with the RECORD_FIELDS columns.
+        """
+        return pd.DataFrame(list(self.records.values()), columns=list(RECORD_FIELDS))
+
+    def summary(self, **settings) -> dict:
+        """Gets the full report.
+
+        Args:
+            **settings: Formatter settings and run details to include, e.g scenario.
+
+        Returns:
+            dict: Run details under 'run', totals per property under 'properties'
+            and the records under 'records'.
+        """
+        df = self.to_frame()
+        totals = (df.groupby('property', sort=False)[list(SUMMED_FIELDS)].sum()
+                  .join(df.groupby('property', sort=False)[list(MAX_FIELDS)].max()))
+        totals['total_time'] = totals[['read_time', 'process_time',
+                                       'dedup_time', 'write_time']].sum(axis=1)
+        run = dict(settings)
+        run.update(total_time=round(time.time() - self.start, 3),
+                   peak_rss_mb=peak_rss_mb(),
+                   python=platform.python_version(),
+                   pandas=pd.__version__)
+        return {'run': run,
+                'properties': totals.round(3).reset_index().to_dict(orient='records'),
+                'records': df.round(4).to_dict(orient='records')}
+
+    def save(self, file_name: str, **settings) -> dict:
+        """Saves the report as json and csv files next to the formatted h5 file.
+
+        Args:
+            file_name (str): Path to formatted h5 file.
+            **settings: Formatter settings and run details to include, e.g scenario.
+
+        Returns:
+            dict: The saved report, as returned by summary.
+        """
+        report = self.summary(**settings)
+        with open(report_path(file_name, 'json'), 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        self.to_frame().round(4).to_csv(report_path(file_name, 'csv'), index=False)
+        return report
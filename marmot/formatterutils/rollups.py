@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""Pre-aggregated companion properties of formatted properties.
+
+Most plots select a region or zone of a generator property and sum it by
+timestamp and technology. Spatial rollups save that sum once at format time,
+as a {key}_by_{level} property indexed by timestamp, tech, the aggregation
+level (region, zone or a Region_Mapping column) and units, so the plotter can
+read a few thousand rows instead of every generator.
+
+Plots of totals and monthly values sum interval properties over time. Temporal
+rollups save the energy of each hour, day or month of an interval property, as
+{key}_hourly, {key}_daily and {key}_monthly properties, so the plotter can read
+up to 288 times fewer rows of 5 minute data. Power values (MW) are converted
+to energy (MWh) with the interval length, so summing a rollup gives the same
+energy as summing the interval data divided by the intervals per hour. Daily
+and monthly rollups are calculated from the next finer rollup.
+
+Rollups are registered as derived properties of the property they aggregate,
+in the derived property registry of a formatter run, so they are calculated 
+from the frames already in memory, partition by partition when streaming, 
+and recalculated when their property is updated. Only properties with 
+additive units are rolled up.
+"""
+
+import functools
+import numpy as np
+import pandas as pd
+
+from marmot.formatterutils.derived import register_derived_property
+
+# Index levels kept by spatial rollups, along with the aggregation level
+SPATIAL_ROLLUP_LEVELS = ['timestamp', 'tech', 'units']
+
+# Formatted units which can be summed across objects
+ADDITIVE_UNITS = {'MW', 'MWh', 'kg', '$', 'MMBTU'}
+
+# Temporal rollup resolutions, from finest to coarsest, with their pandas period frequency
+TEMPORAL_ROLLUP_PERIODS = {'hourly': 'H', 'daily': 'D', 'monthly': 'M'}
+
+
+def _sum_by_levels(df: pd.DataFrame, levels: list) -> pd.DataFrame:
+    """Sums a property by index levels, keeping rows with missing level values,
+    e.g generators of regions missing from the Region_Mapping.
+    """
+    # Grouping with missing values is slower, so it is only done when needed
+    missing = any((codes == -1).any() for codes in df.index.codes)
+    return df.groupby(level=levels, sort=True, dropna=not missing).sum()
+
+
+def spatial_rollup_key(key: str, level: str) -> str:
+    """Gets the key of the spatial rollup of a property.
+
+    Args:
+        key (str): formatted property identifier, e.g generator_Generation
+        level (str): Aggregation level, e.g zone
+
+    Returns:
+        str: Rollup formatted property identifier, e.g generator_Generation_by_zone
+    """
+    return f"{key}_by_{level.replace(' ', '_')}"
+
+
+def spatial_rollup(df: pd.DataFrame, level: str = None, **kwargs) -> pd.DataFrame:
+    """Sums a generator property by timestamp, technology and an aggregation level.
+
+    Args:
+        df (pd.DataFrame): Long formatted generator property.
+        level (str, optional): Aggregation level, e.g region. Defaults to None.
+
+    Raises:
+        ValueError: If the property or its units can not be rolled up.
+
+    Returns:
+        pd.DataFrame: Rollup, indexed by the kept levels in the order of the property.
+    """
+    if level not in df.index.names:
+        raise ValueError(f"the property has no {level} level")
+    units = set(df.index.unique(level='units')) if 'units' in df.index.names else set()
+    if not units.issubset(ADDITIVE_UNITS):
+        raise ValueError(f"{', '.join(map(str, units))} values can not be summed")
+    keep = [name for name in df.index.names if name in SPATIAL_ROLLUP_LEVELS or name == level]
+    return _sum_by_levels(df, keep)
+
+
+def register_spatial_rollups(keys: list, levels: list, registry: dict) -> list:
+    """Registers the spatial rollups of generator properties as derived properties.
+
+    Rollups of aliases, e.g generator_Upward_Available_Capacity, are registered
+    as aliases of the rollup of the property they alias.
+
+    Args:
+        keys (list): formatted property identifiers, only generator properties
+            are rolled up.
+        levels (list): Aggregation levels, e.g ['region', 'zone', 'Interconnect']
+        registry (dict): Derived property registry of the formatter run.
+
+    Returns:
+        list: Registered rollup formatted property identifiers.
+    """
+    rollup_keys = []
+    for key in keys:
+        if not key.startswith('generator_'):
+            continue
+        alias_of = registry.get(key, {}).get('alias_of')
+        for level in levels:
+            rollup_key = spatial_rollup_key(key, level)
+            if alias_of is not None:
+                register_derived_property(rollup_key, alias_of=spatial_rollup_key(alias_of, level),
+                                          registry=registry)
+            else:
+                register_derived_property(rollup_key, [key],
+                                          functools.partial(spatial_rollup, level=level),
+                                          aggregated=True, registry=registry)
+            rollup_keys.append(rollup_key)
+    return rollup_keys
+
+
+def temporal_rollup_key(key: str, resolution: str) -> str:
+    """Gets the key of the temporal rollup of a property.
+
+    Args:
+        key (str): formatted property identifier, e.g generator_Generation
+        resolution (str): Rollup resolution, hourly, daily or monthly.
+
+    Returns:
+        str: Rollup formatted property identifier, e.g generator_Generation_monthly
+    """
+    return f"{key}_{resolution}"
+
+
+def temporal_rollup(df: pd.DataFrame, resolution: str = None, **kwargs) -> pd.DataFrame:
+    """Sums an interval property over each hour, day or month.
+
+    Power values (MW) are multiplied by the interval length in hours and saved
+    as energy (MWh), other additive units are summed. Each period is labelled
+    with its start.
+
+    Args:
+        df (pd.DataFrame): Long formatted interval property.
+        resolution (str, optional): hourly, daily or monthly. Defaults to None.
+
+    Raises:
+        ValueError: If the property or its units can not be rolled up.
+
+    Returns:
+        pd.DataFrame: Rollup, indexed by the levels of the property.
+    """
+    if 'timestamp' not in df.index.names:
+        raise ValueError("the property has no timestamp level")
+    units = set(df.index.unique(level='units')) if 'units' in df.index.names else set()
+    if not units.issubset(ADDITIVE_UNITS | {'MW'}):
+        raise ValueError(f"{', '.join(map(str, units))} values can not be summed")
+    level = df.index.names.index('timestamp')
+    timestamps = df.index.levels[level]
+    levels = list(df.index.levels)
+    if 'MW' in units:
+        if len(timestamps) < 2:
+            raise ValueError("the interval length can not be found from a single timestamp")
+        interval_hours = np.diff(np.sort(timestamps.values)).min() / np.timedelta64(1, 'h')
+        df = df * interval_hours
+        units_level = df.index.names.index('units')
+        levels[units_level] = levels[units_level].map(lambda unit: 'MWh' if unit == 'MW' else unit)
+    # The timestamp level is replaced by the start of each period, the codes of
+    # the other levels are kept, so only the period of each timestamp is calculated
+    periods, period_codes = np.unique(timestamps.to_period(TEMPORAL_ROLLUP_PERIODS[resolution])
+                                      .to_timestamp().values, return_inverse=True)
+    levels[level] = pd.DatetimeIndex(periods, name='timestamp')
+    index = pd.MultiIndex(levels=levels,
+                          codes=[period_codes[codes] if i == level else codes
+                                 for i, codes in enumerate(df.index.codes)],
+                          names=df.index.names, verify_integrity=False)
+    return _sum_by_levels(df.set_axis(index), list(index.names))
+
+
+def register_temporal_rollups(keys: list, resolutions: list, registry: dict) -> list:
+    """Registers the temporal rollups of interval properties as derived properties.
+
+    Each rollup is calculated from the next finer rollup, e.g monthly from daily. 
+    Rollups of aliases are registered as aliases of the rollup of the property 
+    they alias.
+
+    Args:
+        keys (list): formatted property identifiers of interval properties, 
+            which may be spatial rollups.
+        resolutions (list): Rollup resolutions, any of hourly, daily and monthly.
+        registry (dict): Derived property registry of the formatter run.
+
+    Returns:
+        list: Registered rollup formatted property identifiers.
+    """
+    resolutions = [resolution for resolution in TEMPORAL_ROLLUP_PERIODS if resolution in resolutions]
+    rollup_keys = []
+    for key in keys:
+        alias_of = registry.get(key, {}).get('alias_of')
+        input_key = key
+        for resolution in resolutions:
+            rollup_key = temporal_rollup_key(key, resolution)
+            if alias_of is not None:
+                register_derived_property(rollup_key, alias_of=temporal_rollup_key(alias_of, resolution),
+                                          registry=registry)
+            else:
+                register_derived_property(rollup_key, [input_key],
+                                          functools.partial(temporal_rollup, resolution=resolution),
+                                          aggregated=True, registry=registry)
+            rollup_keys.append(rollup_key)
+            input_key = rollup_key
+    return rollup_keys
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""Bounded pool of open h5plexos partitions.
+
+Partitions are opened on first use and kept open in least recently used
+order, so at most max_open h5 file handles and partition indexes are held at
+once, however many partitions a scenario has. The formatter visits the
+partitions of consecutive properties in alternating directions (see
+visit_order), so the partitions still open from the previous property are
+used first and each partition is reopened as few times as possible.
+"""
+
+import os
+import logging
+import collections
+
+
+class SolutionPool():
+    """Opens h5plexos partitions on demand and closes the least recently used
+    partition when more than max_open are open.
+
+    Supports get, like the dictionary of open partitions it replaces.
+    """
+
+    def __init__(self, opener, HDF5_folder_in: str, max_open: int = 16,
+                 logger: logging.Logger = None):
+        """
+        Args:
+            opener (callable): Opens a h5plexos file from its path, e.g
+                PLEXOSSolution or H5PlexosReader.
+            HDF5_folder_in (str): Location of original PLEXOS solutions h5 files.
+            max_open (int, optional): Maximum number of partitions open at once.
+                Defaults to 16.
+            logger (logging.Logger, optional): logger object from SetupLogger.
+                Defaults to None.
+        """
+        self.opener = opener
+        self.HDF5_folder_in = HDF5_folder_in
+        self.max_open = max(1, int(max_open))
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self._open = collections.OrderedDict()
+        self.opened = 0
+
+    def get(self, partition: str):
+        """Gets an open partition, opening it if required.
+
+        Args:
+            partition (str): Partition file name.
+
+        Returns:
+            H5PlexosReader, PLEXOSSolution: Open h5plexos file.
+        """
+        if partition in self._open:
+            self._open.move_to_end(partition)
+            return self._open[partition]
+        while len(self._open) >= self.max_open:
+            self.close(next(iter(self._open)))
+        self.logger.debug(f"Opening {partition}")
+        db = self.opener(os.path.join(self.HDF5_folder_in, partition))
+        self._open[partition] = db
+        self.opened += 1
+        return db
+
+    def __getitem__(self, partition: str):
+        return self.get(partition)
+
+    def __contains__(self, partition: str) -> bool:
+        """True if the partition is currently open."""
+        return partition in self._open
+
+    def visit_order(self, partitions: list) -> list:
+        """Orders partitions so that those still open are visited first.
+
+        If the most recently used partition is in the second half of the
+        partitions they are visited in reverse, otherwise in order. Consecutive
+        properties therefore traverse the partitions in alternating directions.
+
+        Args:
+            partitions (list): Partition file names in alpha numeric order.
+
+        Returns:
+            list: Partition file names in the order to visit them.
+        """
+        if self._open:
+            last_used = next(reversed(self._open))
+            if last_used in partitions and partitions.index(last_used) >= len(partitions) / 2:
+                return partitions[::-1]
+        return list(partitions)
+
+    def close(self, partition: str = None) -> None:
+        """Closes a partition, or all open partitions.
+
+        Args:
+            partition (str, optional): Partition file name. Defaults to None,
+                in which case all partitions are closed.
+        """
+        partitions = list(self._open) if partition is None else [partition]
+        for partition in partitions:
+            db = self._open.pop(partition, None)
+            if db is not None:
+                self.logger.debug(f"Closing {partition}")
+                db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,860 @@
+# -*- coding: utf-8 -*-
+"""Saving and reading of properties in the Marmot formatted h5 file.
+
+Properties can be saved in one of two layouts.
+
+- long: A single value column DataFrame with a MultiIndex of timestamp,
+  object dimensions (e.g tech, gen_name, region, zone) and units.
+  This is the frame returned by the formatter and used by the plotter.
+- wide: A timestamp x object matrix of the property values. Object dimensions
+  are saved once per object class in a small dimension table under the dims
+  group and the units are saved as an attribute, so the index is no longer
+  repeated on every row. If some timestamp and object combinations are not
+  in the long frame, a bit packed mask of the present cells is saved with
+  the matrix, so missing values in the property are kept.
+
+read_property always returns the long frame, whatever layout it was saved in.
+Properties saved in one write store each index level as its unique values
+and integer codes, frames with categorical levels are saved with their 
+categories as the unique values. Properties appended in partitions or chunks 
+(streaming) are saved to a h5 table instead, which stores one fixed width 
+string per row for each object dimension level. With categorical=True the 
+object dimension levels are returned as categoricals of the unique level 
+values, so resetting or selecting them gives integer codes rather than a 
+Python string per row.
+
+Properties are saved through a storage backend.
+
+- HDF5Backend: Saves properties to the formatted h5 file with PyTables.
+- ParquetBackend: Saves each property as a Parquet dataset in the 
+  {Scenario}_formatted.parquet folder next to the formatted h5 file.
+  Index columns are dictionary encoded and reads are multi-threaded. 
+  Requires pyarrow.
+
+The metadata is always saved to the formatted h5 file. read_property 
+detects the backend each property was saved with.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import contextlib
+import numpy as np
+import pandas as pd
+import h5py
+import tables
+
+from marmot.formatterutils.writer import FileLock
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ModuleNotFoundError:
+    pa = None
+    pq = None
+
+LAYOUTS = ('long', 'wide')
+
+# Named compression settings of each backend
+# archive: maximum compression, smallest files but slowest writes
+# balanced: zstd at a medium level
+# fast: lz4 at a low level with multi-threaded blosc, fastest writes and reads
+STORAGE_PROFILES = {
+    'archive': {'hdf5': dict(complevel=9, complib='blosc:zlib'),
+                'parquet': dict(compression='zstd', compression_level=19)},
+    'balanced': {'hdf5': dict(complevel=5, complib='blosc:zstd'),
+                 'parquet': dict(compression='zstd', compression_level=3)},
+    'fast': {'hdf5': dict(complevel=1, complib='blosc:lz4', blosc_threads=os.cpu_count()),
+             'parquet': dict(compression='lz4')},
+    }
+
+# Prefix of keys containing dimension tables in the formatted h5 file
+DIMS_GROUP = 'dims'
+
+# Object dimension levels returned as categoricals by read_property(categorical=True)
+CATEGORICAL_LEVELS = ('tech', 'gen_name', 'region', 'zone')
+
+
+def plain_levels(df: pd.DataFrame) -> pd.DataFrame:
+    """Replaces categorical index levels with their categories.
+
+    The codes of the index are unchanged, only the dictionary of each level
+    is converted, so frames with categorical levels can be saved in the h5
+    fixed and table formats.
+
+    Args:
+        df (pd.DataFrame): Long formatted property.
+
+    Returns:
+        pd.DataFrame: Property without categorical index levels.
+    """
+    if not isinstance(df.index, pd.MultiIndex):
+        return df
+    levels = list(df.index.levels)
+    if not any(isinstance(level, pd.CategoricalIndex) for level in levels):
+        return df
+    levels = [pd.Index(level.categories.take(level.codes), name=level.name)
+              if isinstance(level, pd.CategoricalIndex) else level for level in levels]
+    return df.set_axis(pd.MultiIndex(levels=levels, codes=df.index.codes,
+                                     names=df.index.names, verify_integrity=False))
+
+
+def categorical_levels(df: pd.DataFrame, names: list = CATEGORICAL_LEVELS) -> pd.DataFrame:
+    """Converts string index levels to categoricals of their unique values.
+
+    Only the dictionary of each level is converted, the codes of the index
+    are used as the category codes.
+
+    Args:
+        df (pd.DataFrame): Long formatted property.
+        names (list, optional): Names of the levels to convert. 
+            Defaults to CATEGORICAL_LEVELS.
+
+    Returns:
+        pd.DataFrame: Property with categorical levels.
+    """
+    if not isinstance(df.index, pd.MultiIndex):
+        return df
+    levels = list(df.index.levels)
+    converted = False
+    for i, level in enumerate(levels):
+        if level.name in names and level.dtype == object:
+            levels[i] = pd.CategoricalIndex(level, categories=level, name=level.name)
+            converted = True
+    if not converted:
+        return df
+    return df.set_axis(pd.MultiIndex(levels=levels, codes=df.index.codes,
+                                     names=df.index.names, verify_integrity=False))
+
+
+def to_wide(df: pd.DataFrame) -> tuple:
+    """Converts a long formatted property to the wide layout.
+
+    Args:
+        df (pd.DataFrame): Long single value column DataFrame,
+            with timestamp and units index levels.
+
+    Returns:
+        tuple: Timestamp x object matrix, dimension table of objects, units
+            and the timestamp x object mask of cells in the long frame, None 
+            if all cells are present. Returns None if the property cannot be saved
+            in the wide layout, e.g if it contains multiple units
+            or more than one value per timestamp and object.
+    """
+    index = df.index
+    names = list(index.names)
+    if 'timestamp' not in names or 'units' not in names:
+        return None
+    units = index.levels[names.index('units')][np.unique(index.codes[names.index('units')])]
+    if len(units) != 1:
+        return None
+
+    dim_pos = [i for i, name in enumerate(names) if name not in ('timestamp', 'units')]
+    time_pos = names.index('timestamp')
+
+    # Each unique combination of dimension codes is an object
+    shape = tuple(len(index.levels[i]) + 1 for i in dim_pos)
+    combined = np.ravel_multi_index([index.codes[i].astype(np.int64) + 1 for i in dim_pos], shape)
+    object_codes, unique_combined = pd.factorize(combined)
+    time_codes, timestamps = pd.factorize(index.codes[time_pos], sort=True)
+
+    n_obj = len(unique_combined)
+    n_time = len(timestamps)
+    cell = time_codes.astype(np.int64) * n_obj + object_codes
+    if len(np.unique(cell)) != len(cell):
+        return None
+
+    values = df.iloc[:, 0].to_numpy()
+    matrix = np.full(n_time * n_obj, np.nan, 
+                     dtype=values.dtype if values.dtype.kind == 'f' else np.float64)
+    matrix[cell] = values
+    present = None
+    if len(cell) != n_time * n_obj:
+        present = np.zeros(n_time * n_obj, dtype=bool)
+        present[cell] = True
+        present = present.reshape(n_time, n_obj)
+    matrix = pd.DataFrame(matrix.reshape(n_time, n_obj),
+                          index=index.levels[time_pos].take(timestamps).rename('timestamp'))
+
+    key_codes = np.unravel_index(unique_combined, shape)
+    # Shifted codes of 0 are missing values
+    dims = pd.DataFrame({names[i]: np.asarray(pd.Categorical.from_codes(code - 1, 
+                                                                        categories=index.levels[i]),
+                                              dtype=object)
+                         for i, code in zip(dim_pos, key_codes)})
+    return matrix, dims, str(units[0]), present
+
+
+def from_wide(matrix: pd.DataFrame, dims: pd.DataFrame,
+              units: str, index_names: list, present: np.ndarray = None) -> pd.DataFrame:
+    """Reconstructs the long formatted property from the wide layout.
+
+    Args:
+        matrix (pd.DataFrame): Timestamp x object matrix.
+        dims (pd.DataFrame): Dimension table of objects.
+        units (str): Units of the property.
+        index_names (list): Names of the index levels of the long frame.
+        present (np.ndarray, optional): Timestamp x object mask of the cells 
+            in the long frame. Defaults to None, all cells.
+
+    Returns:
+        pd.DataFrame: Long single value column DataFrame.
+    """
+    n_time, n_obj = matrix.shape
+    # Object major order, matching the order of the h5plexos results
+    values = matrix.to_numpy().T.reshape(-1)
+    if present is None:
+        keep = np.ones(len(values), dtype=bool)
+    else:
+        keep = present.T.reshape(-1)
+
+    levels = {}
+    codes = {}
+    time_codes = np.tile(np.arange(n_time), n_obj)
+    levels['timestamp'] = matrix.index
+    codes['timestamp'] = time_codes[keep]
+    for col in dims.columns:
+        col_codes, col_level = pd.factorize(dims[col], sort=True)
+        levels[col] = pd.Index(col_level)
+        codes[col] = np.repeat(col_codes, n_time)[keep]
+    levels['units'] = pd.Index([units])
+    codes['units'] = np.zeros(int(keep.sum()), dtype=np.int8)
+
+    idx = pd.MultiIndex(levels=[levels[name] for name in index_names],
+                        codes=[codes[name] for name in index_names],
+                        names=index_names, verify_integrity=False)
+    return pd.DataFrame(data=values[keep], index=idx)
+
+
+def save_property(df: pd.DataFrame, file_name: str, key: str,
+                  layout: str = 'long', complevel: int = 9,
+                  complib: str = 'blosc:zlib', **kwargs) -> None:
+    """Saves a formatted property to the formatted h5 file.
+
+    Properties that cannot be converted to the wide layout are saved
+    in the long layout.
+
+    Args:
+        df (pd.DataFrame): Long formatted property.
+        file_name (str): name of hdf5 file.
+        key (str): formatted property identifier, e.g generator_Generation
+        layout (str, optional): 'long' or 'wide'. Defaults to 'long'.
+        complevel (int, optional): compression level. Defaults to 9.
+        complib (str, optional): compression library. Defaults to 'blosc:zlib'.
+        **kwargs: Passed to pandas to_hdf, long layout only.
+    """
+    df = plain_levels(df)
+    wide = to_wide(df) if layout == 'wide' else None
+    if wide is None:
+        df.to_hdf(file_name, key=key, complevel=complevel,
+                  complib=complib, **kwargs)
+        return
+
+    matrix, dims, units, present = wide
+    # Dimension tables are shared by all properties with the same objects
+    dims_hash = hashlib.sha1(pd.util.hash_pandas_object(dims, index=False).to_numpy()
+                             .tobytes() + ','.join(dims.columns).encode()).hexdigest()[:12]
+    dims_key = f"{DIMS_GROUP}/{key.split('_')[0]}_{dims_hash}"
+    with pd.HDFStore(file_name, mode='a', complevel=complevel, complib=complib) as store:
+        if dims_key not in store:
+            store.put(dims_key, dims, format='table')
+        store.put(key, matrix, format='fixed')
+        attrs = store.get_storer(key).attrs
+        attrs.marmot_layout = 'wide'
+        attrs.marmot_dims = dims_key
+        attrs.marmot_units = units
+        attrs.marmot_index_names = list(df.index.names)
+        attrs.marmot_present = present is not None
+        if present is not None:
+            store._handle.create_carray(store.get_storer(key).group, 'marmot_present', 
+                                        obj=np.packbits(present.reshape(-1)),
+                                        filters=tables.Filters(complevel=complevel, 
+                                                               complib=complib))
+
+
+def _read_hdf5_property(file_name: str, key: str) -> pd.DataFrame:
+    """Reads a formatted property from the formatted h5 file.
+
+    Args:
+        file_name (str): name of hdf5 file.
+        key (str): formatted property identifier, e.g generator_Generation
+
+    Raises:
+        KeyError: If the property does not exist.
+
+    Returns:
+        pd.DataFrame: Long formatted property.
+    """
+    with pd.HDFStore(file_name, 'r') as store:
+        if key not in store:
+            raise KeyError(f"No object named {key} in the file")
+        attrs = store.get_storer(key).attrs
+        if getattr(attrs, 'marmot_layout', 'long') != 'wide':
+            df = store[key]
+            # Appended tables save the value column name as an object,
+            # restore the integer column name of the formatted frame
+            if df.columns.dtype == object:
+                df.columns = pd.RangeIndex(len(df.columns))
+            return df
+        matrix = store[key]
+        present = None
+        if getattr(attrs, 'marmot_present', None) is None:
+            # Saved before present masks, absent cells were saved as missing values
+            present = matrix.notna().to_numpy()
+        elif attrs.marmot_present:
+            present = np.unpackbits(store.get_storer(key).group.marmot_present.read(), 
+                                    count=matrix.size).astype(bool).reshape(matrix.shape)
+        return from_wide(matrix, store[attrs.marmot_dims], attrs.marmot_units, 
+                         attrs.marmot_index_names, present)
+
+
+def _longest_strings(df: pd.DataFrame) -> dict:
+    """Gets the length of the longest value of each string index level.
+
+    Args:
+        df (pd.DataFrame): Long formatted data.
+
+    Returns:
+        dict: Longest value length of each string index level.
+    """
+    return {name: int(level.astype(str).str.len().max()) if len(level) else 0
+            for name, level in zip(df.index.names, df.index.levels) if level.dtype == object}
+
+
+def _table_min_itemsize(longest: dict) -> dict:
+    """Gets the string column sizes used to create an appendable h5 table.
+
+    String sizes are fixed when the table is created, so some headroom is 
+    added for longer object names in later partitions. Tables are rewritten
+    with wider columns by HDF5Backend.append if a later partition has names
+    which do not fit.
+
+    Args:
+        longest (dict): Longest value length of each string index level,
+            as returned by _longest_strings.
+
+    Returns:
+        dict: Minimum string size of each string index level.
+    """
+    return {name: max(64, 2 * length) for name, length in longest.items()}
+
+
+def _remove_hdf5_copy(file_name: str, key: str) -> None:
+    """Removes the copy of a property saved by the HDF5Backend, if any.
+
+    Used by the other backends when a property is saved, so a property is 
+    never saved by two backends at the same time.
+
+    Args:
+        file_name (str): Path to formatted hdf5 file.
+        key (str): formatted property identifier, e.g generator_Generation
+    """
+    if not os.path.isfile(file_name):
+        return
+    with h5py.File(file_name, 'r') as f:
+        if key not in f:
+            return
+    with h5py.File(file_name, 'a') as f:
+        del f[key]
+
+
+def _remove_parquet_copy(file_name: str, key: str) -> None:
+    """Removes the copy of a property saved by the ParquetBackend, if any.
+
+    Used by the other backends when a property is saved, so a property is 
+    never saved by two backends at the same time.
+
+    Args:
+        file_name (str): Path to formatted hdf5 file.
+        key (str): formatted property identifier, e.g generator_Generation
+    """
+    path = os.path.join(ParquetBackend.dataset_dir(file_name), f"{key}.parquet")
+    if os.path.isfile(path):
+        os.remove(path)
+
+
+class HDF5Backend():
+    """Saves formatted properties to the formatted h5 file with PyTables.
+
+    Properties are saved in the long or wide layout, 
+    appended properties are saved in the long table format.
+    Saving or removing a property also removes any copy of it saved by 
+    the ParquetBackend, so read_property always reads the latest copy.
+    """
+
+    name = 'hdf5'
+
+    def __init__(self, file_name: str, layout: str = 'long', 
+                 complevel: int = 9, complib: str = 'blosc:zlib',
+                 blosc_threads: int = None):
+        """
+        Args:
+            file_name (str): Path to formatted hdf5 file.
+            layout (str, optional): 'long' or 'wide'. Defaults to 'long'.
+            complevel (int, optional): compression level. Defaults to 9.
+            complib (str, optional): compression library. Defaults to 'blosc:zlib'.
+            blosc_threads (int, optional): Maximum number of threads used by blosc 
+                to compress the properties written by the backend, the PyTables 
+                setting is restored after each write. None leaves the PyTables 
+                setting unchanged. Defaults to None.
+        """
+        self.blosc_threads = blosc_threads
+        self.file_name = file_name
+        self.layout = layout
+        self.complevel = complevel
+        self.complib = complib
+        self._min_itemsize = {}
+
+    @contextlib.contextmanager
+    def _blosc_threads(self):
+        """Sets the blosc thread count of the backend for the duration of a write."""
+        if self.blosc_threads is None:
+            yield
+            return
+        previous = tables.set_blosc_max_threads(self.blosc_threads)
+        try:
+            yield
+        finally:
+            tables.set_blosc_max_threads(previous)
+
+    def keys(self) -> list:
+        """Gets the keys saved in the formatted h5 file.
+
+        Returns:
+            list: keys, empty if the file does not exist.
+        """
+        if not os.path.isfile(self.file_name):
+            return []
+        with h5py.File(self.file_name, 'r') as f:
+            return list(f.keys())
+
+    def size(self) -> int:
+        """Gets the size of the formatted h5 file.
+
+        Returns:
+            int: Size in bytes, 0 if the file does not exist.
+        """
+        if not os.path.isfile(self.file_name):
+            return 0
+        return os.path.getsize(self.file_name)
+
+    def save(self, df: pd.DataFrame, key: str, **kwargs) -> None:
+        """Saves a formatted property, replacing any existing property.
+
+        The property is saved to a partial copy which then replaces the
+        existing property, so an interrupted save never leaves a partially 
+        written property behind.
+
+        Args:
+            df (pd.DataFrame): Long formatted property.
+            key (str): formatted property identifier, e.g generator_Generation
+            **kwargs: Passed to pandas to_hdf, long layout only.
+        """
+        self.remove(f"{key}_partial")
+        with self._blosc_threads():
+            save_property(df, self.file_name, f"{key}_partial", layout=self.layout,
+                          complevel=self.complevel, complib=self.complib, **kwargs)
+        self.finalize(key)
+
+    def read(self, key: str) -> pd.DataFrame:
+        """Reads a formatted property.
+
+        Args:
+            key (str): formatted property identifier, e.g generator_Generation
+
+        Returns:
+            pd.DataFrame: Long formatted property.
+        """
+        return _read_hdf5_property(self.file_name, key)
+
+    def remove(self, key: str) -> None:
+        """Removes a property and any partially appended copy of it.
+
+        Args:
+            key (str): formatted property identifier, e.g generator_Generation
+        """
+        self._min_itemsize.pop(key, None)
+        with h5py.File(self.file_name, 'a') as f:
+            for existing in [key, f"{key}_partial"]:
+                if existing in f:
+                    del f[existing]
+        _remove_parquet_copy(self.file_name, key)
+
+    def append(self, df: pd.DataFrame, key: str) -> None:
+        """Appends data to a partial copy of a property.
+
+        The property is only available once finalize has been called.
+
+        Args:
+            df (pd.DataFrame): Long formatted data.
+            key (str): formatted property identifier, e.g generator_Generation
+        """
+        # Categories differ between partitions, which can not be appended to one table
+        df = plain_levels(df)
+        longest = _longest_strings(df)
+        with self._blosc_threads():
+            if key not in self._min_itemsize:
+                self._min_itemsize[key] = _table_min_itemsize(longest)
+            elif any(length > self._min_itemsize[key].get(name, 0) 
+                     for name, length in longest.items()):
+                self._widen_table(key, _table_min_itemsize(longest))
+            df.to_hdf(self.file_name, key=f"{key}_partial", mode='a', 
+                      complevel=self.complevel, complib=self.complib,
+                      format='table', append=True, 
+                      min_itemsize=self._min_itemsize[key])
+
+    def _widen_table(self, key: str, min_itemsize: dict) -> None:
+        """Rewrites the partial copy of a property with wider string columns,
+        used when appended data has longer names than the table columns can hold.
+
+        Args:
+            key (str): formatted property identifier, e.g generator_Generation
+            min_itemsize (dict): String column sizes needed by the appended data.
+        """
+        widened = dict(self._min_itemsize[key])
+        for name, size in min_itemsize.items():
+            widened[name] = max(size, widened.get(name, 0))
+        existing = pd.read_hdf(self.file_name, f"{key}_partial")
+        with h5py.File(self.file_name, 'a') as f:
+            del f[f"{key}_partial"]
+        existing.to_hdf(self.file_name, key=f"{key}_partial", mode='a', 
+                        complevel=self.complevel, complib=self.complib,
+                        format='table', append=True, min_itemsize=widened)
+        self._min_itemsize[key] = widened
+
+    def finalize(self, key: str) -> None:
+        """Makes an appended property available by renaming its partial copy,
+        replacing any existing property, including one saved by the ParquetBackend.
+
+        Args:
+            key (str): formatted property identifier, e.g generator_Generation
+        """
+        self._min_itemsize.pop(key, None)
+        with h5py.File(self.file_name, 'a') as f:
+            if key in f:
+                del f[key]
+            f.move(f"{key}_partial", key)
+        _remove_parquet_copy(self.file_name, key)
+
+    def link(self, key: str, alias: str) -> None:
+        """Saves an alias of a property as a hard link, without copying its data.
+
+        Args:
+            key (str): formatted property identifier of the existing property.
+            alias (str): formatted property identifier of the alias.
+        """
+        with h5py.File(self.file_name, 'a') as f:
+            if alias in f:
+                del f[alias]
+            f[alias] = f[key]
+        _remove_parquet_copy(self.file_name, alias)
+
+
+class ParquetBackend():
+    """Saves formatted properties as Parquet datasets.
+
+    Each property is saved to {key}.parquet in the {Scenario}_formatted.parquet 
+    folder. Index levels are saved as dictionary encoded columns and the 
+    values as a single value column. Appended data is written as additional 
+    row groups. Saving or removing a property also removes any copy of it 
+    saved in the formatted h5 file by the HDF5Backend.
+    """
+
+    name = 'parquet'
+
+    def __init__(self, file_name: str, layout: str = 'long', 
+                 compression: str = 'zstd', compression_level: int = None):
+        """
+        Args:
+            file_name (str): Path to formatted hdf5 file, 
+                the parquet folder is saved next to it.
+            layout (str, optional): Not used, properties are always 
+                saved in the long layout. Defaults to 'long'.
+            compression (str, optional): Parquet compression codec. Defaults to 'zstd'.
+            compression_level (int, optional): Compression level, None uses 
+                the codec default. Defaults to None.
+        """
+        if pq is None:
+            raise ModuleNotFoundError("The parquet storage backend requires pyarrow, "
+                                      "install it with 'pip install pyarrow'")
+        self.file_name = file_name
+        self.directory = ParquetBackend.dataset_dir(file_name)
+        self.compression = compression
+        self.compression_level = compression_level
+        self._writers = {}
+
+    @staticmethod
+    def dataset_dir(file_name: str) -> str:
+        """Gets the parquet folder of a formatted hdf5 file.
+
+        Args:
+            file_name (str): Path to formatted hdf5 file.
+
+        Returns:
+            str: Path to the parquet folder.
+        """
+        return f"{os.path.splitext(file_name)[0]}.parquet"
+
+    def path(self, key: str) -> str:
+        """Gets the path of a property.
+
+        Args:
+            key (str): formatted property identifier, e.g generator_Generation
+
+        Returns:
+            str: Path to the parquet file.
+        """
+        return os.path.join(self.directory, f"{key}.parquet")
+
+    def keys(self) -> list:
+        """Gets the keys saved in the parquet folder.
+
+        Returns:
+            list: keys, empty if the folder does not exist.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        return [os.path.splitext(name)[0] for name in os.listdir(self.directory)
+                if name.endswith('.parquet')]
+
+    def size(self) -> int:
+        """Gets the total size of the parquet folder.
+
+        Files hard linked by link are counted once.
+
+        Returns:
+            int: Size in bytes, 0 if the folder does not exist.
+        """
+        if not os.path.isdir(self.directory):
+            return 0
+        sizes = {}
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                stat = entry.stat()
+                sizes[(stat.st_dev, stat.st_ino)] = stat.st_size
+        return sum(sizes.values())
+
+    @staticmethod
+    def _to_table(df: pd.DataFrame) -> 'pa.Table':
+        """Converts a long formatted property to an arrow table.
+
+        Index levels are converted directly from their codes to 
+        dictionary encoded columns.
+
+        Args:
+            df (pd.DataFrame): Long formatted property.
+
+        Returns:
+            pa.Table: Arrow table.
+        """
+        columns = {}
+        for name, level, codes in zip(df.index.names, df.index.levels, df.index.codes):
+            columns[name] = pd.Categorical.from_codes(codes, categories=level)
+        columns['value'] = df.iloc[:, 0].to_numpy()
+        table = pa.Table.from_pandas(pd.DataFrame(columns), preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[b'marmot_index_names'] = json.dumps(list(df.index.names)).encode()
+        return table.replace_schema_metadata(metadata)
+
+    def save(self, df: pd.DataFrame, key: str, **kwargs) -> None:
+        """Saves a formatted property, replacing any existing property.
+
+        Args:
+            df (pd.DataFrame): Long formatted property.
+            key (str): formatted property identifier, e.g generator_Generation
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        partial_path = self.path(f"{key}_partial")
+        pq.write_table(ParquetBackend._to_table(df), partial_path, 
+                       compression=self.compression, 
+                       compression_level=self.compression_level,
+                       use_dictionary=True)
+        os.replace(partial_path, self.path(key))
+        _remove_hdf5_copy(self.file_name, key)
+
+    def read(self, key: str) -> pd.DataFrame:
+        """Reads a formatted property.
+
+        Args:
+            key (str): formatted property identifier, e.g generator_Generation
+
+        Raises:
+            KeyError: If the property does not exist.
+
+        Returns:
+            pd.DataFrame: Long formatted property.
+        """
+        return ParquetBackend.read_file(self.path(key))
+
+    @staticmethod
+    def read_file(path: str) -> pd.DataFrame:
+        """Reads a formatted property from a parquet file.
+
+        Dictionary encoded columns are used directly as index levels and codes.
+
+        Args:
+            path (str): Path to the parquet file.
+
+        Raises:
+            KeyError: If the file does not exist.
+
+        Returns:
+            pd.DataFrame: Long formatted property.
+        """
+        if not os.path.isfile(path):
+            raise KeyError(f"No property saved at {path}")
+        if pq is None:
+            raise ModuleNotFoundError(f"Reading {path} requires pyarrow, "
+                                      "install it with 'pip install pyarrow'")
+        table = pq.read_table(path, use_threads=True)
+        index_names = json.loads(table.schema.metadata[b'marmot_index_names'])
+        frame = table.to_pandas()
+        levels = []
+        codes = []
+        for name in index_names:
+            column = frame[name]
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                levels.append(pd.Index(column.cat.categories, name=name))
+                codes.append(column.cat.codes.to_numpy())
+            else:
+                column_codes, column_level = pd.factorize(column, sort=True)
+                levels.append(pd.Index(column_level, name=name))
+                codes.append(column_codes)
+        idx = pd.MultiIndex(levels=levels, codes=codes, names=index_names,
+                            verify_integrity=False)
+        return pd.DataFrame(data=frame['value'].to_numpy(), index=idx)
+
+    def remove(self, key: str) -> None:
+        """Removes a property and any partially appended copy of it.
+
+        Args:
+            key (str): formatted property identifier, e.g generator_Generation
+        """
+        if key in self._writers:
+            self._writers.pop(key).close()
+        for existing in [key, f"{key}_partial"]:
+            if os.path.isfile(self.path(existing)):
+                os.remove(self.path(existing))
+        _remove_hdf5_copy(self.file_name, key)
+
+    def append(self, df: pd.DataFrame, key: str) -> None:
+        """Appends data to a partial copy of a property as a new row group.
+
+        The property is only available once finalize has been called.
+
+        Args:
+            df (pd.DataFrame): Long formatted data.
+            key (str): formatted property identifier, e.g generator_Generation
+        """
+        table = ParquetBackend._to_table(df)
+        if key not in self._writers:
+            os.makedirs(self.directory, exist_ok=True)
+            self._writers[key] = pq.ParquetWriter(self.path(f"{key}_partial"), table.schema,
+                                                  compression=self.compression,
+                                                  compression_level=self.compression_level,
+                                                  use_dictionary=True)
+        self._writers[key].write_table(table.cast(self._writers[key].schema))
+
+    def finalize(self, key: str) -> None:
+        """Makes an appended property available by renaming its partial copy.
+
+        Args:
+            key (str): formatted property identifier, e.g generator_Generation
+        """
+        self._writers.pop(key).close()
+        os.replace(self.path(f"{key}_partial"), self.path(key))
+        _remove_hdf5_copy(self.file_name, key)
+
+    def link(self, key: str, alias: str) -> None:
+        """Saves an alias of a property as a hard link, without copying its data.
+
+        The property is copied if the file system does not support hard links.
+
+        Args:
+            key (str): formatted property identifier of the existing property.
+            alias (str): formatted property identifier of the alias.
+        """
+        if os.path.isfile(self.path(alias)):
+            os.remove(self.path(alias))
+        try:
+            os.link(self.path(key), self.path(alias))
+        except OSError:
+            shutil.copyfile(self.path(key), self.path(alias))
+        _remove_hdf5_copy(self.file_name, alias)
+
+
+BACKENDS = {'hdf5': HDF5Backend,
+            'parquet': ParquetBackend}
+
+
+def get_backend(name: str, file_name: str, profile: str = 'archive', 
+                **kwargs) -> HDF5Backend:
+    """Creates a storage backend.
+
+    Args:
+        name (str): Name of the backend, one of BACKENDS.
+        file_name (str): Path to formatted hdf5 file.
+        profile (str, optional): Name of the compression settings to use, 
+            one of STORAGE_PROFILES. Defaults to 'archive'.
+        **kwargs: Passed to the backend.
+
+    Returns:
+        HDF5Backend: Storage backend instance.
+    """
+    settings = dict(STORAGE_PROFILES[profile][name])
+    settings.update(kwargs)
+    return BACKENDS[name](file_name, **settings)
+
+
+def formatted_keys(file_name: str) -> list:
+    """Gets the keys of all properties saved for a formatted hdf5 file, 
+    with any backend.
+
+    Args:
+        file_name (str): Path to formatted hdf5 file.
+
+    Returns:
+        list: keys.
+    """
+    keys = HDF5Backend(file_name).keys()
+    parquet_dir = ParquetBackend.dataset_dir(file_name)
+    if os.path.isdir(parquet_dir):
+        # Files formatted before backends removed each other's copies can hold both
+        keys += [key for key in (os.path.splitext(name)[0] for name in os.listdir(parquet_dir)
+                                 if name.endswith('.parquet'))
+                 if key not in keys]
+    return keys
+
+
+def read_property(file_name: str, key: str, categorical: bool = False) -> pd.DataFrame:
+    """Reads a formatted property, detecting the backend it was saved with.
+
+    Args:
+        file_name (str): Path to formatted hdf5 file.
+        key (str): formatted property identifier, e.g generator_Generation
+        categorical (bool, optional): If True the CATEGORICAL_LEVELS are 
+            returned as categoricals. Defaults to False.
+
+    Raises:
+        KeyError: If the property does not exist.
+
+    Returns:
+        pd.DataFrame: Long formatted property.
+    """
+    try:
+        lock = FileLock(file_name, shared=True)
+        lock.acquire()
+    except OSError:
+        # Folder is read only, the file cannot be in use by the formatter
+        lock = None
+    try:
+        parquet_path = os.path.join(ParquetBackend.dataset_dir(file_name), f"{key}.parquet")
+        if os.path.isfile(parquet_path):
+            df = ParquetBackend.read_file(parquet_path)
+        else:
+            df = _read_hdf5_property(file_name, key)
+    finally:
+        if lock is not None:
+            lock.release()
+    return categorical_levels(df) if categorical else df
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of the storage backends and compression profiles.
+
+Measures the write time, read time and file size of a formatted property
+saved with each storage backend and profile in STORAGE_PROFILES.
+The property can be a representative synthetic dataset or read from an
+existing formatted h5 file.
+
+Run from the command line, e.g.
+
+    python -m marmot.formatterutils.storage_benchmark
+    python -m marmot.formatterutils.storage_benchmark --formatted-file Base_formatted.h5 --key generator_Generation
+"""
+
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+
+from marmot.formatterutils.storage import (get_backend, read_property, BACKENDS,
+                                           STORAGE_PROFILES, ParquetBackend)
+
+
+def synthetic_property(n_generators: int = 500, n_timestamps: int = 8760,
+                       seed: int = 0) -> pd.DataFrame:
+    """Creates a representative formatted generator property.
+
+    Generators are assigned a technology, region and zone, and have a
+    daily profile with noise and periods of zero output, similar to
+    hourly generation results.
+
+    Args:
+        n_generators (int, optional): Number of generators. Defaults to 500.
+        n_timestamps (int, optional): Number of hourly timestamps. Defaults to 8760.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: Long formatted property.
+    """
+    rng = np.random.default_rng(seed)
+    techs = np.array(['Coal', 'Gas-CC', 'Gas-CT', 'Hydro', 'Nuclear', 'PV', 'Wind'])
+    gen_tech = techs[rng.integers(0, len(techs), n_generators)]
+    order = np.argsort(gen_tech, kind='stable')
+    gen_tech = gen_tech[order]
+    gen_names = np.array([f"{tech}_{i:05d}" for i, tech in enumerate(gen_tech)])
+    regions = np.array([f"region_{i:02d}" for i in rng.integers(0, 40, n_generators)])
+    zones = np.array([f"zone_{i}" for i in rng.integers(0, 8, n_generators)])
+    timestamps = pd.date_range('2030-01-01', periods=n_timestamps, freq='H', name='timestamp')
+
+    capacity = rng.uniform(10, 800, n_generators)
+    hour = np.arange(n_timestamps) % 24
+    profile = 0.6 + 0.4 * np.sin((hour - 6) / 24 * 2 * np.pi)
+    values = (capacity[:, None] * profile[None, :]
+              * rng.uniform(0.7, 1.0, (n_generators, n_timestamps)))
+    # Generators are offline for part of the time
+    values[rng.random((n_generators, n_timestamps)) < 0.3] = 0
+    values = np.round(values, 2).astype(np.float32).reshape(-1)
+
+    idx = pd.MultiIndex.from_arrays([np.tile(timestamps, n_generators),
+                                     np.repeat(gen_tech, n_timestamps),
+                                     np.repeat(gen_names, n_timestamps),
+                                     np.repeat(regions, n_timestamps),
+                                     np.repeat(zones, n_timestamps),
+                                     np.repeat(['MW'], n_generators * n_timestamps)],
+                                    names=['timestamp', 'tech', 'gen_name',
+                                           'region', 'zone', 'units'])
+    return pd.DataFrame(data=values, index=idx)
+
+
+def _storage_size(path: str) -> int:
+    """Gets the size of a file or folder in bytes."""
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, name))
+                   for root, _, names in os.walk(path) for name in names)
+    return os.path.getsize(path)
+
+
+def run_benchmark(df: pd.DataFrame, key: str = 'generator_Generation',
+                  backends: list = None, profiles: list = None,
+                  layouts: list = None, repeats: int = 3) -> pd.DataFrame:
+    """Saves and reads a property with each backend, profile and layout.
+
+    Backends which cannot be used, e.g parquet without pyarrow, are skipped.
+
+    Args:
+        df (pd.DataFrame): Long formatted property.
+        key (str, optional): Key to save the property under.
+            Defaults to 'generator_Generation'.
+        backends (list, optional): Backends to test, None tests all BACKENDS.
+            Defaults to None.
+        profiles (list, optional): Profiles to test, None tests all STORAGE_PROFILES.
+            Defaults to None.
+        layouts (list, optional): hdf5 layouts to test. Defaults to None,
+            in which case both the long and wide layout are tested.
+        repeats (int, optional): Number of times each test is repeated,
+            the fastest time is reported. Defaults to 3.
+
+    Returns:
+        pd.DataFrame: Write time, read time and size of each test.
+    """
+    backends = list(BACKENDS) if backends is None else backends
+    profiles = list(STORAGE_PROFILES) if profiles is None else profiles
+    layouts = ['long', 'wide'] if layouts is None else layouts
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for backend_name in backends:
+            backend_layouts = layouts if backend_name == 'hdf5' else ['long']
+            for profile in profiles:
+                for layout in backend_layouts:
+                    file_name = os.path.join(tmp_dir, f"{backend_name}_{profile}_{layout}_formatted.h5")
+                    try:
+                        backend = get_backend(backend_name, file_name, profile=profile, layout=layout)
+                    except ModuleNotFoundError as e:
+                        print(f"Skipping {backend_name}: {e}")
+                        break
+                    path = (ParquetBackend.dataset_dir(file_name)
+                            if backend_name == 'parquet' else file_name)
+                    write_times = []
+                    read_times = []
+                    for _ in range(repeats):
+                        if os.path.isdir(path):
+                            shutil.rmtree(path)
+                        elif os.path.isfile(path):
+                            os.remove(path)
+                        start = time.perf_counter()
+                        backend.save(df, key)
+                        write_times.append(time.perf_counter() - start)
+                        start = time.perf_counter()
+                        read_property(file_name, key)
+                        read_times.append(time.perf_counter() - start)
+                    results.append({'backend': backend_name, 'profile': profile,
+                                    'layout': layout,
+                                    'write_s': round(min(write_times), 3),
+                                    'read_s': round(min(read_times), 3),
+                                    'size_MB': round(_storage_size(path) / 1e6, 3)})
+    return pd.DataFrame(results)
+
+
+def main():
+    """Runs the storage benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark write time, read time and file size "
+                                                 "of the Marmot storage backends and profiles.")
+    parser.add_argument('--formatted-file', help="Formatted h5 file to read the property from, "
+                                                 "a synthetic dataset is used if not given.")
+    parser.add_argument('--key', default='generator_Generation',
+                        help="Property to benchmark. Defaults to generator_Generation.")
+    parser.add_argument('--generators', type=int, default=500,
+                        help="Number of generators in the synthetic dataset.")
+    parser.add_argument('--timestamps', type=int, default=8760,
+                        help="Number of hourly timestamps in the synthetic dataset.")
+    parser.add_argument('--repeats', type=int, default=3,
+                        help="Number of repeats of each test, the fastest time is reported.")
+    parser.add_argument('--output', help="Optional csv file to save the results to.")
+    args = parser.parse_args()
+
+    if args.formatted_file:
+        df = read_property(args.formatted_file, args.key)
+    else:
+        df = synthetic_property(args.generators, args.timestamps)
+    print(f"Benchmarking {args.key}, {len(df)} rows")
+
+    results = run_benchmark(df, key=args.key, repeats=args.repeats)
+    print(results.to_string(index=False))
+    if args.output:
+        results.to_csv(args.output, index=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""Finds the h5plexos partitions of a scenario which have finished being written.
+
+PLEXOS runs of a scenario finish partition by partition, and each partition is
+converted to a h5plexos file once its run completes. A partition is ready to
+be formatted once its size and modification time have not changed for
+settle_time seconds and it can be opened with its metadata and data groups,
+so partially written files are never read. Ready partitions are only opened
+again if their size or modification time changes.
+"""
+
+import os
+import re
+import time
+import h5py
+
+
+def is_complete_partition(path: str) -> bool:
+    """Checks if a h5plexos file can be opened and has its metadata and data groups.
+
+    Args:
+        path (str): Path to h5plexos file.
+
+    Returns:
+        bool: True if the file is complete.
+    """
+    try:
+        with h5py.File(path, 'r') as f:
+            return 'metadata/times' in f and 'data' in f
+    except OSError:
+        # Partially written, or still locked by the writing process
+        return False
+
+
+class PartitionWatcher():
+    """Polls a h5plexos folder for partitions which are ready to be formatted."""
+
+    def __init__(self, HDF5_folder_in: str, settle_time: float = 120):
+        """
+        Args:
+            HDF5_folder_in (str): Location of original PLEXOS solutions h5 files.
+            settle_time (float, optional): Seconds a partition must be unchanged
+                before it is formatted. Defaults to 120.
+        """
+        self.HDF5_folder_in = HDF5_folder_in
+        self.settle_time = settle_time
+        # (size, modification time) of each partition found ready
+        self.ready = {}
+
+    def poll(self) -> list:
+        """Finds the partitions which are ready to be formatted.
+
+        Returns:
+            list: h5 file names in alpha numeric order.
+        """
+        if not os.path.isdir(self.HDF5_folder_in):
+            return []
+        now = time.time()
+        ready = {}
+        for name in os.listdir(self.HDF5_folder_in):
+            if not name.endswith(".h5"):
+                continue
+            path = os.path.join(self.HDF5_folder_in, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                # Removed since the folder was listed
+                continue
+            state = (stat.st_size, stat.st_mtime)
+            if now - stat.st_mtime < self.settle_time:
+                continue
+            if self.ready.get(name) != state and not is_complete_partition(path):
+                continue
+            ready[name] = state
+        self.ready = ready
+        return sorted(ready, key=lambda x:int(re.sub(r'\D', '', x)))
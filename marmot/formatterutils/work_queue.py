@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+"""File based queue of formatting work, shared by workers on several machines.
+
+The queue is a folder on a file system shared by all nodes, e.g a HPC scratch
+file system. It holds
+
+- jobs/{scenario}.pkl: the formatter settings of each published scenario
+- units/{unit_id}.json: published work units, one per scenario, property and partition
+- claims/{unit_id}.claim: claim of a unit by a worker
+- done/{unit_id}.json: result of each completed unit
+- failed/{unit_id}.json: error of each failed unit
+- shards/{unit_id}.h5: processed partition of each completed unit
+
+A worker claims a unit by creating its claim file with O_CREAT | O_EXCL, which
+only one worker can do, including over NFS. The claim is touched while the unit
+is processed, claims not touched for claim_timeout seconds, e.g of a worker on
+a node that failed, are released so the unit can be claimed again. All other
+files are written to a temporary file and renamed into place, so a file is
+never read while it is partially written.
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import pickle
+import socket
+import threading
+import pandas as pd
+
+# Key of the processed partition in each shard file
+SHARD_KEY = 'data'
+
+# Seconds between checks of the queue while waiting for units claimed by other workers
+QUEUE_POLL_INTERVAL = 5
+
+QUEUE_FOLDERS = ['jobs', 'units', 'claims', 'done', 'failed', 'shards']
+
+
+def unit_id(*parts: str) -> str:
+    """Gets the identifier of a work unit, usable as a file name.
+
+    Args:
+        *parts (str): Parts identifying the unit, e.g scenario, property and partition.
+
+    Returns:
+        str: Unit identifier.
+    """
+    return '.'.join(re.sub(r'[^\w\-]', '_', str(part)) for part in parts)
+
+
+def write_shard(df: pd.DataFrame, path: str) -> None:
+    """Writes a processed partition to a shard file, with fast compression.
+
+    Args:
+        df (pd.DataFrame): Processed partition.
+        path (str): Path to shard file.
+    """
+    partial = f"{path}.{uuid.uuid4().hex}.partial"
+    df.to_hdf(partial, key=SHARD_KEY, mode='w', complevel=1, complib='blosc:lz4')
+    os.replace(partial, path)
+
+
+def read_shard(path: str) -> pd.DataFrame:
+    """Reads a processed partition from a shard file.
+
+    Args:
+        path (str): Path to shard file, None for a unit without data.
+
+    Returns:
+        pd.DataFrame: Processed partition, empty if the unit had no data.
+    """
+    if path is None:
+        return pd.DataFrame()
+    return pd.read_hdf(path, SHARD_KEY)
+
+
+class Claim():
+    """Claim of a work unit by a worker.
+
+    Used as a context manager, the claim file is touched in a background thread
+    until the unit is completed or failed.
+    """
+
+    def __init__(self, queue: 'WorkQueue', unit: dict):
+        """
+        Args:
+            queue (WorkQueue): Queue the unit was claimed from.
+            unit (dict): Claimed work unit.
+        """
+        self.queue = queue
+        self.unit = unit
+        self.path = queue.path('claims', f"{unit['id']}.claim")
+        self._stop = threading.Event()
+        self._heartbeat = threading.Thread(target=self._touch, daemon=True)
+
+    def _touch(self) -> None:
+        """Touches the claim file until the claim is released."""
+        while not self._stop.wait(self.queue.claim_timeout / 4):
+            try:
+                os.utime(self.path)
+            except FileNotFoundError:
+                return
+
+    def __enter__(self) -> 'Claim':
+        self._heartbeat.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+    def release(self) -> None:
+        """Releases the claim, the unit can then be claimed again unless it is completed."""
+        self._stop.set()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def complete(self, result: dict) -> None:
+        """Records the result of the unit and releases the claim.
+
+        Args:
+            result (dict): Result of the unit, e.g the shard file and rows.
+        """
+        self.queue._write_json(self.queue.path('done', f"{self.unit['id']}.json"), result)
+        self.release()
+
+    def fail(self, error: str) -> None:
+        """Records the error of the unit and releases the claim.
+
+        Failed units are not claimed again until they are published again.
+
+        Args:
+            error (str): Error message or traceback.
+        """
+        self.queue._write_json(self.queue.path('failed', f"{self.unit['id']}.json"),
+                               dict(error=error, worker=self.queue.worker_name()))
+        self.release()
+
+
+class WorkQueue():
+    """File based work queue in a folder of a shared file system."""
+
+    def __init__(self, queue_folder: str, claim_timeout: float = 600):
+        """
+        Args:
+            queue_folder (str): Folder of the queue, created if it does not exist.
+            claim_timeout (float, optional): Seconds after which claims which are
+                no longer touched are released. Defaults to 600.
+        """
+        self.queue_folder = queue_folder
+        self.claim_timeout = claim_timeout
+        for folder in QUEUE_FOLDERS:
+            os.makedirs(os.path.join(queue_folder, folder), exist_ok=True)
+
+    def path(self, *parts: str) -> str:
+        """Gets the path of a file in the queue folder."""
+        return os.path.join(self.queue_folder, *parts)
+
+    @staticmethod
+    def worker_name() -> str:
+        """Gets the host name and process id of the current process."""
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    @staticmethod
+    def _write_json(path: str, data: dict) -> None:
+        """Writes a json file, replacing it in a single rename."""
+        partial = f"{path}.{uuid.uuid4().hex}.partial"
+        with open(partial, 'w') as f:
+            json.dump(data, f)
+        os.replace(partial, path)
+
+    @staticmethod
+    def _read_json(path: str) -> dict:
+        """Reads a json file, None if it does not exist."""
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _ids(self, folder: str) -> list:
+        """Gets the unit ids with a file in a folder of the queue, in sorted order."""
+        return sorted(os.path.splitext(name)[0] for name in os.listdir(self.path(folder))
+                      if not name.endswith('.partial'))
+
+    def save_job(self, scenario: str, job) -> None:
+        """Saves the settings a scenario's units are processed and merged with.
+
+        Args:
+            scenario (str): Name of scenario.
+            job: Picklable settings of the scenario, e.g a MarmotFormat instance.
+        """
+        path = self.path('jobs', f"{unit_id(scenario)}.pkl")
+        partial = f"{path}.{uuid.uuid4().hex}.partial"
+        with open(partial, 'wb') as f:
+            pickle.dump(job, f)
+        os.replace(partial, path)
+
+    def load_job(self, scenario: str):
+        """Loads the settings of a scenario saved by save_job.
+
+        Args:
+            scenario (str): Name of scenario.
+
+        Raises:
+            FileNotFoundError: If the scenario has not been published.
+        """
+        with open(self.path('jobs', f"{unit_id(scenario)}.pkl"), 'rb') as f:
+            return pickle.load(f)
+
+    def jobs(self) -> list:
+        """Gets the scenarios with saved settings.
+
+        Returns:
+            list: Scenario identifiers.
+        """
+        return self._ids('jobs')
+
+    def publish(self, units: list) -> int:
+        """Publishes work units.
+
+        Completed units are not published again, failed units are published
+        again to be retried.
+
+        Args:
+            units (list): Work units, dicts with a unique 'id'.
+
+        Returns:
+            int: Number of units published.
+        """
+        done = set(self._ids('done'))
+        published = 0
+        for unit in units:
+            if unit['id'] in done:
+                continue
+            self._write_json(self.path('units', f"{unit['id']}.json"), unit)
+            try:
+                os.remove(self.path('failed', f"{unit['id']}.json"))
+            except FileNotFoundError:
+                pass
+            published += 1
+        return published
+
+    def units(self) -> list:
+        """Gets all published work units.
+
+        Returns:
+            list: Work units.
+        """
+        units = [self._read_json(self.path('units', f"{uid}.json")) for uid in self._ids('units')]
+        return [unit for unit in units if unit is not None]
+
+    def _release_stale(self, path: str) -> None:
+        """Releases a claim which has not been touched for claim_timeout seconds."""
+        try:
+            if time.time() - os.stat(path).st_mtime < self.claim_timeout:
+                return
+            # Only one worker can rename the claim, the others get FileNotFoundError
+            stale = f"{path}.{uuid.uuid4().hex}.stale"
+            os.rename(path, stale)
+        except FileNotFoundError:
+            return
+        if time.time() - os.stat(stale).st_mtime < self.claim_timeout:
+            # Claimed again since it was found stale, restore the new claim
+            try:
+                os.link(stale, path)
+            except FileExistsError:
+                pass
+        os.remove(stale)
+
+    def claim(self) -> Claim:
+        """Claims the next unit which is not completed, failed or claimed.
+
+        Returns:
+            Claim: Claim of the unit, None if there is no unit to claim.
+        """
+        finished = set(self._ids('done')) | set(self._ids('failed'))
+        for uid in self._ids('units'):
+            if uid in finished:
+                continue
+            path = self.path('claims', f"{uid}.claim")
+            self._release_stale(path)
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                continue
+            with os.fdopen(fd, 'w') as f:
+                f.write(self.worker_name())
+            unit = self._read_json(self.path('units', f"{uid}.json"))
+            if (unit is None or os.path.isfile(self.path('done', f"{uid}.json"))
+                    or os.path.isfile(self.path('failed', f"{uid}.json"))):
+                # Removed or finished by another worker since the folders were listed
+                os.remove(path)
+                continue
+            return Claim(self, unit)
+        return None
+
+    def status(self, ids: list = None) -> dict:
+        """Counts the units in each state.
+
+        Units with a claim which is no longer touched are counted as pending.
+
+        Args:
+            ids (list, optional): Unit ids to count. Defaults to None, all units.
+
+        Returns:
+            dict: Number of 'done', 'failed', 'claimed' and 'pending' units.
+        """
+        ids = set(self._ids('units') if ids is None else ids)
+        done = ids.intersection(self._ids('done'))
+        failed = ids.intersection(self._ids('failed')) - done
+        claimed = set()
+        for uid in ids.intersection(self._ids('claims')) - done - failed:
+            try:
+                if time.time() - os.stat(self.path('claims', f"{uid}.claim")).st_mtime < self.claim_timeout:
+                    claimed.add(uid)
+            except FileNotFoundError:
+                # Released since the folder was listed
+                pass
+        return dict(done=len(done), failed=len(failed), claimed=len(claimed),
+                    pending=len(ids - done - failed - claimed))
+
+    def result(self, uid: str) -> dict:
+        """Gets the result of a completed unit.
+
+        Args:
+            uid (str): Unit id.
+
+        Returns:
+            dict: Result recorded by Claim.complete, None if the unit is not completed.
+        """
+        return self._read_json(self.path('done', f"{uid}.json"))
+
+    def remove(self, ids: list) -> None:
+        """Removes units along with their claims, results and shards.
+
+        Args:
+            ids (list): Unit ids.
+        """
+        for uid in ids:
+            result = self.result(uid) or {}
+            paths = [self.path('units', f"{uid}.json"), self.path('claims', f"{uid}.claim"),
+                     self.path('done', f"{uid}.json"), self.path('failed', f"{uid}.json")]
+            if result.get('shard'):
+                paths.append(self.path('shards', result['shard']))
+            for path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+"""Single writer of the formatted output file.
+
+PropertyWriter owns the storage backend of a formatted file. Write jobs are
+passed to it through a bounded queue and carried out in order by a dedicated
+thread, so processing continues while the previous property is being
+compressed and written. Each job holds an advisory lock on the formatted file,
+so other Marmot processes never read or write the file at the same time.
+Reads wait for all queued writes to complete first. If a PerformanceReport is
+passed, the time taken and bytes written by each write are recorded in it.
+"""
+
+import os
+import sys
+import time
+import queue
+import logging
+import threading
+import pandas as pd
+
+from marmot.formatterutils.report import PerformanceReport
+
+if sys.platform == 'win32':
+    import msvcrt
+else:
+    import fcntl
+
+
+# Writes recorded in the performance report, with the position of the key in their arguments
+RECORDED_WRITES = {'save': 1, 'append': 1, 'finalize': 0, 'link': 1}
+
+
+class FileLock():
+    """Advisory lock on a formatted file, held on a {file_name}.lock file.
+
+    Shared locks allow several readers, an exclusive lock a single writer.
+    Shared locks are exclusive on Windows.
+    """
+
+    def __init__(self, file_name: str, shared: bool = False, timeout: float = None,
+                 logger: logging.Logger = None):
+        """
+        Args:
+            file_name (str): Path to the file to lock.
+            shared (bool, optional): If True a shared read lock is taken.
+                Defaults to False.
+            timeout (float, optional): Seconds to wait for the lock before
+                raising TimeoutError, None waits indefinitely. Defaults to None.
+            logger (logging.Logger, optional): Logger used to report waiting
+                for the lock. Defaults to None.
+        """
+        self.path = f"{file_name}.lock"
+        self.shared = shared
+        self.timeout = timeout
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self._fd = None
+
+    def _try_lock(self) -> bool:
+        """Attempts to take the lock without blocking."""
+        try:
+            if sys.platform == 'win32':
+                msvcrt.locking(self._fd, msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(self._fd, (fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX)
+                            | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self) -> None:
+        """Takes the lock, waiting until it is released by any other process.
+
+        Raises:
+            TimeoutError: If the lock could not be taken within the timeout.
+        """
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+        start = time.monotonic()
+        reported = False
+        while not self._try_lock():
+            waited = time.monotonic() - start
+            if self.timeout is not None and waited > self.timeout:
+                os.close(self._fd)
+                self._fd = None
+                raise TimeoutError(f"Could not lock {self.path} within {self.timeout} seconds")
+            if not reported and waited > 1:
+                self.logger.info(f"Waiting for {self.path}, the file is in use by another process")
+                reported = True
+            time.sleep(0.1)
+
+    def release(self) -> None:
+        """Releases the lock."""
+        if self._fd is None:
+            return
+        try:
+            if sys.platform == 'win32':
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+class PropertyWriter():
+    """Writes formatted properties to a storage backend from a dedicated thread.
+
+    Has the same write methods as the storage backends (save, append, finalize,
+    remove and link), which queue the write and return immediately unless the
+    queue is full. An error raised by a write is raised again by the next call
+    to the writer, and queued writes after it are skipped.
+    """
+
+    def __init__(self, backend, logger: logging.Logger = None, max_pending: int = 2,
+                 lock_timeout: float = None, report: PerformanceReport = None):
+        """
+        Args:
+            backend (HDF5Backend, ParquetBackend): Storage backend to write to.
+            logger (logging.Logger, optional): logger object from SetupLogger.
+                Defaults to None.
+            max_pending (int, optional): Maximum number of queued writes, bounds
+                the memory held by data waiting to be written. Defaults to 2.
+            lock_timeout (float, optional): Seconds to wait for the file lock,
+                None waits indefinitely. Defaults to None.
+            report (PerformanceReport, optional): Report to record the time and 
+                bytes of each write in. Defaults to None.
+        """
+        self.backend = backend
+        self.name = backend.name
+        self.file_name = backend.file_name
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self.lock_timeout = lock_timeout
+        self.report = report
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='marmot-writer', daemon=True)
+        self._thread.start()
+
+    def lock(self, shared: bool = False) -> FileLock:
+        """Creates a lock on the formatted file.
+
+        Args:
+            shared (bool, optional): If True a shared read lock is created.
+                Defaults to False.
+
+        Returns:
+            FileLock: Lock, to be used as a context manager.
+        """
+        return FileLock(self.file_name, shared=shared, timeout=self.lock_timeout,
+                        logger=self.logger)
+
+    def _run(self) -> None:
+        """Carries out queued writes until the writer is closed."""
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                method, args, message, partition = job
+                if self._error is None:
+                    with self.lock():
+                        if self.report is None or method not in RECORDED_WRITES:
+                            getattr(self.backend, method)(*args)
+                        else:
+                            self._timed_write(method, args, partition)
+                    if message:
+                        self.logger.info(message)
+            except Exception as e:
+                self._error = e
+                self.logger.error(f"Writing to {self.file_name} failed: {e!r}")
+            finally:
+                self._queue.task_done()
+
+    def _timed_write(self, method: str, args: tuple, partition: str) -> None:
+        """Carries out a write, recording its time and bytes written in the report.
+
+        Args:
+            method (str): Backend method to call.
+            args (tuple): Arguments of the backend method.
+            partition (str): Partition the written data is from, 'all' for whole properties.
+        """
+        size = self.backend.size()
+        start = time.perf_counter()
+        getattr(self.backend, method)(*args)
+        self.report.record(args[RECORDED_WRITES[method]], partition,
+                           write_time=time.perf_counter() - start,
+                           bytes_written=max(0, self.backend.size() - size))
+
+    def _raise_error(self) -> None:
+        """Raises the error of a failed write, if any."""
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _submit(self, method: str, *args, message: str = None,
+                partition: str = 'all') -> None:
+        """Queues a write, waiting if the queue is full.
+
+        Args:
+            method (str): Backend method to call.
+            *args: Arguments of the backend method.
+            message (str, optional): Logged once the write is complete.
+                Defaults to None.
+            partition (str, optional): Partition the data is from, used by the 
+                performance report. Defaults to 'all'.
+        """
+        self._raise_error()
+        if not self._thread.is_alive():
+            raise RuntimeError("PropertyWriter has been closed")
+        self._queue.put((method, args, message, partition))
+
+    def save(self, df: pd.DataFrame, key: str) -> None:
+        """Queues saving a formatted property, replacing any existing property.
+
+        The data must not be modified after it has been passed to the writer.
+
+        Args:
+            df (pd.DataFrame): Long formatted property.
+            key (str): formatted property identifier, e.g generator_Generation
+        """
+        self.logger.info(f"Saving {key} with {self.name} backend...")
+        self._submit('save', df, key, message=f"{key} saved successfully\n")
+
+    def append(self, df: pd.DataFrame, key: str, partition: str = 'all') -> None:
+        """Queues appending data to a partial copy of a property.
+
+        Args:
+            df (pd.DataFrame): Long formatted data.
+            key (str): formatted property identifier, e.g generator_Generation
+            partition (str, optional): Partition the data is from, used by the 
+                performance report. Defaults to 'all'.
+        """
+        self._submit('append', df, key, partition=partition)
+
+    def finalize(self, key: str) -> None:
+        """Queues making an appended property available.
+
+        Args:
+            key (str): formatted property identifier, e.g generator_Generation
+        """
+        self._submit('finalize', key)
+
+    def remove(self, key: str) -> None:
+        """Queues removing a property and any partially appended copy of it.
+
+        Args:
+            key (str): formatted property identifier, e.g generator_Generation
+        """
+        self._submit('remove', key)
+
+    def link(self, key: str, alias: str) -> None:
+        """Queues saving an alias of a property as a link.
+
+        Args:
+            key (str): formatted property identifier of the existing property.
+            alias (str): formatted property identifier of the alias.
+        """
+        self._submit('link', key, alias)
+
+    def flush(self) -> None:
+        """Waits until all queued writes are complete."""
+        self._queue.join()
+        self._raise_error()
+
+    def read(self, key: str) -> pd.DataFrame:
+        """Reads a formatted property, once all queued writes are complete.
+
+        Args:
+            key (str): formatted property identifier, e.g generator_Generation
+
+        Returns:
+            pd.DataFrame: Long formatted property.
+        """
+        self.flush()
+        with self.lock(shared=True):
+            return self.backend.read(key)
+
+    def keys(self) -> list:
+        """Gets the saved keys, once all queued writes are complete.
+
+        Returns:
+            list: keys.
+        """
+        self.flush()
+        with self.lock(shared=True):
+            return self.backend.keys()
+
+    def close(self) -> None:
+        """Completes all queued writes and stops the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            # Complete the writes queued before the error without masking it
+            try:
+                self.close()
+            except Exception as e:
+                self.logger.error(f"Writing to {self.file_name} failed: {e!r}")
@@ -23,12 +23,18 @@ if __name__ == '__main__':  # Add Marmot directory to sys path if running from _
         os.chdir(pathlib.Path(__file__).parent.absolute().parent.absolute())
 import time
 import re
+import argparse
+import traceback
 import logging
 import logging.config
+import collections
+import concurrent.futures
+import multiprocessing
+import numpy as np
 import pandas as pd
 import h5py
 import yaml
-from typing import Union
+from typing import Union, Iterator, Tuple, Callable
 
 try:
     from marmot.meta_data import MetaData
@@ -40,6 +46,24 @@ except ModuleNotFoundError:
     print("System will now exit")
     sys.exit()
 import marmot.config.mconfig as mconfig
+from marmot.formatterutils.storage import (formatted_keys, get_backend, 
+                                            LAYOUTS, BACKENDS, STORAGE_PROFILES)
+from marmot.formatterutils.manifest import PartitionManifest
+from marmot.formatterutils.derived import DerivedPropertyGraph, DERIVED_PROPERTIES, base_inputs
+from marmot.formatterutils.rollups import (register_spatial_rollups, register_temporal_rollups,
+                                           TEMPORAL_ROLLUP_PERIODS)
+from marmot.formatterutils.writer import PropertyWriter, FileLock
+from marmot.formatterutils.h5plexos_reader import (H5PlexosReader, PropertyArrays, 
+                                                    timescales_in_window)
+from marmot.formatterutils.solution_pool import SolutionPool
+from marmot.formatterutils.report import (PerformanceReport, report_path, 
+                                          memory_checkpoint, memory_since)
+from marmot.formatterutils.watcher import PartitionWatcher
+from marmot.formatterutils.work_queue import (WorkQueue, unit_id, write_shard, read_shard,
+                                              QUEUE_POLL_INTERVAL)
+from marmot.formatterutils.planner import (available_memory_mb, measured_rates, count_rows,
+                                           DEFAULT_BYTES_PER_ROW, DEFAULT_SECONDS_PER_ROW,
+                                           HDF5_APPEND_SECONDS_PER_ROW, PROPERTY_BYTES_PER_ROW)
 
 # Import as Submodule
 try:
@@ -79,6 +103,11 @@ UNITS_CONVERSION = {
                     'Kg/MWh': ('Kg/MWh', 1)
                     }
 
+# Approximate peak memory in bytes used to process and append each value of a h5plexos 
+# dataset, by storage backend. Includes the processed index and the conversion to the 
+# stored format, hdf5 tables store the index as fixed width strings
+PROCESS_BYTES_PER_VALUE = {'hdf5': 800, 'parquet': 250}
+
 
 class SetupLogger():
     """Sets up the python logger.
@@ -99,6 +128,7 @@ class SetupLogger():
         """
         Args:
             log_directory (str, optional): log directory to save logs. 
+                Relative paths are relative to the Marmot package directory.
                 Defaults to 'logs'.
             log_suffix (str, optional): Optional suffix to add to end of log file. 
                 Defaults to None.
@@ -108,16 +138,16 @@ class SetupLogger():
         else:
              self.log_suffix = f'_{log_suffix}'
 
-        current_dir = os.getcwd()
-        os.chdir(FILE_DIR)
-
+        # Paths are resolved from the location of this module rather than changing the 
+        # working directory, which is shared by all threads of the process
+        log_directory = os.path.join(FILE_DIR, log_directory)
         try:
             os.makedirs(log_directory)
         except FileExistsError:
             # log directory already exists
             pass
 
-        with open('config/marmot_logging_config.yml', 'rt') as f:
+        with open(os.path.join(FILE_DIR, 'config', 'marmot_logging_config.yml'), 'rt') as f:
             conf = yaml.safe_load(f.read())
             conf['handlers']['warning_handler']['filename'] = \
                 (conf['handlers']['warning_handler']['filename']
@@ -133,22 +163,93 @@ class SetupLogger():
         self.logger.handlers[1].doRollover()
         self.logger.handlers[2].doRollover()
 
-        os.chdir(current_dir)
+
+# Description of how each PLEXOS class is formatted by Process.process
+# drop: index levels to remove
+# rename: index levels to rename, {original: new}
+# joins: metadata mappings to join, list of (mapping name, key levels).
+#   Mapping names are Process._build_{name} or MetaData methods, joins are skipped
+#   if the mapping is empty or the key levels are not available
+# value_maps: index levels to map to new values, {level: Process attribute with the value dict}
+DEFAULT_PROCESS_SPEC = dict(drop=['band', 'property'])
+
+PROCESS_SPECS = {
+    'generator': dict(drop=['band', 'property'],
+                      rename={'category': 'tech', 'name': 'gen_name'},
+                      joins=[('region_generators', ['gen_name']),
+                             ('zone_generators', ['gen_name']),
+                             ('Region_Mapping', ['region'])]),
+    'region': dict(drop=['band', 'property', 'category'],
+                   rename={'name': 'region'},
+                   joins=[('Region_Mapping', ['region'])]),
+    'zone': dict(drop=['band', 'property', 'category'],
+                 rename={'name': 'zone'}),
+    'line': dict(drop=['band', 'property', 'category'],
+                 rename={'name': 'line_name'}),
+    'interface': dict(drop=['band', 'property'],
+                      rename={'name': 'interface_name', 'category': 'interface_category'}),
+    'reserve': dict(drop=['band', 'property'],
+                    rename={'name': 'parent', 'category': 'Type'},
+                    joins=[('reserves_regions', ['parent']),
+                           ('reserves_zones', ['parent'])]),
+    # merging in generator region/zones first prevents double 
+    # counting in cases where multiple model regions are within a reserve region
+    'reserves_generators': dict(drop=['band', 'property'],
+                                rename={'child': 'gen_name'},
+                                joins=[('generator_category', ['gen_name']),
+                                       ('region_generators', ['gen_name']),
+                                       ('zone_generators', ['gen_name']),
+                                       ('reserves_regions', ['parent', 'region']),
+                                       ('reserves_zones', ['parent', 'zone'])]),
+    'fuel': dict(drop=['band', 'property', 'category'],
+                 rename={'name': 'fuel_type'}),
+    'constraint': dict(drop=['band', 'property'],
+                       rename={'category': 'constraint_category', 'name': 'constraint'}),
+    'emission': dict(drop=['band', 'property'],
+                     rename={'name': 'emission_type'}),
+    'emissions_generators': dict(drop=['band', 'property'],
+                                 rename={'child': 'gen_name', 'parent': 'pollutant'},
+                                 joins=[('generator_category', ['gen_name']),
+                                        ('region_generators', ['gen_name']),
+                                        ('zone_generators', ['gen_name']),
+                                        ('Region_Mapping', ['region'])],
+                                 value_maps={'pollutant': 'emit_names_dict'}),
+    'storage': dict(drop=['band', 'property', 'category'],
+                    rename={'name': 'storage_resource'},
+                    joins=[('generator_storage', ['storage_resource']),
+                           ('region_generators', ['gen_name']),
+                           ('zone_generators', ['gen_name']),
+                           ('Region_Mapping', ['region'])]),
+    'region_regions': dict(drop=['band', 'property']),
+    'node': dict(drop=['band', 'property', 'category'],
+                 rename={'name': 'node'},
+                 joins=[('node_region', ['node']),
+                        ('node_zone', ['node']),
+                        ('Region_Mapping', ['region'])]),
+    'abatement': dict(drop=['band', 'property'],
+                      rename={'name': 'abatement_name'}),
+    'batterie': dict(drop=['band', 'property'],
+                     rename={'name': 'battery_name'}),
+    }
 
 
 class Process(SetupLogger):
     """Process PLEXOS class specific data from h5plexos database.
 
-    All methods are PLEXOS Class specific e.g generator, region, zone, line etc.
+    Each PLEXOS Class e.g generator, region, zone, line etc. is described 
+    in PROCESS_SPECS and formatted by the process method. The class specific 
+    df_process_* methods are kept and call process.
     """
 
     def __init__(self, df: pd.DataFrame, metadata: MetaData, 
                  model: str, Region_Mapping: pd.DataFrame, 
-                 emit_names: pd.DataFrame, logger: logging.Logger):
+                 emit_names: pd.DataFrame, logger: logging.Logger,
+                 mapping_cache: dict = None):
         """
         Args:
-            df (pd.DataFrame): Unprocessed h5plexos dataframe containing
-                class and property specifc data.
+            df (pd.DataFrame, PropertyArrays): Unprocessed h5plexos dataframe 
+                containing class and property specifc data, or the same data
+                read by H5PlexosReader.
             metadata (MetaData): Instantiation of MetaData for specific 
                 h5plexos file.
             model (str): Name of specific PLEXOS model partition
@@ -157,6 +258,10 @@ class Process(SetupLogger):
             emit_names (pd.DataFrame): DataFrame with 2 columns to rename 
                 emission names.
             logger (logging.Logger): logger object from SetupLogger.
+            mapping_cache (dict, optional): Cache of object mappings built from 
+                the metadata, shared by all properties of a scenario so each 
+                mapping is only built once per partition. 
+                Defaults to None, in which case a new cache is used.
         """
         # certain methods require information from metadata.  metadata is now
         # passed in as an instance of MetaData class for the appropriate model
@@ -166,65 +271,226 @@ class Process(SetupLogger):
         self.Region_Mapping = Region_Mapping
         self.emit_names = emit_names
         self.logger = logger
+        self.mapping_cache = mapping_cache if mapping_cache is not None else {}
 
         if not self.emit_names.empty:
             self.emit_names_dict = (self.emit_names[['Original', 'New']]
                                        .set_index("Original").to_dict()["New"])
 
-    def df_process_generator(self) -> pd.DataFrame:
-        """Format PLEXOS Generator Class data.
+    def _get_mapping(self, name: str) -> pd.DataFrame:
+        """Gets an object mapping of the partition, building it on first use.
+
+        Mappings are built by the _build_{name} method if one exists, 
+        otherwise by the MetaData method of the same name. They are stored 
+        in the mapping cache keyed by partition and name.
+
+        Args:
+            name (str): Name of the mapping e.g region_generators.
 
         Returns:
-            pd.DataFrame: Processed output, single value column with multiindex.
+            pd.DataFrame: Mapping, empty if the metadata required to 
+                build it is not available.
         """
-        df = self.df.droplevel(level=["band", "property"])
-        df.index.rename(['tech', 'gen_name'], level=['category', 'name'], inplace=True)
+        key = (self.model, name)
+        if key not in self.mapping_cache:
+            if hasattr(self, f'_build_{name}'):
+                mapping = getattr(self, f'_build_{name}')()
+            else:
+                mapping = getattr(self.metadata, name)(self.model)
+            self.mapping_cache[key] = mapping
+        return self.mapping_cache[key]
+
+    def _build_Region_Mapping(self) -> pd.DataFrame:
+        """User defined Region_Mapping aggregations, keyed by region."""
+        return self.Region_Mapping
+
+    def _build_node_region(self) -> pd.DataFrame:
+        """Region of each node, keyed by node."""
+        node_region = self.metadata.node_region(self.model)
+        if node_region.empty:
+            return node_region
+        return node_region.reset_index()
+
+    def _build_node_zone(self) -> pd.DataFrame:
+        """Zone of each node, keyed by node."""
+        node_zone = self.metadata.node_zone(self.model)
+        if node_zone.empty:
+            return node_zone
+        return node_zone.reset_index()
+
+    def _build_generator_storage(self) -> pd.DataFrame:
+        """Generator of each storage, keyed by storage_resource."""
+        return self.metadata.generator_storage(self.model).rename(columns={'name': 'storage_resource'})
+
+    def process(self, plexos_class: str) -> pd.DataFrame:
+        """Formats the data of any PLEXOS class, as described by PROCESS_SPECS.
+
+        The engine works on the index codes of the h5plexos data. Levels 
+        are dropped and renamed, metadata is joined on the unique key values of 
+        each object and mapped back to the rows through the codes, so the 
+        values array is only copied when a join maps an object to more than one row.
+        Classes without a spec are formatted with DEFAULT_PROCESS_SPEC.
 
-        if self.metadata.region_generator_category(self.model).empty is False:
-            region_gen_idx = pd.CategoricalIndex(self.metadata.region_generator_category(self.model)
-                                                     .index.get_level_values(0))
-            region_gen_idx = region_gen_idx.repeat(len(df.index.get_level_values('timestamp').unique()))
+        Args:
+            plexos_class (str): PLEXOS class e.g generator, region, zone etc.
 
-            idx_region = pd.MultiIndex(levels=df.index.levels + [region_gen_idx.categories],
-                                       codes=df.index.codes + [region_gen_idx.codes],
-                                       names=df.index.names + region_gen_idx.names)
+        Returns:
+            pd.DataFrame: Processed output, single value column with multiindex.
+        """
+        spec = PROCESS_SPECS.get(plexos_class, DEFAULT_PROCESS_SPEC)
+        if isinstance(self.df, PropertyArrays):
+            index_names, index_levels, index_codes = (self.df.names, self.df.levels, 
+                                                      self.df.codes)
+            values = self.df.values
         else:
-            idx_region = df.index
+            index = self.df.index
+            index_names, index_levels, index_codes = index.names, index.levels, index.codes
+            values = np.asarray(self.df).reshape(-1)
+
+        drop = spec.get('drop', [])
+        keep = [i for i, name in enumerate(index_names) if name not in drop]
+        rename = spec.get('rename', {})
+        names = [rename.get(index_names[i], index_names[i]) for i in keep]
+        levels = [index_levels[i] for i in keep]
+        codes = [index_codes[i] for i in keep]
+
+        for mapping_name, on in spec.get('joins', []):
+            mapping = self._get_mapping(mapping_name)
+            if mapping.empty or not set(on).issubset(names) \
+                    or not set(on).issubset(mapping.columns):
+                continue
+            row_take, levels, codes, names = Process._join_levels(levels, codes, names, 
+                                                                  mapping, on)
+            if row_take is not None:
+                values = values[row_take]
+
+        for level_name, attr in spec.get('value_maps', {}).items():
+            value_map = getattr(self, attr, None)
+            if value_map and level_name in names:
+                i = names.index(level_name)
+                levels[i], codes[i] = Process._map_level(levels[i], codes[i], value_map)
+
+        # move timestamp to start of df
+        order = list(range(len(names)))
+        order.insert(0, order.pop(names.index('timestamp')))
+        idx = pd.MultiIndex(levels=[levels[i].rename(names[i]) for i in order], 
+                            codes=[codes[i] for i in order],
+                            names=[names[i] for i in order], 
+                            verify_integrity=False)
+        df = pd.DataFrame(data=pd.to_numeric(values, downcast='float'), index=idx)
+
+        if plexos_class == 'emissions_generators':
+            self._check_emission_categories(df)
+        return df
+
+    @staticmethod
+    def _join_levels(levels: list, codes: list, names: list, 
+                     mapping: pd.DataFrame, on: list) -> Tuple[np.ndarray, list, list, list]:
+        """Joins a metadata mapping to index levels, working in code space.
+
+        The unique values of the key levels are merged with the mapping,
+        each new column is factorized into a level and its codes are mapped 
+        back to the rows. Rows of objects that match more than one mapping 
+        row are repeated, preserving the order of a left merge.
 
-        if self.metadata.zone_generator_category(self.model).empty is False:
-            zone_gen_idx = pd.CategoricalIndex(self.metadata.zone_generator_category(self.model)
-                                                   .index.get_level_values(0))
-            zone_gen_idx = zone_gen_idx.repeat(len(df.index.get_level_values('timestamp').unique()))
+        Args:
+            levels (list): Index levels.
+            codes (list): Index codes, one array per level.
+            names (list): Index level names.
+            mapping (pd.DataFrame): Mapping containing the on columns.
+            on (list): Names of the levels to join on.
 
-            idx_zone = pd.MultiIndex(levels=idx_region.levels + [zone_gen_idx.categories],
-                                     codes=idx_region.codes + [zone_gen_idx.codes],
-                                     names=idx_region.names + zone_gen_idx.names)
+        Returns:
+            Tuple[np.ndarray, list, list, list]: Positions of the rows to take, None if rows are unchanged, 
+                and the new levels, codes and names.
+        """
+        key_pos = [names.index(key) for key in on]
+        if len(key_pos) == 1:
+            # Rows are grouped by their key code directly, missing values (-1) 
+            # select the last group, whose key is missing
+            level = levels[key_pos[0]]
+            row_group = codes[key_pos[0]]
+            keys = pd.DataFrame({on[0]: np.asarray(pd.Categorical.from_codes(
+                np.append(np.arange(len(level)), -1), categories=level))})
         else:
-            idx_zone = idx_region
-
-        if not self.Region_Mapping.empty:
-            region_gen_mapping_idx = pd.MultiIndex.from_frame(self.metadata.region_generator_category(self.model)
-                                                              .merge(self.Region_Mapping,
-                                                                     how="left",
-                                                                     on='region')
-                                                              .sort_values(by=['tech', 'gen_name'])
-                                                              .drop(['region', 'tech', 'gen_name'], axis=1)
-                                                              )
-            region_gen_mapping_idx = region_gen_mapping_idx.repeat(len(df.index.get_level_values('timestamp').unique()))
-
-            idx_map = pd.MultiIndex(levels=idx_zone.levels + region_gen_mapping_idx.levels,
-                                    codes=idx_zone.codes + region_gen_mapping_idx.codes,
-                                    names=idx_zone.names + region_gen_mapping_idx.names)
+            shape = tuple(len(levels[i]) + 1 for i in key_pos)
+            # Codes are shifted by one so that missing values (-1) are preserved
+            combined = np.ravel_multi_index([codes[i].astype(np.int64) + 1 for i in key_pos], shape)
+            row_group, unique_combined = pd.factorize(combined)
+            key_codes = np.unravel_index(unique_combined, shape)
+            # Shifted codes of 0 are missing values
+            keys = pd.DataFrame({key: np.asarray(pd.Categorical.from_codes(key_code - 1, 
+                                                                           categories=levels[i]))
+                                 for key, i, key_code in zip(on, key_pos, key_codes)})
+        keys['_group'] = np.arange(len(keys))
+        new_columns = [col for col in mapping.columns if col not in names]
+        joined = keys.merge(mapping[on + new_columns], how='left', on=on)
+
+        group_size = np.bincount(joined['_group'].to_numpy(), minlength=len(keys))
+        if (group_size == 1).all():
+            row_take = None
+            joined_row = row_group
         else:
-            idx_map = idx_zone
+            row_repeats = group_size[row_group]
+            row_take = np.repeat(np.arange(len(row_group)), row_repeats)
+            group_start = np.cumsum(group_size) - group_size
+            repeat_start = np.cumsum(row_repeats) - row_repeats
+            joined_row = (group_start[row_group[row_take]] 
+                          + np.arange(len(row_take)) - np.repeat(repeat_start, row_repeats))
+            codes = [code[row_take] for code in codes]
+
+        levels, codes, names = list(levels), list(codes), list(names)
+        for col in new_columns:
+            column = joined[col]
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                column = column.astype(object)
+            col_codes, col_level = pd.factorize(column, sort=True)
+            # Use the smallest code dtype before mapping the codes to the rows
+            col_codes = col_codes.astype(np.min_scalar_type(-len(col_level) - 1))
+            levels.append(pd.Index(col_level, name=col))
+            codes.append(col_codes[joined_row])
+            names.append(col)
+        return row_take, levels, codes, names
 
-        df = pd.DataFrame(data=df.values.reshape(-1), index=idx_map)
-        df_col = list(df.index.names)  # Gets names of all columns in df and places in list
-        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
-        df = df.reorder_levels(df_col, axis=0)
-        df[0] = pd.to_numeric(df[0], downcast='float')
+    @staticmethod
+    def _map_level(level: pd.Index, level_codes: np.ndarray, 
+                   value_map: dict) -> Tuple[pd.Index, np.ndarray]:
+        """Maps the values of an index level, merging any values that map to the same name.
 
-        return df
+        Args:
+            level (pd.Index): Index level.
+            level_codes (np.ndarray): Codes of the level.
+            value_map (dict): Dictionary of original to new values.
+
+        Returns:
+            Tuple[pd.Index, np.ndarray]: New level and codes.
+        """
+        mapped = level.map(lambda x: value_map.get(x, x))
+        remap, new_level = pd.factorize(mapped, sort=True)
+        new_codes = np.where(level_codes >= 0, remap[level_codes], -1)
+        return pd.Index(new_level, name=level.name), new_codes
+
+    def _check_emission_categories(self, df: pd.DataFrame) -> None:
+        """Checks if all emissions categories have been identified and matched. 
+        
+        If not, lists categories that need a match.
+
+        Args:
+            df (pd.DataFrame): Processed emissions_generators data.
+        """
+        if not self.emit_names.empty and self.emit_names_dict != {}:
+            pollutants = set(df.index.get_level_values('pollutant').unique())
+            if pollutants.issubset(self.emit_names["New"].unique()) is False:
+                missing_emit_cat = list(pollutants - (set(self.emit_names["New"].unique())))
+                self.logger.warning(f"The following emission objects do not have a correct category mapping: {missing_emit_cat}\n")
+
+    def df_process_generator(self) -> pd.DataFrame:
+        """Format PLEXOS Generator Class data.
+
+        Returns:
+            pd.DataFrame: Processed output, single value column with multiindex.
+        """
+        return self.process('generator')
 
     def df_process_region(self) -> pd.DataFrame:
         """Format PLEXOS Region Class data.
@@ -232,29 +498,7 @@ class Process(SetupLogger):
         Returns:
             pd.DataFrame: Processed output, single value column with multiindex.
         """
-        df = self.df.droplevel(level=["band", "property", "category"])
-        df.index.rename('region', level='name', inplace=True)
-        # checks if Region_Mapping contains data to merge, skips if empty
-        if not self.Region_Mapping.empty:  
-            mapping_idx = pd.MultiIndex.from_frame(self.metadata.regions(self.model)
-                                                   .merge(self.Region_Mapping,
-                                                          how="left",
-                                                          on='region')
-                                                   .drop(['region', 'category'], axis=1)
-                                                   )
-            mapping_idx = mapping_idx.repeat(len(df.index.get_level_values('timestamp').unique()))
-
-            idx = pd.MultiIndex(levels=df.index.levels + mapping_idx.levels,
-                                codes=df.index.codes + mapping_idx.codes,
-                                names=df.index.names + mapping_idx.names)
-        else:
-            idx = df.index
-        df = pd.DataFrame(data=df.values.reshape(-1), index=idx)
-        df_col = list(df.index.names)  # Gets names of all columns in df and places in list
-        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # Move timestamp to start of df
-        df = df.reorder_levels(df_col, axis=0)
-        df[0] = pd.to_numeric(df[0], downcast='float')
-        return df
+        return self.process('region')
 
     def df_process_zone(self) -> pd.DataFrame:
         """Format PLEXOS Zone Class data.
@@ -262,14 +506,7 @@ class Process(SetupLogger):
         Returns:
             pd.DataFrame: Processed output, single value column with multiindex.
         """
-        df = self.df.droplevel(level=["band", "property", "category"])
-        df.index.rename('zone', level='name', inplace=True)
-        df = pd.DataFrame(data=df.values.reshape(-1), index=df.index)
-        df_col = list(df.index.names)  # Gets names of all columns in df and places in list
-        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
-        df = df.reorder_levels(df_col, axis=0)
-        df[0] = pd.to_numeric(df[0], downcast='float')
-        return df
+        return self.process('zone')
 
     def df_process_line(self) -> pd.DataFrame:
         """Format PLEXOS Line Class data.
@@ -277,30 +514,15 @@ class Process(SetupLogger):
         Returns:
             pd.DataFrame: Processed output, single value column with multiindex.
         """
-        df = self.df.droplevel(level=["band", "property", "category"])
-        df.index.rename('line_name', level='name', inplace=True)
-        df = pd.DataFrame(data=df.values.reshape(-1), index=df.index)
-        df_col = list(df.index.names)  # Gets names of all columns in df and places in list
-        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
-        df = df.reorder_levels(df_col, axis=0)
-        df[0] = pd.to_numeric(df[0], downcast='float')
-        return df
+        return self.process('line')
 
     def df_process_interface(self) -> pd.DataFrame:
-        """Format PLEXOS PLEXOS Interface Class data.
+        """Format PLEXOS Interface Class data.
 
         Returns:
             pd.DataFrame: Processed output, single value column with multiindex.
         """
-        df = self.df.droplevel(level=["band", "property"])
-        df.index.rename(['interface_name', 'interface_category'], 
-                            level=['name', 'category'], inplace=True)
-        df = pd.DataFrame(data=df.values.reshape(-1), index=df.index)
-        df_col = list(df.index.names)  # Gets names of all columns in df and places in list
-        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
-        df = df.reorder_levels(df_col, axis=0)
-        df[0] = pd.to_numeric(df[0], downcast='float')
-        return df
+        return self.process('interface')
 
     def df_process_reserve(self) -> pd.DataFrame:
         """Format PLEXOS Reserve Class data.
@@ -308,24 +530,7 @@ class Process(SetupLogger):
         Returns:
             pd.DataFrame: Processed output, single value column with multiindex.
         """
-        df = self.df.droplevel(level=["band", "property"])
-        df.index.rename(['parent', 'Type'], level=['name', 'category'], inplace=True)
-        df = df.reset_index()  # unzip the levels in index
-        if self.metadata.reserves_regions(self.model).empty is False:
-            # Merges in regions where reserves are located
-            df = df.merge(self.metadata.reserves_regions(self.model), 
-                            how='left', on='parent')  
-        if self.metadata.reserves_zones(self.model).empty is False:
-            # Merges in zones where reserves are located
-            df = df.merge(self.metadata.reserves_zones(self.model), 
-                            how='left', on='parent')  
-        df_col = list(df.columns)  # Gets names of all columns in df and places in list
-        df_col.remove(0)
-        # move timestamp to start of df
-        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  
-        df.set_index(df_col, inplace=True)
-        df[0] = pd.to_numeric(df[0], downcast='float')
-        return df
+        return self.process('reserve')
 
     def df_process_reserves_generators(self) -> pd.DataFrame:
         """Format PLEXOS Reserve_Generators Relational Class data.
@@ -333,37 +538,7 @@ class Process(SetupLogger):
         Returns:
             pd.DataFrame: Processed output, single value column with multiindex.
         """
-        df = self.df.droplevel(level=["band", "property"])
-        df.index.rename(['gen_name'], level=['child'], inplace=True)
-        df = df.reset_index()  # unzip the levels in index
-        df = df.merge(self.metadata.generator_category(self.model), 
-                        how='left', on='gen_name')
-
-        # merging in generator region/zones first prevents double 
-        # counting in cases where multiple model regions are within a reserve region
-        if self.metadata.region_generators(self.model).empty is False:
-            df = df.merge(self.metadata.region_generators(self.model), 
-                            how='left', on='gen_name')
-        if self.metadata.zone_generators(self.model).empty is False:
-            df = df.merge(self.metadata.zone_generators(self.model), 
-                            how='left', on='gen_name')
-
-        # now merge in reserve regions/zones
-        if self.metadata.reserves_regions(self.model).empty is False:
-            # Merges in regions where reserves are located
-            df = df.merge(self.metadata.reserves_regions(self.model), 
-                            how='left', on=['parent', 'region'])  
-        if self.metadata.reserves_zones(self.model).empty is False:
-            # Merges in zones where reserves are located
-            df = df.merge(self.metadata.reserves_zones(self.model), 
-                            how='left', on=['parent', 'zone'])  
-
-        df_col = list(df.columns)  # Gets names of all columns in df and places in list
-        df_col.remove(0)
-        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
-        df.set_index(df_col, inplace=True)
-        df[0] = pd.to_numeric(df[0], downcast='float')
-        return df
+        return self.process('reserves_generators')
 
     def df_process_fuel(self) -> pd.DataFrame:
         """Format PLEXOS Fuel Class data.
@@ -371,14 +546,7 @@ class Process(SetupLogger):
         Returns:
             pd.DataFrame: Processed output, single value column with multiindex.
         """
-        df = self.df.droplevel(level=["band", "property", "category"])
-        df.index.rename('fuel_type', level='name', inplace=True)
-        df = pd.DataFrame(data=df.values.reshape(-1), index=df.index)
-        df_col = list(df.index.names)  # Gets names of all columns in df and places in list
-        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
-        df = df.reorder_levels(df_col, axis=0)
-        df[0] = pd.to_numeric(df[0], downcast='float')
-        return df
+        return self.process('fuel')
 
     def df_process_constraint(self) -> pd.DataFrame:
         """Format PLEXOS Constraint Class data.
@@ -386,15 +554,7 @@ class Process(SetupLogger):
         Returns:
             pd.DataFrame: Processed output, single value column with multiindex.
         """
-        df = self.df.droplevel(level=["band", "property"])
-        df.index.rename(['constraint_category', 'constraint'], 
-                            level=['category', 'name'], inplace=True)
-        df = pd.DataFrame(data=df.values.reshape(-1), index=df.index)
-        df_col = list(df.index.names)  # Gets names of all columns in df and places in list
-        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
-        df = df.reorder_levels(df_col, axis=0)
-        df[0] = pd.to_numeric(df[0], downcast='float')
-        return df
+        return self.process('constraint')
 
     def df_process_emission(self) -> pd.DataFrame:
         """Format PLEXOS Emission Class data.
@@ -402,14 +562,7 @@ class Process(SetupLogger):
         Returns:
             pd.DataFrame: Processed output, single value column with multiindex.
         """
-        df = self.df.droplevel(level=["band", "property"])
-        df.index.rename('emission_type', level='name', inplace=True)
-        df = pd.DataFrame(data=df.values.reshape(-1), index=df.index)
-        df_col = list(df.index.names)  # Gets names of all columns in df and places in list
-        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
-        df = df.reorder_levels(df_col, axis=0)
-        df[0] = pd.to_numeric(df[0], downcast='float')
-        return df
+        return self.process('emission')
 
     def df_process_emissions_generators(self) -> pd.DataFrame:
         """Format PLEXOS Emissions_Generators Relational Class data.
@@ -417,49 +570,7 @@ class Process(SetupLogger):
         Returns:
             pd.DataFrame: Processed output, single value column with multiindex.
         """
-        df = self.df.droplevel(level=["band", "property"])
-        df.index.rename(['gen_name'], level=['child'], inplace=True)
-        df.index.rename(['pollutant'], level=['parent'], inplace=True)
-
-        df = df.reset_index()  # unzip the levels in index
-        # merge in tech information
-        df = df.merge(self.metadata.generator_category(self.model), 
-                        how='left', on='gen_name') 
-        # merge in region and zone information
-        if self.metadata.region_generator_category(self.model).empty is False:
-            # merge in region information
-            df = df.merge(self.metadata.region_generator_category(self.model).reset_index(), 
-                                how='left', on=['gen_name', 'tech'])
-        if self.metadata.zone_generator_category(self.model).empty is False:
-            # Merges in zones where reserves are located
-            df = df.merge(self.metadata.zone_generator_category(self.model).reset_index(), 
-                                how='left', on=['gen_name', 'tech'])  
-        if not self.Region_Mapping.empty:
-            df = df.merge(self.Region_Mapping, how="left", on="region")
-
-        if not self.emit_names.empty:
-            # reclassify emissions as specified by user in mapping
-            df['pollutant'] = pd.Categorical(df['pollutant'].map(lambda x: self.emit_names_dict.get(x, x)))
-
-        # remove categoricals (otherwise h5 save will fail)
-        df = df.astype({'tech': 'object', 'pollutant': 'object'})
-
-        # Checks if all emissions categories have been identified and matched. 
-        # If not, lists categories that need a match
-        if not self.emit_names.empty:
-            if self.emit_names_dict != {} and (set(df['pollutant'].unique()).issubset(self.emit_names["New"].unique())) is False:
-                missing_emit_cat = list((set(df['pollutant'].unique())) - (set(self.emit_names["New"].unique())))
-                self.logger.warning(f"The following emission objects do not have a correct category mapping: {missing_emit_cat}\n")
-
-        df_col = list(df.columns)  # Gets names of all columns in df and places in list
-        df_col.remove(0)
-        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
-        df.set_index(df_col, inplace=True)
-        # downcast values to save on memory
-        df[0] = pd.to_numeric(df[0].values, downcast='float')
-        # convert to range index (otherwise h5 save will fail)
-        df.columns = pd.RangeIndex(0, 1, step=1)
-        return df
+        return self.process('emissions_generators')
 
     def df_process_storage(self) -> pd.DataFrame:
         """Format PLEXOS Storage Class data.
@@ -467,29 +578,7 @@ class Process(SetupLogger):
         Returns:
             pd.DataFrame: Processed output, single value column with multiindex.
         """
-        df = self.df.droplevel(level=["band", "property", "category"])
-        df = df.reset_index()  # unzip the levels in index
-        df = df.merge(self.metadata.generator_storage(self.model), 
-                        how='left', on='name')
-        if self.metadata.region_generators(self.model).empty is False:
-            # Merges in regions where generators are located
-            df = df.merge(self.metadata.region_generators(self.model),
-                            how='left', on='gen_name')  
-        if self.metadata.zone_generators(self.model).empty is False:
-            # Merges in zones where generators are located
-            df = df.merge(self.metadata.zone_generators(self.model), 
-                            how='left', on='gen_name')  
-        # checks if Region_Maping contains data to merge, skips if empty (Default)
-        if not self.Region_Mapping.empty:
-            # Merges in all Region Mappings
-            df = df.merge(self.Region_Mapping, how='left', on='region')  
-        df.rename(columns={'name': 'storage_resource'}, inplace=True)
-        df_col = list(df.columns)  # Gets names of all columns in df and places in list
-        df_col.remove(0)  # Removes 0, the data column from the list
-        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
-        df.set_index(df_col, inplace=True)
-        df[0] = pd.to_numeric(df[0], downcast='float')
-        return df
+        return self.process('storage')
 
     def df_process_region_regions(self) -> pd.DataFrame:
         """Format PLEXOS Region_Regions Relational Class data.
@@ -497,13 +586,7 @@ class Process(SetupLogger):
         Returns:
             pd.DataFrame: Processed output, single value column with multiindex.
         """
-        df = self.df.droplevel(level=["band", "property"])
-        df = pd.DataFrame(data=df.values.reshape(-1), index=df.index)
-        df_col = list(df.index.names)  # Gets names of all columns in df and places in list
-        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
-        df = df.reorder_levels(df_col, axis=0)
-        df[0] = pd.to_numeric(df[0], downcast='float')
-        return df
+        return self.process('region_regions')
 
     def df_process_node(self) -> pd.DataFrame:
         """Format PLEXOS Node Class data.
@@ -511,81 +594,98 @@ class Process(SetupLogger):
         Returns:
             pd.DataFrame: Processed output, single value column with multiindex.
         """
-        df = self.df.droplevel(level=["band", "property", "category"])
-        df.index.rename('node', level='name', inplace=True)
-        df.sort_index(level=['node'], inplace=True)
-        if self.metadata.node_region(self.model).empty is False:
-            node_region_idx = pd.CategoricalIndex(self.metadata.node_region(self.model).index.get_level_values(0))
-            node_region_idx = node_region_idx.repeat(len(df.index.get_level_values('timestamp').unique()))
-            idx_region = pd.MultiIndex(levels=df.index.levels + [node_region_idx.categories],
-                                       codes=df.index.codes + [node_region_idx.codes],
-                                       names=df.index.names + node_region_idx.names)
-        else:
-            idx_region = df.index
-        if self.metadata.node_zone(self.model).empty is False:
-            node_zone_idx = pd.CategoricalIndex(self.metadata.node_zone(self.model).index.get_level_values(0))
-            node_zone_idx = node_zone_idx.repeat(len(df.index.get_level_values('timestamp').unique()))
-            idx_zone = pd.MultiIndex(levels=idx_region.levels + [node_zone_idx.categories],
-                                     codes=idx_region.codes + [node_zone_idx.codes],
-                                     names=idx_region.names + node_zone_idx.names)
-        else:
-            idx_zone = idx_region
-        if not self.Region_Mapping.empty:
-            region_mapping_idx = pd.MultiIndex.from_frame(self.metadata.node_region(self.model)
-                                                          .merge(self.Region_Mapping,
-                                                                 how="left",
-                                                                 on='region')
-                                                          .drop(['region', 'node'], axis=1)
-                                                          )
-            region_mapping_idx = region_mapping_idx.repeat(len(df.index.get_level_values('timestamp').unique()))
-
-            idx_map = pd.MultiIndex(levels=idx_zone.levels + region_mapping_idx.levels,
-                                    codes=idx_zone.codes + region_mapping_idx.codes,
-                                    names=idx_zone.names + region_mapping_idx.names)
-        else:
-            idx_map = idx_zone
-
-        df = pd.DataFrame(data=df.values.reshape(-1), index=idx_map)
-        df_col = list(df.index.names)  # Gets names of all columns in df and places in list
-        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
-        df = df.reorder_levels(df_col, axis=0)
-        df[0] = pd.to_numeric(df[0], downcast='float')
-        return df
+        return self.process('node')
 
-    def df_process_abatement(self):
+    def df_process_abatement(self) -> pd.DataFrame:
         """Format PLEXOS Abatement Class data.
 
         Returns:
             pd.DataFrame: Processed output, single value column with multiindex.
         """
-        df = self.df.droplevel(level=["band", "property"])
-        df.index.rename('abatement_name', level='name', inplace=True)
-        df = pd.DataFrame(data=df.values.reshape(-1), index=df.index)
-        df_col = list(df.index.names)  # Gets names of all columns in df and places in list
-        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
-        df = df.reorder_levels(df_col, axis=0)
-        df[0] = pd.to_numeric(df[0], downcast='float')
-        return df
+        return self.process('abatement')
+
+    def df_process_batterie(self) -> pd.DataFrame:
+        """Format PLEXOS Batteries Class data.
 
-    def df_process_batterie(self):
+        Returns:
+            pd.DataFrame: Processed output, single value column with multiindex.
         """
-        Method for formatting data which comes form the PLEXOS Batteries Class
+        return self.process('batterie')
+
+    @staticmethod
+    def partition_time_range(df: pd.DataFrame) -> Tuple[pd.Timestamp, pd.Timestamp]:
+        """Gets the first and last timestamp of a processed partition.
+
+        Only the timestamps referenced by the index codes are considered,
+        so levels left over from earlier slicing are ignored.
 
-        Returns
-        -------
-        df : pd.DataFrame
-            Processed Output, single value column with multiindex.
+        Args:
+            df (pd.DataFrame): Processed data with a timestamp index level.
 
+        Returns:
+            Tuple[pd.Timestamp, pd.Timestamp]: First and last timestamp.
         """
-        df = self.df.droplevel(level=["band", "property"])
-        df.index.rename('battery_name', level='name', inplace=True)
-        df = pd.DataFrame(data=df.values.reshape(-1), index=df.index)
-        df_col = list(df.index.names)  # Gets names of all columns in df and places in list
-        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
-        df = df.reorder_levels(df_col, axis=0)
-        df[0] = pd.to_numeric(df[0], downcast='float')
+        level = df.index.names.index('timestamp')
+        used = np.zeros(len(df.index.levels[level]), dtype=bool)
+        used[df.index.codes[level]] = True
+        timestamps = df.index.levels[level][used]
+        return timestamps.min(), timestamps.max()
+
+    @staticmethod
+    def trim_partition_overlap(df: pd.DataFrame, previous_end: pd.Timestamp,
+                               model: str, logger: logging.Logger) -> pd.DataFrame:
+        """Removes the periods of a partition that overlap with the previous partition.
+
+        Partitions are processed in order, so any timestamp at or before the 
+        last timestamp of the previous partition has already been reported.
+        The comparison is made on the unique timestamps of the index level and 
+        mapped to rows through the level codes, which avoids hashing the full 
+        index. The removed overlap is reported for each partition.
+
+        Args:
+            df (pd.DataFrame): Processed data of a single partition.
+            previous_end (pd.Timestamp): Last timestamp of the previous partition.
+            model (str): Name of the partition, used for reporting.
+            logger (logging.Logger): logger object from SetupLogger.
+
+        Returns:
+            pd.DataFrame: DataFrame with overlapping periods removed.
+        """
+        level = df.index.names.index('timestamp')
+        keep_timestamps = df.index.levels[level] > previous_end
+        keep_rows = keep_timestamps[df.index.codes[level]]
+        removed_rows = len(keep_rows) - int(keep_rows.sum())
+        if removed_rows > 0:
+            partition_start = Process.partition_time_range(df)[0]
+            logger.info(f"Partition {model} overlaps the previous partition from "
+                        f"{partition_start} to {previous_end}, removed {removed_rows} rows")
+            df = df[keep_rows]
         return df
 
+    @staticmethod
+    def drop_partition_duplicates(df: pd.DataFrame, model: str, 
+                                  logger: logging.Logger) -> pd.DataFrame:
+        """Removes duplicate index entries within a single partition, keeping the first entry.
+
+        Uniqueness is checked first, which is cheap for the MultiIndex as it 
+        is computed from the level codes, so the duplicated rows are only 
+        searched for when a partition contains them.
+
+        Args:
+            df (pd.DataFrame): Processed data of a single partition.
+            model (str): Name of the partition, used for reporting.
+            logger (logging.Logger): logger object from SetupLogger.
+
+        Returns:
+            pd.DataFrame: DataFrame with duplicate index entries removed.
+        """
+        if df.index.is_unique:
+            return df
+        keep_rows = ~df.index.duplicated(keep='first')
+        logger.info(f"Drop duplicates removed {len(keep_rows) - int(keep_rows.sum())} "
+                    f"rows from partition {model}")
+        return df[keep_rows]
+
 class MarmotFormat(SetupLogger):
     """Main module class to be instantiated to run the formatter.
 
@@ -603,6 +703,22 @@ class MarmotFormat(SetupLogger):
                  Region_Mapping: Union[str, pd.DataFrame] = pd.DataFrame(),
                  emit_names: Union[str, pd.DataFrame] = pd.DataFrame(),
                  VoLL: int = 10000,
+                 num_workers: int = None,
+                 streaming: bool = None,
+                 storage_layout: str = None,
+                 storage_backend: str = None,
+                 storage_profile: str = None,
+                 incremental: bool = None,
+                 native_reader: bool = None,
+                 max_open_partitions: int = None,
+                 window_start: Union[str, pd.Timestamp] = None,
+                 window_end: Union[str, pd.Timestamp] = None,
+                 memory_budget: float = None,
+                 performance_report: bool = None,
+                 performance_callback: Callable[[dict], None] = None,
+                 spatial_rollups: bool = None,
+                 temporal_rollups: list = None,
+                 partitions: list = None,
                  **kwargs):
         """
         Args:
@@ -622,6 +738,94 @@ class MarmotFormat(SetupLogger):
                 emissions types. Defaults to pd.DataFrame().
             VoLL (int, optional): Value of lost load, used to calculate cost of 
                 unserved energy. Defaults to 10000.
+            num_workers (int, optional): Number of worker processes used to process 
+                properties in parallel. If 1, properties are processed sequentially. 
+                Workers are spawned, so with more than 1 worker a script running the 
+                formatter needs an if __name__ == '__main__' guard. 
+                Defaults to None, in which case the value is taken from the 
+                formatter_settings num_workers config setting.
+            streaming (bool, optional): If True, each partition is appended to the 
+                formatted h5 file as soon as it is processed, instead of combining all 
+                partitions in memory first. Properties are saved in the appendable 
+                table format. Defaults to None, in which case the value is taken from 
+                the formatter_settings streaming config setting.
+            storage_layout (str, optional): Layout used to save properties in the 
+                formatted h5 file, 'long' or 'wide'. The wide layout saves each property 
+                as a timestamp x object matrix with a dimension table per object class, 
+                and is read back as the long frame by the plotter. 
+                Defaults to None, in which case the value is taken from 
+                the formatter_settings storage_layout config setting.
+            storage_backend (str, optional): Backend used to save properties, 'hdf5' 
+                saves to the formatted h5 file, 'parquet' saves each property as a 
+                Parquet dataset in a {Scenario}_formatted.parquet folder and requires pyarrow. 
+                Metadata is always saved to the formatted h5 file and the plotter 
+                detects the backend automatically. 
+                Defaults to None, in which case the value is taken from 
+                the formatter_settings storage_backend config setting.
+            storage_profile (str, optional): Named compression settings of the storage 
+                backend, 'archive' (maximum compression), 'balanced' or 'fast' 
+                (lz4 with multi-threaded blosc). 
+                Defaults to None, in which case the value is taken from 
+                the formatter_settings storage_profile config setting.
+            incremental (bool, optional): If True and the formatted file already exists, 
+                h5plexos partitions which have changed since they were formatted are 
+                detected from the partition manifest, and only the properties and time 
+                ranges they affect are recomputed and spliced into the existing output.
+                Defaults to None, in which case the value is taken from 
+                the formatter_settings incremental config setting.
+            native_reader (bool, optional): If True, property data is read directly 
+                from the h5plexos files into arrays by H5PlexosReader, instead of 
+                being returned as a MultiIndexed Series by h5plexos PLEXOSSolution. 
+                The formatted output is the same. 
+                Defaults to None, in which case the value is taken from 
+                the formatter_settings native_reader config setting.
+            max_open_partitions (int, optional): Maximum number of h5plexos partitions 
+                held open at once, by the main process and by each worker process. 
+                Partitions are opened when first needed and the least recently used 
+                partition is closed when the limit is reached. 
+                Defaults to None, in which case the value is taken from 
+                the formatter_settings max_open_partitions config setting.
+            window_start (Union[str, pd.Timestamp], optional): Start of the time window 
+                to format, inclusive, e.g '2024-07-01'. Partitions entirely outside the 
+                window are skipped and only the periods in the window are read from the 
+                others. Year properties are not filtered by the window. 
+                Defaults to None, in which case data is formatted from the start of the horizon.
+            window_end (Union[str, pd.Timestamp], optional): End of the time window 
+                to format, inclusive, e.g '2024-07-07 23:55'. 
+                Defaults to None, in which case data is formatted to the end of the horizon.
+            memory_budget (float, optional): Memory in MB available to process a 
+                partition of a property. Partitions which would need more are split 
+                into chunks of objects, e.g ranges of nodes or lines, which are 
+                processed and appended one at a time. The saved properties are the 
+                same as without chunking. Enables streaming and requires the native reader. 
+                Defaults to None, in which case the value is taken from 
+                the formatter_settings memory_budget config setting, 
+                if this is also None properties are not chunked.
+            performance_report (bool, optional): If True, the read, process, 
+                overlap removal and write time, row count, bytes written and peak 
+                memory of each property and partition are saved to 
+                {Scenario}_formatted.performance.json and .csv next to the formatted file. 
+                Defaults to None, in which case the value is taken from 
+                the formatter_settings performance_report config setting.
+            performance_callback (Callable[[dict], None], optional): Called with the 
+                performance report at the end of each run, as returned by 
+                PerformanceReport.summary, whether or not the report is saved. 
+                Defaults to None.
+            spatial_rollups (bool, optional): If True, generator properties are also 
+                saved summed by timestamp, technology and region, zone and each 
+                Region_Mapping aggregation, as {key}_by_{aggregation} properties, which 
+                are read by plots that do not need generator level detail. 
+                Defaults to None, in which case the value is taken from 
+                the formatter_settings spatial_rollups config setting.
+            temporal_rollups (list, optional): Resolutions of the temporal rollups of 
+                interval properties, any of 'hourly', 'daily' and 'monthly'. Each 
+                interval property is also saved as the energy of each period, as 
+                {key}_{resolution} properties, which are read by plots of totals and 
+                monthly values. Defaults to None, in which case the value is taken from 
+                the formatter_settings temporal_rollups config setting.
+            partitions (list, optional): h5 file names of the partitions to format, 
+                e.g the partitions of a running scenario which have finished. 
+                Defaults to None, all h5 files in the scenario folder are formatted.
         """
         super().__init__(**kwargs) # Instantiation of SetupLogger
 
@@ -631,6 +835,84 @@ class MarmotFormat(SetupLogger):
         self.mapping_folder = mapping_folder
         self.VoLL = VoLL
 
+        if num_workers is None:
+            num_workers = mconfig.parser("formatter_settings", "num_workers")
+        self.num_workers = max(1, int(num_workers))
+        # Object mappings built by Process, reused by all properties of each partition
+        self.mapping_cache = {}
+        if streaming is None:
+            streaming = mconfig.parser("formatter_settings", "streaming")
+        self.streaming = streaming
+        if memory_budget is None:
+            memory_budget = mconfig.parser("formatter_settings", "memory_budget")
+        self.memory_budget = memory_budget
+        if storage_layout is None:
+            storage_layout = mconfig.parser("formatter_settings", "storage_layout")
+        if storage_layout not in LAYOUTS:
+            self.logger.warning(f"Unknown storage_layout '{storage_layout}', "
+                                f"must be one of {LAYOUTS}. Using the long layout\n")
+            storage_layout = 'long'
+        self.storage_layout = storage_layout
+        if storage_backend is None:
+            storage_backend = mconfig.parser("formatter_settings", "storage_backend")
+        if storage_backend not in BACKENDS:
+            self.logger.warning(f"Unknown storage_backend '{storage_backend}', "
+                                f"must be one of {tuple(BACKENDS)}. Using the hdf5 backend\n")
+            storage_backend = 'hdf5'
+        self.storage_backend = storage_backend
+        if storage_profile is None:
+            storage_profile = mconfig.parser("formatter_settings", "storage_profile")
+        if storage_profile not in STORAGE_PROFILES:
+            self.logger.warning(f"Unknown storage_profile '{storage_profile}', "
+                                f"must be one of {tuple(STORAGE_PROFILES)}. Using the archive profile\n")
+            storage_profile = 'archive'
+        self.storage_profile = storage_profile
+        if incremental is None:
+            incremental = mconfig.parser("formatter_settings", "incremental")
+        self.incremental = incremental
+        if native_reader is None:
+            native_reader = mconfig.parser("formatter_settings", "native_reader")
+        self.native_reader = native_reader
+        if self.memory_budget is not None:
+            # Chunks are appended to the saved properties as they are processed
+            self.streaming = True
+            if not self.native_reader:
+                self.logger.warning("memory_budget requires the native_reader, "
+                                    "properties will not be chunked\n")
+        if max_open_partitions is None:
+            max_open_partitions = mconfig.parser("formatter_settings", "max_open_partitions")
+        self.max_open_partitions = max(1, int(max_open_partitions))
+        # Time window to format, (start, end) with None for an open end
+        self.window = None
+        if window_start is not None or window_end is not None:
+            self.window = (None if window_start is None else pd.Timestamp(window_start),
+                           None if window_end is None else pd.Timestamp(window_end))
+        # Timescales of each partition with periods in the time window
+        self.window_timescales = None
+        if performance_report is None:
+            performance_report = mconfig.parser("formatter_settings", "performance_report")
+        self.performance_report = performance_report
+        self.performance_callback = performance_callback
+        # PerformanceReport of the current run, None if not reported
+        self.report = None
+        if spatial_rollups is None:
+            spatial_rollups = mconfig.parser("formatter_settings", "spatial_rollups")
+        self.spatial_rollups = spatial_rollups
+        if temporal_rollups is None:
+            temporal_rollups = mconfig.parser("formatter_settings", "temporal_rollups")
+        if isinstance(temporal_rollups, str):
+            temporal_rollups = [temporal_rollups]
+        temporal_rollups = list(temporal_rollups or [])
+        unknown_resolutions = [r for r in temporal_rollups if r not in TEMPORAL_ROLLUP_PERIODS]
+        if unknown_resolutions:
+            self.logger.warning(f"Unknown temporal_rollups {unknown_resolutions}, must be any of "
+                                f"{tuple(TEMPORAL_ROLLUP_PERIODS)}. These will not be saved\n")
+        self.temporal_rollups = [r for r in TEMPORAL_ROLLUP_PERIODS if r in temporal_rollups]
+        self.partitions = None if partitions is None else set(partitions)
+        # Shard file of each (key, partition) processed by a distributed worker, 
+        # None for partitions without data, set when merging a work queue
+        self.shards = None
+
         if self.Marmot_Solutions_folder is None:
             self.Marmot_Solutions_folder = self.PLEXOS_Solutions_folder
 
@@ -680,12 +962,21 @@ class MarmotFormat(SetupLogger):
                                                 self.emit_names.columns[1]: 'New'},
                                        inplace=True)
 
+    def __getstate__(self) -> dict:
+        # The callback may not be picklable and is only called by the main process
+        state = self.__dict__.copy()
+        state['performance_callback'] = None
+        return state
+
     def output_metadata(self, files_list: list, hdf_out_folder: str, 
                         HDF5_output: str, HDF5_folder_in: str) -> None:
         """Transfers metadata from original PLEXOS solutions file to processed HDF5 file.  
         
-        For each partition in a given scenario, the metadata from that partition 
-        is copied over and saved in the processed output file.
+        For each partition in a given scenario, the metadata groups from that partition 
+        (e.g objects, relations, times) are copied to metadata/{partition} in the 
+        processed output file with HDF5 group copies, in a single output file session.
+        Groups identical to a group already saved, e.g the objects of each partition, 
+        are stored once and linked from each partition.
 
         Args:
             files_list (list): List of all h5 files in hdf5 folder in alpha numeric order
@@ -693,38 +984,126 @@ class MarmotFormat(SetupLogger):
             HDF5_output (str): Name of formatted hdf5 output file 
             HDF5_folder_in (str): Location of original PLEXOS solutions h5 files 
         """
-        for partition in files_list:
-            f = h5py.File(os.path.join(HDF5_folder_in, partition),'r')
-            meta_keys = [key for key in f['metadata'].keys()]
-
-            group_dict = {}
-            for key in meta_keys:
-                sub_dict = {}
-                subkeys = [key for key in f['metadata'][key].keys()]
-                for sub in subkeys:
-                    dset = f['metadata'][key][sub]
-                    sub_dict[sub] = dset
-                group_dict[key] = sub_dict
-
-            with h5py.File(os.path.join(hdf_out_folder, HDF5_output),"a") as g:
-                # check if metadata group already exists
-                existing_groups = [key for key in g.keys()]
-                if 'metadata' not in existing_groups:
-                    grp = g.create_group('metadata')
-                else:
-                    grp = g['metadata']
+        output_file = os.path.join(hdf_out_folder, HDF5_output)
+        with FileLock(output_file), h5py.File(output_file, "a") as g:
+            grp = g.require_group('metadata')
+
+            # Metadata groups already saved, by structure. Values are read when first 
+            # compared, and only kept for the last group saved with each structure
+            saved_groups = {}
+            for partition_group in grp.values():
+                for meta_group in partition_group.values():
+                    saved_groups.setdefault(self._metadata_structure(meta_group), []).append(
+                        [meta_group, None])
+
+            linked = 0
+            for partition in files_list:
+                with h5py.File(os.path.join(HDF5_folder_in, partition), 'r') as f:
+                    partition_group = grp.create_group(partition)
+                    for key, meta_group in f['metadata'].items():
+                        structure = self._metadata_structure(meta_group)
+                        candidates = saved_groups.setdefault(structure, [])
+                        values = self._metadata_values(meta_group) if candidates else None
+                        for candidate in candidates:
+                            if candidate[1] is None:
+                                candidate[1] = self._metadata_values(candidate[0])
+                            if self._metadata_equal(values, candidate[1]):
+                                # Hard link, read exactly as a copied group
+                                partition_group[key] = candidate[0]
+                                linked += 1
+                                break
+                        else:
+                            g.copy(meta_group, partition_group, name=key)
+                            for candidate in candidates:
+                                candidate[1] = None
+                            candidates.append([partition_group[key], values])
+            if linked > 0:
+                self.logger.info(f"{linked} metadata groups are identical to a previous "
+                                 "partition and are saved as links")
+
+    @staticmethod
+    def _metadata_structure(group: h5py.Group) -> tuple:
+        """Gets the names, types and shapes of the datasets in a metadata group.
+
+        Args:
+            group (h5py.Group): Metadata group, e.g metadata/objects.
+
+        Returns:
+            tuple: Structure of the group, without reading any values.
+        """
+        structure = []
+
+        def add(name, obj):
+            if isinstance(obj, h5py.Dataset):
+                structure.append((name, str(obj.dtype), obj.shape))
+            else:
+                structure.append((name,))
+
+        group.visititems(add)
+        return tuple(structure)
+
+    @staticmethod
+    def _metadata_values(group: h5py.Group) -> dict:
+        """Reads the values and attributes of a metadata group.
+
+        Args:
+            group (h5py.Group): Metadata group, e.g metadata/objects.
+
+        Returns:
+            dict: (values, attributes) of each dataset and (None, attributes)
+            of each group, keys are the names relative to the group.
+        """
+        values = {'': (None, dict(group.attrs))}
+
+        def add(name, obj):
+            data = obj[()] if isinstance(obj, h5py.Dataset) else None
+            if isinstance(data, np.ndarray) and not data.dtype.hasobject:
+                # Compared as raw bytes
+                data = np.ascontiguousarray(data).reshape(-1).view(np.uint8)
+            values[name] = (data, dict(obj.attrs))
 
-                partition_group = grp.create_group(partition)
-                for key in list(group_dict.keys()):
-                    subgrp = partition_group.create_group(key)
-                    s_dict = group_dict[key]
-                    for key2 in list(s_dict.keys()):
-                        dset = s_dict[key2]
-                        subgrp.create_dataset(name=key2,data=dset)
-            f.close()
+        group.visititems(add)
+        return values
+
+    @staticmethod
+    def _metadata_equal(values: dict, other: dict) -> bool:
+        """Checks if two metadata groups read with _metadata_values are identical.
+
+        Args:
+            values (dict): Values of the first group.
+            other (dict): Values of the second group.
+
+        Returns:
+            bool: True if the groups are identical.
+        """
+        if values.keys() != other.keys():
+            return False
+        for name, (data, attrs) in values.items():
+            other_data, other_attrs = other[name]
+            if (attrs.keys() != other_attrs.keys()
+                    or not all(np.array_equal(attrs[attr], other_attrs[attr]) for attr in attrs)):
+                return False
+            if not np.array_equal(data, other_data):
+                return False
+        return True
+
+    def _open_solution(self, h5filepath: str):
+        """Opens a h5plexos file with H5PlexosReader or PLEXOSSolution,
+        depending on the native_reader setting.
+
+        Args:
+            h5filepath (str): Path to h5plexos file.
+
+        Returns:
+            H5PlexosReader, PLEXOSSolution: Open h5plexos file.
+        """
+        if self.native_reader:
+            return H5PlexosReader(h5filepath)
+        return PLEXOSSolution(h5filepath)
 
     def _get_data(self, plexos_class: str, plexos_prop: str, 
-                  timescale: str, db: PLEXOSSolution, metadata: MetaData) -> pd.DataFrame:
+                  timescale: str, db: PLEXOSSolution, metadata: MetaData,
+                  object_chunk: tuple = None) -> pd.DataFrame:
         """Handles the pulling of data from the H5plexos hdf5
         file and then passes the data to one of the formating functions
 
@@ -732,14 +1111,35 @@ class MarmotFormat(SetupLogger):
             plexos_class (str): PLEXOS class e.g Region, Generator, Zone etc
             plexos_prop (str): PLEXOS property e.g Max Capacity, Generation etc.
             timescale (str): Data timescale, e.g Hourly, Monthly, 5 minute etc.
-            db (PLEXOSSolution): PLEXOSSolution instance for specific h5plexos file.
+            db (PLEXOSSolution, H5PlexosReader): PLEXOSSolution or H5PlexosReader 
+                instance for specific h5plexos file.
             metadata (MetaData): MetaData instance
+            object_chunk (tuple, optional): (chunk, n_chunks), only the chunk-th of 
+                n_chunks equal ranges of the objects is processed. Requires a 
+                H5PlexosReader. Defaults to None, all objects are processed.
 
         Returns:
             pd.DataFrame: Formatted results dataframe.
         """
+        key_path = plexos_class + "_" + plexos_prop.replace(' ', '_')
+        partition = os.path.basename(db.h5file.filename)
+        # Peak memory of reading and processing this partition of the property
+        checkpoint = memory_checkpoint() if self.report is not None else None
+        read_start = time.perf_counter()
+        if self.shards is not None and (key_path, partition) in self.shards:
+            # Processed by a distributed worker
+            df = read_shard(self.shards[(key_path, partition)])
+            self._record(key_path, partition, read_time=time.perf_counter() - read_start)
+            if df.empty:
+                return self._report_prop_error(plexos_prop, plexos_class)
+            return df
         try:
-            if "_" in plexos_class:
+            if isinstance(db, H5PlexosReader):
+                window = self.window if self.window is not None and timescale != 'year' else (None, None)
+                df = db.query_property(plexos_class, plexos_prop, timescale=timescale,
+                                       start=window[0], end=window[1], 
+                                       object_chunk=object_chunk)
+            elif "_" in plexos_class:
                 df = db.query_relation_property(plexos_class, plexos_prop, 
                                                 timescale=timescale)
                 object_class = plexos_class
@@ -754,9 +1154,14 @@ class MarmotFormat(SetupLogger):
         except (ValueError, KeyError):
             df = self._report_prop_error(plexos_prop, plexos_class)
             return df
+        read_time = time.perf_counter() - read_start
         
+        process_start = time.perf_counter()
+        if isinstance(db, H5PlexosReader):
+            # Units are read along with the data
+            df_units = df.units
         # handles h5plexos naming discrepency 
-        if ((0,6,0) <= db.version and db.version < (0,7,0)):
+        elif ((0,6,0) <= db.version and db.version < (0,7,0)):
             # Get original units from h5plexos file 
             df_units = (db.h5file[f'/data/ST/{timescale}/{object_class}/{plexos_prop}']
                       .attrs['units'].decode('UTF-8'))
@@ -770,21 +1175,37 @@ class MarmotFormat(SetupLogger):
         # Instantiate instance of Process Class
         # metadata is used as a parameter to initialize process_cl
         process_cl = Process(df, metadata, db.h5file.filename, self.Region_Mapping, 
-                                self.emit_names, self.logger)
-        # Instantiate Method of Process Class
-        process_att = getattr(process_cl, f'df_process_{plexos_class}')
-        # Process attribute and return to df
-        df = process_att()
+                                self.emit_names, self.logger, self.mapping_cache)
+        # Process class specific data and return to df
+        df = process_cl.process(plexos_class)
+
+        if (self.window is not None and timescale != 'year' 
+                and not isinstance(db, H5PlexosReader)):
+            df = df[self._in_window(df.index.get_level_values('timestamp'))]
         
         # Convert units and add unit column to index 
         df = df*converted_units[1]
         units_index = pd.Index([converted_units[0]] *len(df), name='units')
         df.set_index(units_index, append=True, inplace=True)
+        self._record(key_path, partition, read_time=read_time, 
+                     process_time=time.perf_counter() - process_start,
+                     peak_memory_mb=None if checkpoint is None else memory_since(checkpoint))
 
         if plexos_class == 'region' and plexos_prop == "Unserved Energy" and int(df.sum(axis=0)) > 0:
             self.logger.warning(f"Scenario contains Unserved Energy: {int(df.sum(axis=0))} MW\n")
         return df
 
+    def _record(self, key: str, partition: str = 'all', **values) -> None:
+        """Adds values to the performance report of the run, if it is reported.
+
+        Args:
+            key (str): formatted property identifier, e.g generator_Generation
+            partition (str, optional): Partition file name. Defaults to 'all'.
+            **values: Values to add, e.g read_time=1.2, rows=100
+        """
+        if self.report is not None:
+            self.report.record(key, partition, **values)
+
     def _report_prop_error(self, plexos_prop: str, 
                            plexos_class: str) -> pd.DataFrame:
         """Outputs a warning message when the _get_data method
@@ -802,24 +1223,789 @@ class MarmotFormat(SetupLogger):
         df = pd.DataFrame()
         return df
 
+    def _process_property(self, row: pd.Series, files_list: list,
+                          hdf5_collection: SolutionPool, meta: MetaData) -> pd.DataFrame:
+        """Processes a single PLEXOS property from all partitions of a scenario.
+
+        Data from each partition is combined into a single timeseries,
+        with any overlapping periods removed. Partitions are read in the 
+        order given by SolutionPool.visit_order, starting with any partition 
+        still open from the previous property, and combined in alpha numeric 
+        order. Only partitions before the first partition without data are reported.
+
+        Args:
+            row (pd.Series): Row of the Plexos_Properties DataFrame.
+            files_list (list): List of all h5 files in hdf5 folder in alpha numeric order.
+            hdf5_collection (SolutionPool): Pool of open PLEXOSSolution or 
+                H5PlexosReader instances, keyed by h5 file name.
+            meta (MetaData): MetaData instance.
+
+        Returns:
+            pd.DataFrame: Processed output, empty if property could not be found.
+        """
+        Processed_Data_Out = pd.DataFrame()
+        key_path = row["group"] + "_" + row["data_set"].replace(' ', '_')
+        data_chunks = []
+        previous_end = None
+
+        def read_partition(model):
+            self.logger.info(f"      {model}")
+            return self._get_data(row["group"], row["data_set"], row["data_type"], 
+                                  hdf5_collection.get(model), meta)
+
+        self.logger.info(f'Processing {row["group"]} {row["data_set"]}')
+        partitions = self._property_partitions(row, self._window_partitions(row["data_type"], 
+                                                                            files_list))
+        partition_data = {}
+        for model in hdf5_collection.visit_order(partitions):
+            partition_data[model] = read_partition(model)
+            if partition_data[model].empty is True:
+                break
+
+        for model in partitions:
+            if model in partition_data:
+                processed_data = partition_data.pop(model)
+            else:
+                # Read in reverse and stopped at a partition without data
+                processed_data = read_partition(model)
+
+            if processed_data.empty is True:
+                break
+
+            # Remove periods already reported by the previous partition
+            dedup_start = time.perf_counter()
+            if row["data_type"] != "year":
+                processed_data = Process.drop_partition_duplicates(processed_data, model,
+                                                                   self.logger)
+                partition_end = Process.partition_time_range(processed_data)[1]
+                if previous_end is not None:
+                    processed_data = Process.trim_partition_overlap(processed_data, previous_end,
+                                                                    model, self.logger)
+                previous_end = max(partition_end, previous_end or partition_end)
+            self._record(key_path, model, dedup_time=time.perf_counter() - dedup_start,
+                         rows=len(processed_data))
+
+            data_chunks.append(processed_data)
+        del partition_data
+
+        if data_chunks and len(self._property_partitions(row, files_list)) < len(files_list):
+            self.logger.info(f"{row['data_set']} Year property reported from only the first partition")
+
+        if data_chunks:
+            Processed_Data_Out = pd.concat(data_chunks, copy=False)
+
+        if Processed_Data_Out.empty is False and row["data_type"] == "year":
+            self.logger.info("Please Note: Year properties can not be checked for duplicates.\n\
+            Overlaping data cannot be removed from 'Year' grouped data.\n\
+            This will effect Year data that differs between partitions such as cost results.\n\
+            It will not effect Year data that is equal in all partitions such as Installed Capacity or Line Limit results")
+
+        return Processed_Data_Out
+
+    def _stream_properties(self, rows: list, files_list: list,
+                           hdf5_collection: SolutionPool, meta: MetaData,
+                           backend, derived_graph: DerivedPropertyGraph) -> None:
+        """Processes PLEXOS properties, saving each partition as it is processed.
+
+        Each partition is trimmed to only the timestamps after the last timestamp
+        of the previous partition and appended to the property in the storage backend.
+        Properties which are inputs of the same derived property are processed together 
+        partition by partition, and the derived property is calculated and appended 
+        from each partition while it is in memory.
+        Peak memory is therefore bounded by the size of a single partition of each property.
+        With a memory budget, partitions which do not fit are further split into object 
+        chunks, which are appended in object order so the saved property is unchanged.
+        Aggregated derived properties, e.g rollups, are summed over the object chunks 
+        of a partition and appended once, their last period is held back and summed 
+        with the next partition, as it may continue into it.
+        Data is appended to a partial copy of each property which is renamed once all 
+        partitions have been saved, so an interrupted run never leaves a partial 
+        property behind.
+
+        Args:
+            rows (list): Rows of the Plexos_Properties DataFrame to process together.
+            files_list (list): List of all h5 files in hdf5 folder in alpha numeric order.
+            hdf5_collection (SolutionPool): Pool of open PLEXOSSolution or 
+                H5PlexosReader instances, keyed by h5 file name.
+            meta (MetaData): MetaData instance.
+            backend (PropertyWriter): Writer to save to, appends are recorded 
+                in the performance report by partition.
+            derived_graph (DerivedPropertyGraph): Derived properties to calculate.
+        """
+        keys = [row["group"] + "_" + row["data_set"].replace(' ', '_') for row in rows]
+        derived_keys = derived_graph.streamable(keys)
+        for key_path in keys + derived_keys:
+            backend.remove(key_path)
+
+        for row in rows:
+            self.logger.info(f'Processing {row["group"]} {row["data_set"]}')
+        previous_end = dict.fromkeys(keys)
+        rows_saved = dict.fromkeys(keys + derived_keys, 0)
+        complete = set()
+        incomplete_derived = set()
+        # Last period of each aggregated derived property, summed with the next partition
+        carried = {}
+        for model in files_list:
+            self.logger.info(f"      {model}")
+
+            db = hdf5_collection.get(model)
+            n_chunks = self._object_chunk_count(rows, db, backend)
+            if n_chunks > 1:
+                self.logger.info(f"      Processing in {n_chunks} object chunks")
+            partition_end = {}
+            partition_keys = set()
+            # Aggregated derived data of each object chunk, summed once the partition is processed
+            aggregated_chunks = {}
+            for chunk in range(n_chunks):
+                object_chunk = (chunk, n_chunks) if n_chunks > 1 else None
+                partition_chunks = {}
+                for row, key_path in zip(rows, keys):
+                    if key_path in complete or not self._window_partitions(row["data_type"], [model]):
+                        continue
+                    processed_data = self._get_data(row["group"], row["data_set"], row["data_type"], 
+                                                    db, meta, object_chunk)
+
+                    if processed_data.empty is True:
+                        complete.add(key_path)
+                        continue
+
+                    # Remove periods already reported by the previous partition
+                    dedup_start = time.perf_counter()
+                    if row["data_type"] != "year":
+                        processed_data = Process.drop_partition_duplicates(processed_data, model,
+                                                                           self.logger)
+                        chunk_end = Process.partition_time_range(processed_data)[1]
+                        partition_end[key_path] = max(chunk_end, partition_end.get(key_path, chunk_end))
+                        if previous_end[key_path] is not None:
+                            processed_data = Process.trim_partition_overlap(processed_data, 
+                                                                            previous_end[key_path],
+                                                                            model, self.logger)
+                    self._record(key_path, model, dedup_time=time.perf_counter() - dedup_start,
+                                 rows=len(processed_data))
+
+                    backend.append(processed_data, key_path, partition=model)
+                    rows_saved[key_path] += len(processed_data)
+                    partition_chunks[key_path] = processed_data
+                    partition_keys.add(key_path)
+
+                derived_chunks = derived_graph.calculate_chunk(partition_chunks)
+                for derived_key in derived_keys:
+                    if derived_key in derived_chunks and derived_key not in incomplete_derived:
+                        if derived_graph.registry[derived_key]['aggregated']:
+                            aggregated_chunks.setdefault(derived_key, []).append(derived_chunks[derived_key])
+                            continue
+                        backend.append(derived_chunks[derived_key], derived_key, partition=model)
+                        self._record(derived_key, model, rows=len(derived_chunks[derived_key]))
+                        rows_saved[derived_key] += len(derived_chunks[derived_key])
+                    elif base_inputs(derived_key, derived_graph.registry).intersection(partition_chunks):
+                        # Inputs are not all available for this partition
+                        incomplete_derived.add(derived_key)
+                del partition_chunks, derived_chunks
+
+            for derived_key, derived_data in aggregated_chunks.items():
+                if derived_key in incomplete_derived:
+                    continue
+                if derived_key in carried:
+                    derived_data.insert(0, carried.pop(derived_key))
+                if len(derived_data) > 1:
+                    derived_data = pd.concat(derived_data)
+                    derived_data = derived_data.groupby(level=list(derived_data.index.names), sort=True).sum()
+                else:
+                    derived_data = derived_data[0]
+                # The last period may continue in the next partition, e.g the current
+                # month of a monthly rollup, so it is carried over and summed with it
+                timestamps = derived_data.index.get_level_values('timestamp')
+                last_period = timestamps == timestamps.max()
+                carried[derived_key] = derived_data[last_period]
+                derived_data = derived_data[~last_period]
+                if not derived_data.empty:
+                    backend.append(derived_data, derived_key, partition=model)
+                    self._record(derived_key, model, rows=len(derived_data))
+                    rows_saved[derived_key] += len(derived_data)
+            del aggregated_chunks
+
+            for row, key_path in zip(rows, keys):
+                if key_path in partition_end:
+                    previous_end[key_path] = max(partition_end[key_path], 
+                                                 previous_end[key_path] or partition_end[key_path])
+                # Check if data is for year interval and of type capacity
+                if key_path in partition_keys and key_path not in complete and (row["data_type"] == "year") & (
+                        (row["data_set"] == "Installed Capacity")
+                        | (row["data_set"] == "Export Limit")
+                        | (row["data_set"] == "Import Limit")
+                        ):
+                    self.logger.info(f"{row['data_set']} Year property reported from only the first partition")
+                    complete.add(key_path)
+
+        for derived_key, derived_data in carried.items():
+            if derived_key not in incomplete_derived and not derived_data.empty:
+                backend.append(derived_data, derived_key, partition=model)
+                self._record(derived_key, model, rows=len(derived_data))
+                rows_saved[derived_key] += len(derived_data)
+
+        for key_path in keys + derived_keys:
+            if key_path in incomplete_derived:
+                backend.remove(key_path)
+            elif rows_saved[key_path] > 0:
+                backend.finalize(key_path)
+                self.logger.info(f"{key_path} saved successfully, {rows_saved[key_path]} rows\n")
+                if key_path in derived_keys:
+                    derived_graph.streamed(key_path)
+
+    def _derived_registry(self, process_properties: pd.DataFrame) -> dict:
+        """Gets the derived properties of the run, along with the spatial and 
+        temporal rollups of the properties of the scenario.
+
+        Rollups are only registered in the registry of the run, so the rollups
+        of a scenario are never calculated for another scenario formatted in 
+        the same process. Spatial rollups are registered for generator properties 
+        which are formatted, or derived from formatted properties, by region, zone 
+        and each Region_Mapping aggregation. Temporal rollups are registered for 
+        the interval properties, derived properties and spatial rollups at each 
+        temporal_rollups resolution.
+
+        Args:
+            process_properties (pd.DataFrame): Rows of the Plexos_Properties 
+                DataFrame to format.
+
+        Returns:
+            dict: Derived property registry, DERIVED_PROPERTIES along with 
+            any rollups.
+        """
+        registry = dict(DERIVED_PROPERTIES)
+        data_types = dict(zip(process_properties["group"] + "_" 
+                              + process_properties["data_set"].str.replace(' ', '_'),
+                              process_properties["data_type"]))
+        keys = sorted(data_types) + [key for key in registry 
+                                     if key not in data_types 
+                                     and base_inputs(key, registry).issubset(data_types)]
+        rollup_keys = []
+        if self.spatial_rollups:
+            levels = ['region', 'zone'] + [column for column in self.Region_Mapping.columns
+                                           if column != 'region']
+            rollup_keys += register_spatial_rollups(keys, levels, registry)
+        if self.temporal_rollups:
+            interval_keys = [key for key in keys + rollup_keys 
+                             if all(data_types[input_key] == 'interval' 
+                                    for input_key in base_inputs(key, registry))]
+            register_temporal_rollups(interval_keys, self.temporal_rollups, registry)
+        return registry
+
+    def _object_chunk_count(self, rows: list, db, backend) -> int:
+        """Gets the number of object chunks a partition of properties is processed in.
+
+        The partitions of properties processed together are held in memory at the 
+        same time, so the chunks are sized to fit all of them within the memory budget.
+        With a time window, only the periods in the window are counted as only 
+        those are read. Objects are split into the same number of chunks for every property, so the 
+        chunks of properties of the same class cover the same objects.
+
+        Args:
+            rows (list): Rows of the Plexos_Properties DataFrame processed together.
+            db (PLEXOSSolution, H5PlexosReader): Open h5plexos partition.
+            backend (PropertyWriter, HDF5Backend, ParquetBackend): Writer or 
+                storage backend the chunks are saved to.
+
+        Returns:
+            int: Number of chunks, 1 if there is no memory budget or the 
+            partition is not read by a H5PlexosReader.
+        """
+        if self.memory_budget is None or not isinstance(db, H5PlexosReader):
+            return 1
+        shapes = []
+        for row in rows:
+            shape = db.dataset_shape(row["group"], row["data_set"], row["data_type"])
+            if shape is not None and self.window is not None:
+                timestamps = db.dataset_timestamps(row["group"], row["data_set"], row["data_type"])
+                shape = (shape[0], int(self._in_window(timestamps).sum())) + tuple(shape[2:])
+            shapes.append(shape)
+        shapes = [shape for shape in shapes if shape is not None and shape[0] > 0]
+        if not shapes:
+            return 1
+        required = (sum(np.prod(shape) for shape in shapes) 
+                    * PROCESS_BYTES_PER_VALUE.get(backend.name, max(PROCESS_BYTES_PER_VALUE.values())))
+        n_chunks = int(np.ceil(required / (self.memory_budget * 1e6)))
+        return max(1, min(n_chunks, min(shape[0] for shape in shapes)))
+
+    def _window_entry(self) -> list:
+        """Gets the time window as recorded in the partition manifest.
+
+        Returns:
+            list: [start, end] iso formatted strings, None for an open end, 
+            or None if there is no time window.
+        """
+        if self.window is None:
+            return None
+        return [None if time is None else time.isoformat() for time in self.window]
+
+    def _in_window(self, timestamps: pd.DatetimeIndex) -> np.ndarray:
+        """Checks which timestamps are in the time window.
+
+        Args:
+            timestamps (pd.DatetimeIndex): Timestamps.
+
+        Returns:
+            np.ndarray: Boolean mask, True for timestamps in the window.
+        """
+        in_window = np.ones(len(timestamps), dtype=bool)
+        start, end = self.window
+        if start is not None:
+            in_window &= timestamps >= start
+        if end is not None:
+            in_window &= timestamps <= end
+        return in_window
+
+    def _window_partitions(self, timescale: str, partitions: list) -> list:
+        """Gets the partitions with periods of a timescale in the time window.
+
+        Args:
+            timescale (str): Data timescale, e.g interval.
+            partitions (list): Partition file names.
+
+        Returns:
+            list: Partition file names, all partitions if there is no time window.
+        """
+        if self.window_timescales is None:
+            return list(partitions)
+        return [model for model in partitions 
+                if timescale in self.window_timescales.get(model, ())]
+
     @staticmethod
-    def _save_to_h5(df: pd.DataFrame, file_name: str, key: str, 
-                    mode: str = "a", complevel: int = 9, 
-                    complib: str ='blosc:zlib', **kwargs) -> None:
-        """Saves data to formatted hdf5 file
+    def _property_partitions(row: pd.Series, files_list: list) -> list:
+        """Gets the partitions a property is created from.
 
         Args:
-            df (pd.DataFrame): Dataframe to save 
-            file_name (str): name of hdf5 file
-            key (str): formatted property identifier, e.g generator_Generation
-            mode (str, optional): file access mode. Defaults to "a".
-            complevel (int, optional): compression level. Defaults to 9.
-            complib (str, optional): compression library. Defaults to 'blosc:zlib'.
+            row (pd.Series): Row of the Plexos_Properties DataFrame.
+            files_list (list): List of all h5 files in hdf5 folder in alpha numeric order.
+
+        Returns:
+            list: Partition file names.
+        """
+        if (row["data_type"] == "year") & (
+                (row["data_set"] == "Installed Capacity")
+                | (row["data_set"] == "Export Limit")
+                | (row["data_set"] == "Import Limit")
+                ):
+            return files_list[:1]
+        return list(files_list)
+
+    def _plan_incremental_update(self, process_properties: pd.DataFrame, existing_keys: list,
+                                 manifest: PartitionManifest, partition_changes: dict,
+                                 files_list: list) -> Tuple[dict, set]:
+        """Finds the existing properties affected by changed, added or removed partitions.
+
+        Timeseries properties are spliced if the time ranges reported by the
+        unchanged partitions are the same as when they were formatted, i.e the
+        re-run partitions cover the same horizon. All other affected properties,
+        year properties and properties without a manifest entry are fully recomputed.
+
+        Args:
+            process_properties (pd.DataFrame): Plexos_Properties to process.
+            existing_keys (list): Properties already in the formatted file.
+            manifest (PartitionManifest): Manifest of the formatted file.
+            partition_changes (dict): Partition changes, as returned by PartitionManifest.compare.
+            files_list (list): List of all h5 files in hdf5 folder in alpha numeric order.
+
+        Returns:
+            Tuple[dict, set]: Properties to splice, {key: partitions to update},
+            and properties to recompute.
+        """
+        updated = partition_changes['changed'] + partition_changes['added']
+        removed = partition_changes['removed']
+        if not updated and not removed:
+            return {}, set()
+        for change in ['changed', 'added', 'removed']:
+            if partition_changes[change]:
+                self.logger.info(f"Partitions {change} since last formatted: "
+                                 f"{partition_changes[change]}")
+
+        previous_files = sorted(manifest.partitions, key=lambda x:int(re.sub('\D', '', x)))
+        current = partition_changes['current']
+        splice_keys = {}
+        recompute_keys = set()
+        for _, row in process_properties.iterrows():
+            key_path = row["group"] + "_" + row["data_set"].replace(' ', '_')
+            if key_path not in existing_keys:
+                continue
+            entry = manifest.keys.get(key_path)
+            if entry is None:
+                recompute_keys.add(key_path)
+                continue
+            sources = self._property_partitions(row, files_list)
+            if (set(sources) == set(entry['partitions'])
+                    and not set(sources).intersection(partition_changes['changed'])):
+                continue
+            if row["data_type"] == "year" or removed:
+                recompute_keys.add(key_path)
+                continue
+
+            to_update = [model for model in sources if model in updated]
+            unchanged_ranges = all(
+                PartitionManifest.kept_range(manifest.partitions, model, row["data_type"], previous_files)
+                == PartitionManifest.kept_range(current, model, row["data_type"], files_list)
+                for model in sources if model not in to_update)
+            known_ranges = all(
+                PartitionManifest.kept_range(current, model, row["data_type"], files_list) is not None
+                for model in to_update)
+            if unchanged_ranges and known_ranges:
+                splice_keys[key_path] = to_update
+            else:
+                recompute_keys.add(key_path)
+        return splice_keys, recompute_keys
+
+    def _splice_property(self, row: pd.Series, partitions: list, files_list: list,
+                         manifest: PartitionManifest, current_partitions: dict,
+                         hdf5_collection: SolutionPool, meta: MetaData, backend) -> pd.DataFrame:
+        """Replaces the time ranges of changed partitions in an existing property.
+
+        Rows reported by the changed partitions when the property was formatted
+        are removed, the partitions are processed again and trimmed to the time
+        range they report, and the rows are put back in partition order so the
+        result is the same as reformatting the whole scenario.
+
+        Args:
+            row (pd.Series): Row of the Plexos_Properties DataFrame.
+            partitions (list): Changed or added partitions to update.
+            files_list (list): List of all h5 files in hdf5 folder in alpha numeric order.
+            manifest (PartitionManifest): Manifest of the formatted file.
+            current_partitions (dict): Current partition entries, as returned
+                by PartitionManifest.compare.
+            hdf5_collection (SolutionPool): Pool of open PLEXOSSolution or 
+                H5PlexosReader instances, keyed by h5 file name.
+            meta (MetaData): MetaData instance.
+            backend (PropertyWriter, HDF5Backend, ParquetBackend): Writer or 
+                storage backend to save to.
+
+        Returns:
+            pd.DataFrame: Updated property, empty if a partition did not contain 
+            the property, in which case the property is left unchanged.
+        """
+        key_path = row["group"] + "_" + row["data_set"].replace(' ', '_')
+        timescale = row["data_type"]
+        self.logger.info(f'Updating {row["group"]} {row["data_set"]} from changed partitions')
+
+        existing = backend.read(key_path)
+        timestamps = existing.index.get_level_values('timestamp')
+        previous_files = sorted(manifest.partitions, key=lambda x:int(re.sub('\D', '', x)))
+        keep = np.ones(len(existing), dtype=bool)
+        for model in partitions:
+            if model not in manifest.partitions:
+                continue
+            start, end = PartitionManifest.kept_range(manifest.partitions, model,
+                                                      timescale, previous_files)
+            in_range = timestamps <= end
+            if start is not None:
+                in_range &= timestamps > start
+            keep &= ~in_range
+
+        partition_ends = pd.DatetimeIndex(
+            [PartitionManifest.kept_range(current_partitions, model, timescale, files_list)[1]
+             for model in files_list])
+        data_chunks = [existing[keep]]
+        partition_order = [partition_ends.searchsorted(timestamps[keep])]
+        del existing
+        for model in partitions:
+            self.logger.info(f"      {model}")
+            processed_data = self._get_data(row["group"], row["data_set"], timescale,
+                                            hdf5_collection.get(model), meta)
+            if processed_data.empty is True:
+                return processed_data
+            dedup_start = time.perf_counter()
+            processed_data = Process.drop_partition_duplicates(processed_data, model, self.logger)
+            start, end = PartitionManifest.kept_range(current_partitions, model,
+                                                      timescale, files_list)
+            if start is not None:
+                processed_data = Process.trim_partition_overlap(processed_data, start,
+                                                                model, self.logger)
+            processed_data = processed_data[processed_data.index.get_level_values('timestamp') <= end]
+            self._record(key_path, model, dedup_time=time.perf_counter() - dedup_start,
+                         rows=len(processed_data))
+            data_chunks.append(processed_data)
+            partition_order.append(np.full(len(processed_data), files_list.index(model)))
+
+        Processed_Data_Out = pd.concat(data_chunks, copy=False)
+        Processed_Data_Out = Processed_Data_Out.iloc[np.argsort(np.concatenate(partition_order),
+                                                                kind='stable')]
+        backend.save(Processed_Data_Out, key_path)
+        self.logger.info(f"{key_path} updated, {int((~keep).sum())} rows replaced "
+                         f"with {sum(len(chunk) for chunk in data_chunks[1:])} rows\n")
+        return Processed_Data_Out
+
+    @staticmethod
+    def _missing_partition_metadata(output_file: str, partitions: list) -> list:
+        """Gets the partitions without metadata in the formatted h5 file.
+
+        Args:
+            output_file (str): Path to formatted h5 file.
+            partitions (list): Partition file names.
+
+        Returns:
+            list: Partition file names.
+        """
+        with FileLock(output_file, shared=True), h5py.File(output_file, 'r') as f:
+            return [partition for partition in partitions 
+                    if f"metadata/{partition}" not in f]
+
+    @staticmethod
+    def _remove_partition_metadata(output_file: str, partitions: list) -> None:
+        """Removes the metadata of partitions from the formatted h5 file.
+
+        Args:
+            output_file (str): Path to formatted h5 file.
+            partitions (list): Partition file names.
+        """
+        with FileLock(output_file), h5py.File(output_file, 'a') as f:
+            for partition in partitions:
+                if f"metadata/{partition}" in f:
+                    del f[f"metadata/{partition}"]
+
+    def _iter_processed_properties(self, properties: list, files_list: list,
+                                   HDF5_folder_in: str, hdf5_collection: SolutionPool,
+                                   meta: MetaData) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """Yields processed properties in the order they are passed in.
+
+        If num_workers is greater than 1, properties are processed in parallel
+        by a pool of worker processes. Results are still yielded in order so
+        that the caller can write them to file exactly as a sequential run would.
+        Performance records of the workers are merged into the report of the run.
+        At most 2 x num_workers properties are queued or held in memory at once.
+
+        Args:
+            properties (list): List of Plexos_Properties rows to process.
+            files_list (list): List of all h5 files in hdf5 folder in alpha numeric order.
+            HDF5_folder_in (str): Location of original PLEXOS solutions h5 files.
+            hdf5_collection (SolutionPool): Pool of open PLEXOSSolution or 
+                H5PlexosReader instances, keyed by h5 file name.
+            meta (MetaData): MetaData instance.
+
+        Yields:
+            Iterator[Tuple[str, pd.DataFrame]]: Formatted property key and processed data.
+        """
+        if self.num_workers == 1 or len(properties) <= 1:
+            for row in properties:
+                key_path = row["group"] + "_" + row["data_set"].replace(' ', '_')
+                yield key_path, self._process_property(row, files_list, hdf5_collection, meta)
+            return
+
+        self.logger.info(f"Processing properties with {self.num_workers} worker processes")
+        # Workers are spawned rather than forked, a forked worker could inherit 
+        # HDF5 locks held by the PropertyWriter thread and deadlock
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.num_workers,
+                                                    mp_context=multiprocessing.get_context('spawn'),
+                                                    initializer=_init_property_worker,
+                                                    initargs=(self, files_list,
+                                                              HDF5_folder_in)) as executor:
+            pending = collections.deque()
+            properties = iter(properties)
+            for row in properties:
+                pending.append(executor.submit(_process_property_worker, row))
+                if len(pending) >= 2 * self.num_workers:
+                    break
+            while pending:
+                key_path, Processed_Data_Out, records = pending.popleft().result()
+                if self.report is not None:
+                    self.report.merge(records)
+                # Keep workers busy while the result is being saved
+                for row in properties:
+                    pending.append(executor.submit(_process_property_worker, row))
+                    break
+                yield key_path, Processed_Data_Out
+                del Processed_Data_Out
+
+    def _save_performance_report(self, output_file: str, n_partitions: int) -> None:
+        """Saves the performance report of the run and passes it to the callback.
+
+        Args:
+            output_file (str): Path to formatted h5 file.
+            n_partitions (int): Number of partitions formatted.
+        """
+        if not self.report.records:
+            self.report = None
+            return
+        settings = dict(scenario=self.Scenario_name, partitions=n_partitions,
+                        num_workers=self.num_workers, streaming=self.streaming,
+                        storage_backend=self.storage_backend, 
+                        storage_layout=self.storage_layout,
+                        storage_profile=self.storage_profile,
+                        native_reader=self.native_reader, 
+                        memory_budget=self.memory_budget,
+                        window=self._window_entry())
+        if self.performance_report:
+            report = self.report.save(output_file, **settings)
+            self.logger.info(f"Performance report saved to {report_path(output_file, 'json')}")
+        else:
+            report = self.report.summary(**settings)
+        slowest = sorted(report['properties'], key=lambda x: x['total_time'], reverse=True)[:3]
+        self.logger.info("Slowest properties: " + ", ".join(f"{p['property']} {p['total_time']:.1f}s" 
+                                                            for p in slowest))
+        if self.performance_callback is not None:
+            self.performance_callback(report)
+        self.report = None
+
+    def _scenario_partitions(self, HDF5_folder_in: str) -> list:
+        """Gets the h5plexos partitions of the scenario to format.
+
+        Only the given partitions are included, if any. With a time window, 
+        partitions entirely outside the window are skipped and the timescales 
+        of each partition in the window are stored in window_timescales.
+
+        Args:
+            HDF5_folder_in (str): Location of original PLEXOS solutions h5 files.
+
+        Returns:
+            list: h5 file names in alpha numeric order.
+        """
+        files = []
+        for names in os.listdir(HDF5_folder_in):
+            if names.endswith(".h5") and (self.partitions is None or names in self.partitions):
+                files.append(names)  # Creates a list of only the hdf5 files
+        files_list = sorted(files, key=lambda x:int(re.sub('\D', '', x)))
+
+        if self.window is not None:
+            # Skip partitions entirely outside the time window
+            self.window_timescales = {model: timescales_in_window(os.path.join(HDF5_folder_in, model),
+                                                                  *self.window)
+                                      for model in files_list}
+            window_files = [model for model in files_list if self.window_timescales[model]]
+            self.logger.info(f"Formatting the time window {self.window[0]} to {self.window[1]}, "
+                             f"{len(window_files)} of {len(files_list)} partitions are in the window")
+            if not window_files:
+                self.logger.warning("No partitions are in the time window, nothing to format\n")
+            files_list = window_files
+        return files_list
+
+    def work_units(self) -> list:
+        """Gets the work units of the scenario for a distributed work queue.
+
+        There is one unit per property with collect_data True and partition it 
+        is created from. Properties already in the formatted file are skipped if 
+        skip_existing_properties is True.
+
+        Returns:
+            list: Work units, dicts of the unit 'id', 'scenario', 'key', 'group', 
+            'data_set', 'data_type' and 'partition'.
         """
-        df.to_hdf(file_name, key=key, mode=mode,
-                    complevel=complevel,
-                    complib=complib,
-                    **kwargs)
+        HDF5_folder_in = os.path.join(self.PLEXOS_Solutions_folder, str(self.Scenario_name))
+        files_list = self._scenario_partitions(HDF5_folder_in)
+        output_file = os.path.join(self.Marmot_Solutions_folder, 'Processed_HDF5_folder',
+                                   f"{self.Scenario_name}_formatted.h5")
+        existing_keys = (formatted_keys(output_file) 
+                         if mconfig.parser('skip_existing_properties') else [])
+        process_properties = self.Plexos_Properties.loc[self.Plexos_Properties["collect_data"] == True]
+        units = []
+        for _, row in process_properties.iterrows():
+            key_path = row["group"] + "_" + row["data_set"].replace(' ', '_')
+            if key_path in existing_keys:
+                continue
+            for model in self._property_partitions(row, self._window_partitions(row["data_type"],
+                                                                                files_list)):
+                units.append(dict(id=unit_id(self.Scenario_name, key_path, model),
+                                  scenario=str(self.Scenario_name), key=key_path, 
+                                  group=row["group"], data_set=row["data_set"], 
+                                  data_type=row["data_type"], partition=model))
+        return units
+
+    def plan(self) -> pd.DataFrame:
+        """Estimates the cost of formatting each property, without processing any data.
+
+        For each property of the Plexos_Properties with collect_data True, the 
+        output rows are counted from the shape and period timestamps of its dataset 
+        in each h5plexos partition, with the same partitions, time window and 
+        partition overlap removal as run_formatter. Only h5plexos metadata and 
+        dataset attributes are read. The memory needed to process the property, 
+        its size on disk and the time to format it are estimated from the rows, 
+        using the rates measured by the last performance report of the scenario 
+        if it was run with the same storage settings, otherwise default rates. 
+        Properties estimated to need more memory than is available are flagged 
+        and logged. Derived properties, e.g Curtailment, are not included.
+
+        Returns:
+            pd.DataFrame: One row per formatted property key, with the number of 
+            partitions, output rows, estimated memory_mb, disk_mb and duration_s, 
+            the source of the rates, whether the property is in the h5plexos files, 
+            whether it already exists and would be skipped, and whether it is 
+            expected to exceed the available memory.
+        """
+        self.logger.info(f"#### Planning {self.Scenario_name} PLEXOS Results ####")
+        HDF5_folder_in = os.path.join(self.PLEXOS_Solutions_folder, str(self.Scenario_name))
+        output_file = os.path.join(self.Marmot_Solutions_folder, 'Processed_HDF5_folder',
+                                   f"{self.Scenario_name}_formatted.h5")
+        files_list = self._scenario_partitions(HDF5_folder_in)
+
+        existing_keys = []
+        if os.path.isfile(output_file) and mconfig.parser('skip_existing_properties'):
+            existing_keys = formatted_keys(output_file)
+        rates = measured_rates(report_path(output_file, 'json'), streaming=self.streaming,
+                               storage_backend=self.storage_backend,
+                               storage_profile=self.storage_profile)
+        appended = self.streaming
+        default_rates = ((HDF5_APPEND_SECONDS_PER_ROW if appended and self.storage_backend == 'hdf5'
+                          else DEFAULT_SECONDS_PER_ROW[self.storage_profile]),
+                         DEFAULT_BYTES_PER_ROW[(self.storage_backend, appended)])
+        bytes_per_value = PROCESS_BYTES_PER_VALUE[self.storage_backend]
+        available_mb = available_memory_mb()
+
+        process_properties = self.Plexos_Properties.loc[self.Plexos_Properties["collect_data"] == True]
+        plan = []
+        # Datasets are only inspected, so partitions are always opened with H5PlexosReader
+        with SolutionPool(H5PlexosReader, HDF5_folder_in, self.max_open_partitions, 
+                          self.logger) as hdf5_collection:
+            for _, row in process_properties.iterrows():
+                key_path = row["group"] + "_" + row["data_set"].replace(' ', '_')
+                timescale = row["data_type"]
+                partitions = []
+                for model in self._property_partitions(row, self._window_partitions(timescale, 
+                                                                                    files_list)):
+                    db = hdf5_collection.get(model)
+                    shape = db.dataset_shape(row["group"], row["data_set"], timescale)
+                    if shape is None:
+                        # Only partitions before the first without data are formatted
+                        break
+                    partitions.append((db.dataset_timestamps(row["group"], row["data_set"], timescale),
+                                       shape[0], shape[2]))
+                counts = count_rows(partitions, trim_overlap=timescale != 'year',
+                                    window=self.window if timescale != 'year' else None)
+
+                if self.streaming:
+                    memory = counts['partition_values'] * bytes_per_value
+                    if self.memory_budget is not None and self.native_reader:
+                        # Partitions are split into object chunks, down to a single object
+                        memory = max(min(memory, self.memory_budget * 1e6), 
+                                     counts['object_values'] * bytes_per_value)
+                else:
+                    memory = counts['rows'] * PROPERTY_BYTES_PER_ROW
+                seconds_per_row, bytes_per_row = rates.get(key_path, default_rates)
+                plan.append(dict(key=key_path, data_type=timescale, 
+                                 partitions=len(partitions), rows=counts['rows'],
+                                 memory_mb=round(memory / 1e6, 1),
+                                 disk_mb=round(counts['rows'] * bytes_per_row / 1e6, 1),
+                                 duration_s=round(counts['rows'] * seconds_per_row, 1),
+                                 rates='report' if key_path in rates else 'default',
+                                 found=len(partitions) > 0,
+                                 exists=key_path in existing_keys,
+                                 exceeds_memory=(available_mb is not None 
+                                                 and memory / 1e6 > available_mb)))
+
+        plan = pd.DataFrame(plan, columns=['key', 'data_type', 'partitions', 'rows', 'memory_mb', 
+                                           'disk_mb', 'duration_s', 'rates', 'found', 'exists', 
+                                           'exceeds_memory']).set_index('key')
+        self.logger.info(f"Formatting plan of {self.Scenario_name}, {len(files_list)} partitions:\n"
+                         f"{plan.to_string()}\n")
+        to_format = plan[plan['found'] & ~plan['exists']]
+        duration = to_format['duration_s'].sum()
+        if not self.streaming:
+            duration = duration / self.num_workers
+        self.logger.info(f"{len(to_format)} properties to format, {int(to_format['rows'].sum())} rows, "
+                         f"estimated {round(to_format['disk_mb'].sum(), 1)} MB on disk "
+                         f"and {round(duration / 60, 1)} minutes")
+        missing = plan.index[~plan['found']].tolist()
+        if missing:
+            self.logger.info(f"Not found in the h5plexos files, will be skipped: {missing}")
+        for key_path in plan.index[plan['exceeds_memory']]:
+            self.logger.warning(f"{key_path} is estimated to need {plan.loc[key_path, 'memory_mb']} MB, "
+                                f"more than the {round(available_mb)} MB of memory available. "
+                                "Consider enabling streaming or setting a memory_budget\n")
+        return plan
 
     def run_formatter(self) -> None:
         """Main method to call to begin processing h5plexos files
@@ -849,216 +2035,648 @@ class MarmotFormat(SetupLogger):
             # directory already exists
             pass
 
-        startdir = os.getcwd()
-        os.chdir(HDF5_folder_in)  # Due to a bug on eagle need to chdir before listdir
-
-        files = []
-        for names in os.listdir():
-            if names.endswith(".h5"):
-                files.append(names)  # Creates a list of only the hdf5 files
+        # Mappings are rebuilt each run, as partitions may have been re-run since the last run
+        self.mapping_cache.clear()
 
         # List of all hf files in hdf5 folder in alpha numeric order
-        files_list = sorted(files, key=lambda x:int(re.sub('\D', '', x)))
+        files_list = self._scenario_partitions(HDF5_folder_in)
+        if self.window is not None and not files_list:
+            return
 
-        os.chdir(startdir)
+        # HDF5 files are opened when first needed, at most max_open_partitions at once
+        hdf5_collection = SolutionPool(self._open_solution, HDF5_folder_in, 
+                                       self.max_open_partitions, self.logger)
 
-        # Read in all HDF5 files into dictionary
-        self.logger.info("Loading all HDF5 files to prepare for processing")
-        hdf5_collection = {}
-        for file in files_list:
-            hdf5_collection[file] = PLEXOSSolution(os.path.join(HDF5_folder_in, file))
+        # Partitions and the metadata file are closed even if formatting fails
+        try:
+            # ===================================================================================
+            # Process the Outputs
+            # ===================================================================================
 
-        # ===================================================================================
-        # Process the Outputs
-        # ===================================================================================
+            # Creates Initial HDF5 file for outputting formated data
+            output_file = os.path.join(hdf_out_folder, HDF5_output)
+            try:
+                backend = get_backend(self.storage_backend, output_file, 
+                                      profile=self.storage_profile, layout=self.storage_layout)
+            except ModuleNotFoundError as e:
+                self.logger.warning(f"{e}. Using the hdf5 storage backend\n")
+                backend = get_backend('hdf5', output_file, 
+                                      profile=self.storage_profile, layout=self.storage_layout)
+
+            if os.path.isfile(os.path.join(hdf_out_folder, HDF5_output)) is True:
+                self.logger.info(f"'{hdf_out_folder}\{HDF5_output}' already exists: New variables will be added\n")
+                # Skip properties that already exist in *formatted.h5 file or parquet folder.
+                existing_keys = formatted_keys(output_file)
+
+                # The processed HDF5 output file already exists.  If metadata is already in
+                # this file, leave as is.  Otherwise, append it to the file.
+                if 'metadata' not in existing_keys:
+                    self.logger.info('Adding metadata to processed HDF5 file.')
+                    self.output_metadata(files_list, hdf_out_folder, HDF5_output, HDF5_folder_in)
+                else:
+                    # e.g partitions outside the time window of a previous run
+                    missing_partitions = self._missing_partition_metadata(output_file, files_list)
+                    if missing_partitions:
+                        self.logger.info(f'Adding metadata of {missing_partitions} to processed HDF5 file.')
+                        self.output_metadata(missing_partitions, hdf_out_folder, HDF5_output, HDF5_folder_in)
 
-        # Creates Initial HDF5 file for outputting formated data
-        Processed_Data_Out = pd.DataFrame()
-        if os.path.isfile(os.path.join(hdf_out_folder, HDF5_output)) is True:
-            self.logger.info(f"'{hdf_out_folder}\{HDF5_output}' already exists: New variables will be added\n")
-            # Skip properties that already exist in *formatted.h5 file.
-            with h5py.File(os.path.join(hdf_out_folder, HDF5_output), 'r') as f:
-                existing_keys = [key for key in f.keys()]
-
-            # The processed HDF5 output file already exists.  If metadata is already in
-            # this file, leave as is.  Otherwise, append it to the file.
-            if 'metadata' not in existing_keys:
-                self.logger.info('Adding metadata to processed HDF5 file.')
-                self.output_metadata(files_list, hdf_out_folder, HDF5_output, HDF5_folder_in)
+                if not mconfig.parser('skip_existing_properties'):
+                    existing_keys = []
 
-            if not mconfig.parser('skip_existing_properties'):
+            # The processed HDF5 file does not exist.  Create the file and add metadata to it.
+            else:
                 existing_keys = []
-
-        # The processed HDF5 file does not exist.  Create the file and add metadata to it.
-        else:
-            existing_keys = []
             
-            # Create empty hdf5 file 
-            f = h5py.File(os.path.join(hdf_out_folder, HDF5_output), "w")
-            f.close()
+                # Create empty hdf5 file 
+                with FileLock(output_file), h5py.File(output_file, "w"):
+                    pass
 
-            self.output_metadata(files_list, hdf_out_folder, HDF5_output, HDF5_folder_in)
+                self.output_metadata(files_list, hdf_out_folder, HDF5_output, HDF5_folder_in)
 
-        process_properties = self.Plexos_Properties.loc[self.Plexos_Properties["collect_data"] == True]
+            process_properties = self.Plexos_Properties.loc[self.Plexos_Properties["collect_data"] == True]
         
-        # Create an instance of metadata, and pass that as a variable to get data.
-        meta = MetaData(HDF5_folder_in, read_from_formatted_h5=False, Region_Mapping=self.Region_Mapping)
+            # Create an instance of metadata, and pass that as a variable to get data.
+            meta = MetaData(HDF5_folder_in, read_from_formatted_h5=False, Region_Mapping=self.Region_Mapping)
                     
-        if not self.Region_Mapping.empty:
-            # if any(meta.regions()['region'] not in Region_Mapping['region']):
-            if set(meta.regions(files_list[0])['region']).issubset(self.Region_Mapping['region']) is False:
-                missing_regions = list(set(meta.regions(files_list[0])['region']) - set(self.Region_Mapping['region']))
+            if not self.Region_Mapping.empty:
+                # if any(meta.regions()['region'] not in Region_Mapping['region']):
+                if set(meta.regions(files_list[0])['region']).issubset(self.Region_Mapping['region']) is False:
+                    missing_regions = list(set(meta.regions(files_list[0])['region']) - set(self.Region_Mapping['region']))
+
+                    self.logger.warning(f'The Following PLEXOS REGIONS are missing from the "region" column of your mapping file: {missing_regions}\n',)
+
+            # Find properties affected by partitions changed since they were formatted
+            manifest = PartitionManifest(output_file)
+            window = self._window_entry()
+            property_keys = set(process_properties["group"] + "_" 
+                                + process_properties["data_set"].str.replace(' ', '_'))
+            window_keys = [key for key in existing_keys if key in property_keys 
+                           and manifest.keys.get(key, {}).get('window') != window]
+            if window_keys:
+                # Properties formatted for a different time window are reformatted
+                self.logger.info(f"Reformatting properties formatted for a different time window: {window_keys}")
+                existing_keys = [key for key in existing_keys if key not in window_keys]
+            # Partitions are only compared and recorded for incremental updates of the full horizon
+            partition_changes = (manifest.compare(HDF5_folder_in, files_list) 
+                                 if self.incremental and window is None else None)
+            splice_keys = {}
+            if self.incremental and existing_keys and manifest.exists and window is None:
+                splice_keys, recompute_keys = self._plan_incremental_update(process_properties, existing_keys,
+                                                                            manifest, partition_changes,
+                                                                            files_list)
+                existing_keys = [key for key in existing_keys if key not in recompute_keys]
+                updated_partitions = partition_changes['changed'] + partition_changes['added']
+                if updated_partitions or partition_changes['removed']:
+                    self.logger.info('Updating metadata of changed partitions.')
+                    self._remove_partition_metadata(output_file, partition_changes['changed']
+                                                    + partition_changes['removed'])
+                    # Metadata of added partitions may already have been added above
+                    self.output_metadata(self._missing_partition_metadata(output_file, updated_partitions),
+                                         hdf_out_folder, HDF5_output, HDF5_folder_in)
+
+            properties_to_process = []
+            properties_to_splice = []
+            for index, row in process_properties.iterrows():
+                prop_underscore = row["data_set"].replace(' ', '_')
+                key_path = row["group"] + "_" + prop_underscore
+                if key_path in splice_keys:
+                    properties_to_splice.append(row)
+                elif key_path not in existing_keys:
+                    properties_to_process.append(row)
+                else:
+                    self.logger.info(f"{key_path} already exists in output .h5 file.")
+                    self.logger.info("PROPERTY ALREADY PROCESSED\n")
+
+            start = time.time()
+            if self.performance_report or self.performance_callback is not None:
+                self.report = PerformanceReport()
+            # All writes to the formatted file are made by a single writer thread, 
+            # processing continues while properties are being written
+            with PropertyWriter(backend, self.logger, report=self.report) as writer:
+                # Derived properties are calculated from updated properties while they are in memory
+                # Existing derived properties are recalculated if any of their inputs are updated
+                updated_properties = properties_to_process + properties_to_splice
+                updated_keys = {row["group"] + "_" + row["data_set"].replace(' ', '_') 
+                                for row in updated_properties}
+                registry = self._derived_registry(process_properties)
+                derived_graph = DerivedPropertyGraph([key for key in registry
+                                                      if key not in existing_keys 
+                                                      or base_inputs(key, registry).intersection(updated_keys)],
+                                                     writer, self.logger, registry=registry, VoLL=self.VoLL)
+
+                for row in properties_to_splice:
+                    key_path = row["group"] + "_" + row["data_set"].replace(' ', '_')
+                    Processed_Data_Out = self._splice_property(row, splice_keys[key_path], files_list, manifest,
+                                                               partition_changes['current'], hdf5_collection, 
+                                                               meta, writer)
+                    if Processed_Data_Out.empty is True:
+                        self.logger.warning(f"{key_path} could not be updated from the changed partitions, "
+                                            "recomputing from all partitions")
+                        properties_to_process.append(row)
+                    else:
+                        derived_graph.add(key_path, Processed_Data_Out)
+                    del Processed_Data_Out
+
+                if self.streaming:
+                    # Each partition is saved as soon as it is processed
+                    if self.num_workers > 1:
+                        self.logger.info("Streaming writes are enabled, properties will be processed sequentially")
+                    if self.storage_layout == 'wide' and writer.name == 'hdf5':
+                        self.logger.info("Streaming writes are enabled, properties will be saved in the long layout")
+                    rows = {row["group"] + "_" + row["data_set"].replace(' ', '_'): row 
+                            for row in properties_to_process}
+                    for group in derived_graph.stream_groups(list(rows)):
+                        self._stream_properties([rows[key] for key in group], files_list, 
+                                                hdf5_collection, meta, writer, derived_graph)
+                    properties_to_process = []
+
+                # Main loop to process each output and pass data to functions
+                # Data is processed sequentially or by worker processes, but is always
+                # saved by the main process in the order of the properties file
+                for key_path, Processed_Data_Out in self._iter_processed_properties(properties_to_process,
+                                                                                     files_list, HDF5_folder_in,
+                                                                                     hdf5_collection, meta):
+                    if Processed_Data_Out.empty is False:
+                        writer.save(Processed_Data_Out, key_path)
+                        derived_graph.add(key_path, Processed_Data_Out)
+                    # Clear Some Memory
+                    del Processed_Data_Out
+
+                # ===================================================================================
+                # Calculate Extra Outputs
+                # ===================================================================================
+                derived_graph.finish()
+
+            # Record the partitions each property was created from
+            output_keys = formatted_keys(output_file)
+            for row in updated_properties:
+                key_path = row["group"] + "_" + row["data_set"].replace(' ', '_')
+                if key_path in output_keys:
+                    manifest.record_key(key_path, row["data_type"],
+                                        self._property_partitions(row, self._window_partitions(row["data_type"],
+                                                                                               files_list)),
+                                        window)
+                else:
+                    manifest.remove_key(key_path)
+            # The manifest is only needed by incremental updates and to detect time window changes
+            if self.incremental or window is not None or os.path.isfile(manifest.path):
+                manifest.save(None if partition_changes is None else partition_changes['current'])
+        finally:
+            hdf5_collection.close()
+            MetaData.close_h5()
+        if hdf5_collection.opened:
+            self.logger.info(f"{len(files_list)} partitions were opened "
+                             f"{hdf5_collection.opened} times")
 
-                self.logger.warning(f'The Following PLEXOS REGIONS are missing from the "region" column of your mapping file: {missing_regions}\n',)
+        end = time.time()
+        elapsed = end - start
+        self.logger.info('Main loop took %s minutes', round(elapsed/60, 2))
+        if self.report is not None:
+            self._save_performance_report(output_file, len(files_list))
+        self.logger.info(f'Formatting COMPLETED for {self.Scenario_name}')
 
-        start = time.time()
-        # Main loop to process each output and pass data to functions
-        for index, row in process_properties.iterrows():
-            Processed_Data_Out = pd.DataFrame()
-            data_chunks = []
 
-            self.logger.info(f'Processing {row["group"]} {row["data_set"]}')
-            prop_underscore = row["data_set"].replace(' ', '_')
-            key_path = row["group"] + "_" + prop_underscore
-            if key_path not in existing_keys:
+# Per process state used by formatter worker processes
+_worker_state = {}
 
-                for model in files_list:
-                    self.logger.info(f"      {model}")
 
-                    db = hdf5_collection.get(model)
-                    processed_data = self._get_data(row["group"], row["data_set"], row["data_type"], db, meta)
+def _init_property_worker(formatter: MarmotFormat, files_list: list,
+                          HDF5_folder_in: str) -> None:
+    """Initializes a formatter worker process.
 
-                    if processed_data.empty is True:
-                        break
-                    
-                    # Check if data is for year interval and of type capacity
-                    if (row["data_type"] == "year") & (
-                            (row["data_set"] == "Installed Capacity")
-                            | (row["data_set"] == "Export Limit")
-                            | (row["data_set"] == "Import Limit")
-                            ):
-                        data_chunks.append(processed_data)
-                        self.logger.info(f"{row['data_set']} Year property reported from only the first partition")
-                        break
-                    else:
-                        data_chunks.append(processed_data)
+    PLEXOSSolution, H5PlexosReader and MetaData hold open h5 file handles which cannot be 
+    passed between processes, so each worker opens its own.
 
-                if data_chunks:
-                    Processed_Data_Out = pd.concat(data_chunks, copy=False)
+    Args:
+        formatter (MarmotFormat): MarmotFormat instance running the scenario.
+        files_list (list): List of all h5 files in hdf5 folder in alpha numeric order.
+        HDF5_folder_in (str): Location of original PLEXOS solutions h5 files.
+    """
+    if formatter.report is not None:
+        # Records are returned with each property and merged by the main process
+        formatter.report = PerformanceReport()
+    _worker_state['formatter'] = formatter
+    _worker_state['files_list'] = files_list
+    _worker_state['hdf5_collection'] = SolutionPool(formatter._open_solution, HDF5_folder_in,
+                                                    formatter.max_open_partitions, 
+                                                    formatter.logger)
+    _worker_state['meta'] = MetaData(HDF5_folder_in, read_from_formatted_h5=False,
+                                     Region_Mapping=formatter.Region_Mapping)
+
+
+def _process_property_worker(row: pd.Series) -> Tuple[str, pd.DataFrame, list]:
+    """Processes a single property in a formatter worker process.
+
+    Args:
+        row (pd.Series): Row of the Plexos_Properties DataFrame.
+
+    Returns:
+        Tuple[str, pd.DataFrame, list]: Formatted property key, processed data 
+        and performance records, empty if the run is not reported.
+    """
+    formatter = _worker_state['formatter']
+    key_path = row["group"] + "_" + row["data_set"].replace(' ', '_')
+    Processed_Data_Out = formatter._process_property(row, _worker_state['files_list'],
+                                                     _worker_state['hdf5_collection'],
+                                                     _worker_state['meta'])
+    records = [] if formatter.report is None else formatter.report.take()
+    return key_path, Processed_Data_Out, records
 
-                if Processed_Data_Out.empty is False:
-                    if (row["data_type"] == "year"):
-                        self.logger.info("Please Note: Year properties can not be checked for duplicates.\n\
-                        Overlaping data cannot be removed from 'Year' grouped data.\n\
-                        This will effect Year data that differs between partitions such as cost results.\n\
-                        It will not effect Year data that is equal in all partitions such as Installed Capacity or Line Limit results")
 
-                    else:
-                        oldsize = Processed_Data_Out.size
-                        Processed_Data_Out = Processed_Data_Out.loc[~Processed_Data_Out.index.duplicated(keep='first')]  # Remove duplicates; keep first entry
-                        if (oldsize - Processed_Data_Out.size) > 0:
-                            self.logger.info(f'Drop duplicates removed {oldsize-Processed_Data_Out.size} rows')
+def _format_scenario_worker(Scenario_name: str, args: tuple, kwargs: dict) -> str:
+    """Formats a single scenario in a scenario worker process.
 
-                    row["data_set"] = row["data_set"].replace(' ', '_')
-                    
-                    save_attempt=1
-                    while save_attempt<=3:
-                        try:
-                            self.logger.info("Saving data to h5 file...")
-                            MarmotFormat._save_to_h5(Processed_Data_Out,
-                                        os.path.join(hdf_out_folder, HDF5_output), 
-                                        key=f'{row["group"]}_{row["data_set"]}')
-
-                            self.logger.info("Data saved to h5 file successfully\n")
-                            save_attempt=4
-                        except:
-                            self.logger.warning("h5 File is probably in use, waiting to attempt to save again")
-                            time.sleep(60)
-                            save_attempt+=1
-                else:
-                    continue
-            else:
-                self.logger.info(f"{key_path} already exists in output .h5 file.")
-                self.logger.info("PROPERTY ALREADY PROCESSED\n")
-                continue
+    Each scenario logs to its own log files, suffixed with the scenario name.
 
-        # ===================================================================================
-        # Calculate Extra Outputs
-        # ===================================================================================
-        if "generator_Curtailment" not in h5py.File(os.path.join(hdf_out_folder, HDF5_output), 'r') or not mconfig.parser('skip_existing_properties'):
+    Args:
+        Scenario_name (str): Name of scenario to process.
+        args (tuple): Positional arguments passed to MarmotFormat after Scenario_name.
+        kwargs (dict): Keyword arguments passed to MarmotFormat.
+
+    Returns:
+        str: Name of the processed scenario.
+    """
+    initiate = MarmotFormat(Scenario_name, *args, log_suffix=Scenario_name, **kwargs)
+    initiate.run_formatter()
+    return Scenario_name
+
+
+def format_scenarios(Scenario_List: list, PLEXOS_Solutions_folder: str,
+                     Plexos_Properties: Union[str, pd.DataFrame],
+                     scenario_workers: int = None, max_workers: int = None,
+                     **kwargs) -> None:
+    """Formats a list of scenarios, optionally running scenarios concurrently.
+
+    Each scenario reads its own h5plexos folder and writes its own formatted h5 file,
+    so scenarios can be run in separate worker processes. The total number of processes 
+    used, scenario workers multiplied by the property workers (num_workers) of each 
+    scenario, is capped at max_workers. Property workers are reduced first to 
+    stay within the cap.
+
+    Args:
+        Scenario_List (list): List of scenario names to process.
+        PLEXOS_Solutions_folder (str): Folder containing h5plexos results files.
+        Plexos_Properties (Union[str, pd.DataFrame]): PLEXOS properties to process, 
+            must follow format seen in Marmot directory.
+        scenario_workers (int, optional): Number of scenarios to process concurrently.
+            If 1, scenarios are processed one after another in the main process.
+            Defaults to None, in which case the value is taken from the 
+            formatter_settings scenario_workers config setting.
+        max_workers (int, optional): Maximum total number of worker processes.
+            Defaults to None, in which case the value is taken from the 
+            formatter_settings max_workers config setting, if this is also None 
+            the number of CPUs is used.
+        **kwargs: Additional keyword arguments passed to MarmotFormat.
+    """
+    if scenario_workers is None:
+        scenario_workers = mconfig.parser("formatter_settings", "scenario_workers")
+    if max_workers is None:
+        max_workers = mconfig.parser("formatter_settings", "max_workers")
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    num_workers = kwargs.pop('num_workers', None)
+    if num_workers is None:
+        num_workers = mconfig.parser("formatter_settings", "num_workers")
+
+    scenario_workers = max(1, min(int(scenario_workers), len(Scenario_List), int(max_workers)))
+    kwargs['num_workers'] = max(1, min(int(num_workers), int(max_workers) // scenario_workers))
+
+    if scenario_workers == 1:
+        for Scenario_name in Scenario_List:
+            initiate = MarmotFormat(Scenario_name, PLEXOS_Solutions_folder, Plexos_Properties,
+                                    **kwargs)
+            initiate.run_formatter()
+        return
+
+    logger = SetupLogger(log_suffix='scenarios').logger
+    logger.info(f"Formatting {len(Scenario_List)} scenarios with {scenario_workers} scenario workers, "
+                f"each using {kwargs['num_workers']} property workers")
+    args = (PLEXOS_Solutions_folder, Plexos_Properties)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=scenario_workers) as executor:
+        futures = {executor.submit(_format_scenario_worker, Scenario_name, args, kwargs): Scenario_name
+                   for Scenario_name in Scenario_List}
+        for future in concurrent.futures.as_completed(futures):
+            Scenario_name = futures[future]
             try:
-                self.logger.info("Processing generator Curtailment")
-                try:
-                    Avail_Gen_Out = pd.read_hdf(os.path.join(hdf_out_folder,
-                                                             HDF5_output),
-                                                'generator_Available_Capacity')
-                    Total_Gen_Out = pd.read_hdf(os.path.join(hdf_out_folder,
-                                                             HDF5_output),
-                                                'generator_Generation')
-                    if Total_Gen_Out.empty is True:
-                        self.logger.warning("generator_Available_Capacity & generator_Generation are required for Curtailment calculation")
-                except KeyError:
-                    self.logger.warning("generator_Available_Capacity & generator_Generation are required for Curtailment calculation")
-
-                Curtailment_Out = Avail_Gen_Out - Total_Gen_Out
-
-                Upward_Available_Capacity = Curtailment_Out
-
-                MarmotFormat._save_to_h5(Curtailment_Out,
-                                    os.path.join(hdf_out_folder, HDF5_output), 
-                                    key="generator_Curtailment")
-
-                MarmotFormat._save_to_h5(Upward_Available_Capacity,
-                                    os.path.join(hdf_out_folder, HDF5_output), 
-                                    key="generator_Upward_Available_Capacity")
-
-                self.logger.info("Data saved to h5 file successfully\n")
-                # Clear Some Memory
-                del Total_Gen_Out
-                del Avail_Gen_Out
-                del Curtailment_Out
+                future.result()
+                logger.info(f'Formatting COMPLETED for {Scenario_name}')
             except Exception:
-                self.logger.warning("NOTE!! Curtailment not calculated, processing skipped\n")
+                logger.exception(f'Formatting FAILED for {Scenario_name}, '
+                                 f'see the {Scenario_name} log files for details')
+
+
+def watch_scenarios(Scenario_List: list, PLEXOS_Solutions_folder: str,
+                    Plexos_Properties: Union[str, pd.DataFrame],
+                    poll_interval: float = None, settle_time: float = None,
+                    idle_timeout: float = None, **kwargs) -> None:
+    """Formats the h5plexos partitions of running scenarios as they are written.
+
+    The h5plexos folder of each scenario is polled every poll_interval seconds. 
+    Whenever partitions have finished being written, or have been re-written, since 
+    the scenario was last formatted, the finished partitions are formatted into the 
+    formatted file with the incremental update, so only the time ranges of the new 
+    partitions are added to the existing properties. Scenarios are formatted one 
+    after another in the main process. Watching stops once no partition has changed 
+    for idle_timeout seconds, or when interrupted with Ctrl+C.
+
+    Args:
+        Scenario_List (list): List of scenario names to watch.
+        PLEXOS_Solutions_folder (str): Folder containing h5plexos results files.
+        Plexos_Properties (Union[str, pd.DataFrame]): PLEXOS properties to process, 
+            must follow format seen in Marmot directory.
+        poll_interval (float, optional): Seconds between polls of the h5plexos folders.
+            Defaults to None, in which case the value is taken from the 
+            formatter_settings watch_poll_interval config setting.
+        settle_time (float, optional): Seconds a partition must be unchanged before 
+            it is formatted. Defaults to None, in which case the value is taken from 
+            the formatter_settings watch_settle_time config setting.
+        idle_timeout (float, optional): Seconds without a new or changed partition 
+            after which watching stops. Defaults to None, in which case the value is 
+            taken from the formatter_settings watch_idle_timeout config setting, 
+            if this is also None the scenarios are watched until interrupted.
+        **kwargs: Additional keyword arguments passed to MarmotFormat.
+    """
+    if poll_interval is None:
+        poll_interval = mconfig.parser("formatter_settings", "watch_poll_interval")
+    if settle_time is None:
+        settle_time = mconfig.parser("formatter_settings", "watch_settle_time")
+    if idle_timeout is None:
+        idle_timeout = mconfig.parser("formatter_settings", "watch_idle_timeout")
+    # Partitions added since the last update are spliced into the formatted properties
+    kwargs['incremental'] = True
+    window = {setting: kwargs.pop(setting, None) for setting in ['window_start', 'window_end']}
+
+    formatters = {Scenario_name: MarmotFormat(Scenario_name, PLEXOS_Solutions_folder, 
+                                              Plexos_Properties, partitions=[], **kwargs)
+                  for Scenario_name in Scenario_List}
+    logger = SetupLogger(log_suffix='watch').logger
+    if any(value is not None for value in window.values()):
+        logger.warning("A time window can not be used in watch mode, "
+                       "the whole horizon will be formatted\n")
+    watchers = {Scenario_name: PartitionWatcher(os.path.join(PLEXOS_Solutions_folder, str(Scenario_name)),
+                                                settle_time)
+                for Scenario_name in Scenario_List}
+    # (size, modification time) of each partition when a scenario was last formatted
+    formatted = {Scenario_name: None for Scenario_name in Scenario_List}
+    logger.info(f"Watching {Scenario_List} for finished partitions every {poll_interval} seconds")
+    last_change = time.time()
+    try:
+        while True:
+            for Scenario_name, watcher in watchers.items():
+                partitions = watcher.poll()
+                if not partitions or watcher.ready == formatted[Scenario_name]:
+                    continue
+                logger.info(f"{Scenario_name}: formatting {len(partitions)} finished partitions, "
+                            f"latest {partitions[-1]}")
+                formatter = formatters[Scenario_name]
+                formatter.partitions = set(partitions)
+                try:
+                    formatter.run_formatter()
+                except Exception:
+                    logger.exception(f'Formatting FAILED for {Scenario_name}, '
+                                     'it will be formatted again when its partitions change')
+                formatted[Scenario_name] = dict(watcher.ready)
+                last_change = time.time()
+            if idle_timeout is not None and time.time() - last_change >= idle_timeout:
+                logger.info(f"No partitions changed for {idle_timeout} seconds, watching stopped")
+                break
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        logger.info("Watching stopped")
+
+
+def publish_scenarios(Scenario_List: list, PLEXOS_Solutions_folder: str,
+                      Plexos_Properties: Union[str, pd.DataFrame], queue_folder: str,
+                      **kwargs) -> int:
+    """Publishes the work units of scenarios to a distributed work queue.
+
+    Each unit processes one property of one h5plexos partition of a scenario. 
+    The settings of each scenario are saved in the queue, so workers on other 
+    nodes only need access to the queue folder and the h5plexos files.
+
+    Args:
+        Scenario_List (list): List of scenario names to process.
+        PLEXOS_Solutions_folder (str): Folder containing h5plexos results files.
+        Plexos_Properties (Union[str, pd.DataFrame]): PLEXOS properties to process, 
+            must follow format seen in Marmot directory.
+        queue_folder (str): Queue folder on a file system shared by all nodes.
+        **kwargs: Additional keyword arguments passed to MarmotFormat.
+
+    Returns:
+        int: Number of units published.
+    """
+    queue = WorkQueue(queue_folder)
+    published = 0
+    for Scenario_name in Scenario_List:
+        formatter = MarmotFormat(Scenario_name, PLEXOS_Solutions_folder, Plexos_Properties, **kwargs)
+        units = formatter.work_units()
+        queue.save_job(Scenario_name, formatter)
+        n_units = queue.publish(units)
+        formatter.logger.info(f"Published {n_units} work units of {Scenario_name} to {queue_folder}")
+        published += n_units
+    return published
 
-        if "region_Cost_Unserved_Energy" not in h5py.File(os.path.join(hdf_out_folder, HDF5_output), 'r') or not mconfig.parser('skip_existing_properties'):
-            try:
-                self.logger.info("Calculating Cost Unserved Energy: Regions")
-                Cost_Unserved_Energy = pd.read_hdf(os.path.join(hdf_out_folder,
-                                                                HDF5_output),
-                                                   'region_Unserved_Energy')
-                                                   
-                Cost_Unserved_Energy = Cost_Unserved_Energy * self.VoLL
-
-                MarmotFormat._save_to_h5(Cost_Unserved_Energy,
-                                    os.path.join(hdf_out_folder, HDF5_output), 
-                                    key="region_Cost_Unserved_Energy")
-            except KeyError:
-                self.logger.warning("NOTE!! Regional Unserved Energy not available to process, processing skipped\n")
-                pass
-
-        if "zone_Cost_Unserved_Energy" not in h5py.File(os.path.join(hdf_out_folder, HDF5_output), 'r') or not mconfig.parser('skip_existing_properties'):
-            try:
-                self.logger.info("Calculating Cost Unserved Energy: Zones")
-                Cost_Unserved_Energy = pd.read_hdf(os.path.join(hdf_out_folder,
-                                                                HDF5_output),
-                                                   'zone_Unserved_Energy')
-                Cost_Unserved_Energy = Cost_Unserved_Energy * self.VoLL
-
-                MarmotFormat._save_to_h5(Cost_Unserved_Energy,
-                                    os.path.join(hdf_out_folder, HDF5_output), 
-                                    key="zone_Cost_Unserved_Energy")
-            except KeyError:
-                self.logger.warning("NOTE!! Zonal Unserved Energy not available to process, processing skipped\n")
-                pass
 
-        end = time.time()
-        elapsed = end - start
-        self.logger.info('Main loop took %s minutes', round(elapsed/60, 2))
-        self.logger.info(f'Formatting COMPLETED for {self.Scenario_name}')
+def _process_queue(queue: WorkQueue, logger: logging.Logger) -> int:
+    """Claims and processes work units until there are none left to claim.
+
+    Each unit is processed with the settings of its scenario and saved to a shard
+    in the queue. Errors are recorded in the queue and the next unit is claimed.
+
+    Args:
+        queue (WorkQueue): Distributed work queue.
+        logger (logging.Logger): logger object from SetupLogger.
+
+    Returns:
+        int: Number of units completed.
+    """
+    # (MarmotFormat, SolutionPool, MetaData) of each scenario
+    scenarios = {}
+    completed = 0
+    try:
+        while True:
+            claim = queue.claim()
+            if claim is None:
+                return completed
+            with claim:
+                unit = claim.unit
+                try:
+                    if unit['scenario'] not in scenarios:
+                        formatter = queue.load_job(unit['scenario'])
+                        HDF5_folder_in = os.path.join(formatter.PLEXOS_Solutions_folder, 
+                                                      str(formatter.Scenario_name))
+                        scenarios[unit['scenario']] = (
+                            formatter, 
+                            SolutionPool(formatter._open_solution, HDF5_folder_in, 
+                                         formatter.max_open_partitions, logger),
+                            MetaData(HDF5_folder_in, read_from_formatted_h5=False, 
+                                     Region_Mapping=formatter.Region_Mapping))
+                    formatter, hdf5_collection, meta = scenarios[unit['scenario']]
+                    logger.info(f"Processing {unit['scenario']} {unit['group']} {unit['data_set']} "
+                                f"{unit['partition']}")
+                    df = formatter._get_data(unit['group'], unit['data_set'], unit['data_type'],
+                                             hdf5_collection.get(unit['partition']), meta)
+                    shard = None
+                    if df.empty is False:
+                        shard = f"{unit['id']}.h5"
+                        write_shard(df, queue.path('shards', shard))
+                    claim.complete(dict(shard=shard, rows=len(df), worker=queue.worker_name()))
+                    completed += 1
+                except Exception:
+                    logger.exception(f"Processing FAILED for {unit['id']}")
+                    claim.fail(traceback.format_exc())
+    finally:
+        for _, hdf5_collection, _ in scenarios.values():
+            hdf5_collection.close()
+        MetaData.close_h5()
+
+
+def run_queue_worker(queue_folder: str, claim_timeout: float = None) -> int:
+    """Processes work units of a distributed work queue until there are none left.
+
+    Several workers can be run at once, on any node with access to the queue 
+    folder and the h5plexos files. Each worker logs to its own log files, 
+    suffixed with its host name and process id.
+
+    Args:
+        queue_folder (str): Queue folder on a file system shared by all nodes.
+        claim_timeout (float, optional): Seconds after which claims of workers which 
+            stopped are released. Defaults to None, in which case the value is taken 
+            from the formatter_settings queue_claim_timeout config setting.
+
+    Returns:
+        int: Number of units completed by the worker.
+    """
+    if claim_timeout is None:
+        claim_timeout = mconfig.parser("formatter_settings", "queue_claim_timeout")
+    queue = WorkQueue(queue_folder, claim_timeout)
+    logger = SetupLogger(log_suffix=f"worker_{queue.worker_name().replace(':', '_')}").logger
+    completed = _process_queue(queue, logger)
+    logger.info(f"No work units left to claim, {completed} units completed")
+    return completed
+
+
+def merge_queue(queue_folder: str, claim_timeout: float = None, cleanup: bool = True) -> None:
+    """Assembles the formatted files of all scenarios published to a distributed work queue.
+
+    Units which have not been claimed are first processed by the merge itself, 
+    then units claimed by other workers are waited for. Each scenario is then 
+    formatted as in format_scenarios, reading each processed partition from its 
+    shard, so derived properties, rollups, metadata and the partition manifest are 
+    created as usual. Partitions of failed units are read from the h5plexos files.
+
+    Args:
+        queue_folder (str): Queue folder on a file system shared by all nodes.
+        claim_timeout (float, optional): Seconds after which claims of workers which 
+            stopped are released. Defaults to None, in which case the value is taken 
+            from the formatter_settings queue_claim_timeout config setting.
+        cleanup (bool, optional): If True, the units, shards and settings of each 
+            merged scenario are removed from the queue. Defaults to True.
+    """
+    if claim_timeout is None:
+        claim_timeout = mconfig.parser("formatter_settings", "queue_claim_timeout")
+    queue = WorkQueue(queue_folder, claim_timeout)
+    logger = SetupLogger(log_suffix='merge').logger
+    _process_queue(queue, logger)
+    while True:
+        status = queue.status()
+        if status['claimed'] == 0 and status['pending'] == 0:
+            break
+        if status['claimed']:
+            logger.info(f"Waiting for {status['claimed']} work units claimed by other workers")
+            time.sleep(QUEUE_POLL_INTERVAL)
+        # Units of workers which stopped are released once their claims time out
+        _process_queue(queue, logger)
+
+    units = queue.units()
+    for job in queue.jobs():
+        formatter = queue.load_job(job)
+        scenario_units = [unit for unit in units if unit['scenario'] == str(formatter.Scenario_name)]
+        formatter.shards = {}
+        failed = []
+        for unit in scenario_units:
+            result = queue.result(unit['id'])
+            if result is None:
+                failed.append(unit['id'])
+                continue
+            formatter.shards[(unit['key'], unit['partition'])] = (
+                None if result['shard'] is None else queue.path('shards', result['shard']))
+        if failed:
+            logger.warning(f"{len(failed)} work units of {formatter.Scenario_name} failed, "
+                           f"their partitions will be read from the h5plexos files: {failed}\n")
+        # Shards hold whole partitions
+        formatter.memory_budget = None
+        formatter.run_formatter()
+        if cleanup:
+            queue.remove([unit['id'] for unit in scenario_units])
+            os.remove(queue.path('jobs', f"{job}.pkl"))
+
+
+def format_scenarios_distributed(Scenario_List: list, PLEXOS_Solutions_folder: str,
+                                 Plexos_Properties: Union[str, pd.DataFrame], queue_folder: str,
+                                 local_workers: int = None, **kwargs) -> None:
+    """Formats scenarios through a distributed work queue with local worker processes.
+
+    Publishes the work units of the scenarios, processes them with local_workers 
+    worker processes standing in for the nodes of a cluster, and merges the results.
+
+    Args:
+        Scenario_List (list): List of scenario names to process.
+        PLEXOS_Solutions_folder (str): Folder containing h5plexos results files.
+        Plexos_Properties (Union[str, pd.DataFrame]): PLEXOS properties to process, 
+            must follow format seen in Marmot directory.
+        queue_folder (str): Queue folder.
+        local_workers (int, optional): Number of worker processes. Defaults to None, 
+            in which case the value is taken from the formatter_settings num_workers 
+            config setting.
+        **kwargs: Additional keyword arguments passed to MarmotFormat.
+    """
+    if local_workers is None:
+        local_workers = mconfig.parser("formatter_settings", "num_workers")
+    publish_scenarios(Scenario_List, PLEXOS_Solutions_folder, Plexos_Properties, 
+                      queue_folder, **kwargs)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max(1, int(local_workers))) as executor:
+        futures = [executor.submit(run_queue_worker, queue_folder) 
+                   for _ in range(max(1, int(local_workers)))]
+        for future in concurrent.futures.as_completed(futures):
+            future.result()
+    merge_queue(queue_folder)
 
 
 def main():
     """Run the formatting code and format desired properties based on user input files."""
+    parser = argparse.ArgumentParser(description="Format h5plexos results for the Marmot plotter.")
+    parser.add_argument('--watch', action='store_true',
+                        help="Keep running and format the partitions of each scenario as they finish.")
+    parser.add_argument('--poll-interval', type=float,
+                        help="Seconds between polls in watch mode. Defaults to the config setting.")
+    parser.add_argument('--settle-time', type=float,
+                        help="Seconds a partition must be unchanged before it is formatted in "
+                             "watch mode. Defaults to the config setting.")
+    parser.add_argument('--idle-timeout', type=float,
+                        help="Seconds without new partitions after which watch mode stops. "
+                             "Defaults to the config setting.")
+    parser.add_argument('--distributed', choices=['publish', 'worker', 'merge', 'local'],
+                        help="Format through a work queue shared by several nodes. publish the work "
+                             "units of the scenarios, run a worker, merge the formatted files, "
+                             "or do all three with local worker processes.")
+    parser.add_argument('--queue-folder',
+                        help="Work queue folder on a file system shared by all nodes, "
+                             "required with --distributed.")
+    parser.add_argument('--local-workers', type=int,
+                        help="Number of worker processes with --distributed local. "
+                             "Defaults to the num_workers config setting.")
+    args = parser.parse_args()
+    if args.distributed is not None and args.queue_folder is None:
+        parser.error("--queue-folder is required with --distributed")
+
+    # Workers and the merge take all other inputs from the published scenarios
+    if args.distributed == 'worker':
+        run_queue_worker(args.queue_folder)
+        return
+    if args.distributed == 'merge':
+        merge_queue(args.queue_folder)
+        return
 
     # ===============================================================================
     # Input Properties
@@ -1105,19 +2723,59 @@ def main():
     emit_names = os.path.join(Mapping_folder, Marmot_user_defined_inputs.loc['emit_names.csv_name'].to_string(index=False).strip())
 
     # ===============================================================================
-    # Loop through scenarios in list
+    # Time window to format (optional), the whole horizon is formatted if left blank
     # ===============================================================================
 
-    for Scenario_name in Scenario_List:
+    window = {}
+    for setting in ['window_start', 'window_end']:
+        value = Marmot_user_defined_inputs['User_defined_value'].get(f'Formatter_{setting}')
+        window[setting] = None if pd.isna(value) else str(value).strip()
 
-        initiate = MarmotFormat(Scenario_name, PLEXOS_Solutions_folder, Plexos_Properties,
-                                Marmot_Solutions_folder=Marmot_Solutions_folder,
-                                mapping_folder=Mapping_folder,
-                                Region_Mapping=Region_Mapping,
-                                emit_names=emit_names,
-                                VoLL=VoLL)
+    # ===============================================================================
+    # Loop through scenarios in list
+    # ===============================================================================
 
-        initiate.run_formatter()
+    if args.distributed == 'publish':
+        publish_scenarios(Scenario_List, PLEXOS_Solutions_folder, Plexos_Properties, args.queue_folder,
+                          Marmot_Solutions_folder=Marmot_Solutions_folder,
+                          mapping_folder=Mapping_folder,
+                          Region_Mapping=Region_Mapping,
+                          emit_names=emit_names,
+                          VoLL=VoLL,
+                          **window)
+        return
+
+    if args.distributed == 'local':
+        format_scenarios_distributed(Scenario_List, PLEXOS_Solutions_folder, Plexos_Properties, 
+                                     args.queue_folder, local_workers=args.local_workers,
+                                     Marmot_Solutions_folder=Marmot_Solutions_folder,
+                                     mapping_folder=Mapping_folder,
+                                     Region_Mapping=Region_Mapping,
+                                     emit_names=emit_names,
+                                     VoLL=VoLL,
+                                     **window)
+        return
+
+    if args.watch:
+        watch_scenarios(Scenario_List, PLEXOS_Solutions_folder, Plexos_Properties,
+                        poll_interval=args.poll_interval,
+                        settle_time=args.settle_time,
+                        idle_timeout=args.idle_timeout,
+                        Marmot_Solutions_folder=Marmot_Solutions_folder,
+                        mapping_folder=Mapping_folder,
+                        Region_Mapping=Region_Mapping,
+                        emit_names=emit_names,
+                        VoLL=VoLL,
+                        **window)
+        return
+
+    format_scenarios(Scenario_List, PLEXOS_Solutions_folder, Plexos_Properties,
+                     Marmot_Solutions_folder=Marmot_Solutions_folder,
+                     mapping_folder=Mapping_folder,
+                     Region_Mapping=Region_Mapping,
+                     emit_names=emit_names,
+                     VoLL=VoLL,
+                     **window)
 
 
 if __name__ == '__main__':
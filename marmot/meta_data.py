@@ -9,14 +9,54 @@ Database can be either a h5plexos file or a formatted Marmot hdf5 file.
 import os
 import sys
 import h5py
+import functools
 import pandas as pd
 import numpy as np
 import logging
 
+
+def _decode_bytes(df: pd.DataFrame) -> pd.DataFrame:
+    """Decodes the bytes columns of a metadata table to str.
+
+    Each column is decoded with a single numpy array operation.
+
+    Args:
+        df (pd.DataFrame): Metadata table read from a h5 file.
+
+    Returns:
+        pd.DataFrame: Table with str columns.
+    """
+    for col in df.columns:
+        values = df[col].to_numpy()
+        if values.dtype.kind == 'S' or (values.dtype == object and len(values) 
+                                        and isinstance(values[0], bytes)):
+            df[col] = np.char.decode(values.astype(bytes), 'utf-8').astype(object)
+    return df
+
+
+def _memoize(method):
+    """Memoizes a MetaData accessor per file, partition and accessor.
+
+    A copy of the memoized table is returned, so callers can modify it.
+    The memo of an instance is cleared with MetaData.clear_cache.
+    """
+    @functools.wraps(method)
+    def wrapper(self, filename: str) -> pd.DataFrame:
+        key = (filename, self.partition_number, method.__name__)
+        if key not in self._cache:
+            self._cache[key] = method(self, filename)
+        return self._cache[key].copy()
+    return wrapper
+
+
 class MetaData():
     """Handle the retrieval of metadata from the formatted or
     original plexos solution h5 files.
 
+    The table returned by each accessor is memoized per file and partition,
+    so repeated lookups, e.g for each zone and scenario plotted, do not 
+    read the h5 file again. Call clear_cache if a file is rewritten.
+
     Attributes:
         filename (str) = The name of the h5 file to retreive data from.
         h5_data (h5py.File) = loaded h5 file in memory.
@@ -47,11 +87,29 @@ class MetaData():
         self.partition_number = partition_number
 
         self.start_index = None
+        # Path of the file start_index was read from
+        self._start_path = None
+        # Tables returned by each accessor, see _memoize
+        self._cache = {}
 
-    @classmethod
-    def _check_if_existing_filename(cls, filename: str) -> bool:
+    def _file_path(self, filename: str) -> str:
+        """Gets the path of the h5 file to retreive data from.
+
+        Args:
+            filename (str): The name of the h5 file, or scenario name if 
+                retreiving from the formatted h5 file.
+
+        Returns:
+            str: Path to h5 file.
+        """
+        if self.read_from_formatted_h5:
+            filename = f"{filename}_formatted.h5"
+        return os.path.join(self.HDF5_folder_in, filename)
+
+    def _check_if_existing_filename(self, filename: str) -> bool:
         """Check if the passed filename is the same or different from previous calls.
 
+        The open file is shared by all instances, so it is compared by its full path. 
         If file is different replaces the filename with new value 
         and closes old file
 
@@ -61,12 +119,13 @@ class MetaData():
         Returns:
             bool: False if new file, True if existing 
         """
-        if cls.filename != filename:
-            cls.filename = filename
-            cls.close_h5()
-            return False
-        elif cls.filename == filename:
+        path = self._file_path(filename)
+        cls = type(self)
+        if cls.filename == path and cls.h5_data is not None and self._start_path == path:
             return True
+        cls.close_h5()
+        cls.filename = path
+        return False
 
     @classmethod
     def close_h5(cls) -> None:
@@ -74,7 +133,21 @@ class MetaData():
         """
         if cls.h5_data:
             cls.h5_data.close()
+        cls.h5_data = None
     
+    def clear_cache(self, filename: str = None) -> None:
+        """Clears the memoized metadata tables, e.g after a h5 file was rewritten.
+
+        Args:
+            filename (str, optional): The name of the h5 file to clear the 
+                tables of. Defaults to None, all files.
+        """
+        if filename is None:
+            self._cache.clear()
+        else:
+            self._cache = {key: table for key, table in self._cache.items()
+                           if key[0] != filename}
+
     def _read_data(self, filename: str) -> None:
         """Reads h5 file into memory.
 
@@ -83,13 +156,12 @@ class MetaData():
                 data from.
         """
         self.logger.debug(f"Reading New h5 file: {filename}")
-        processed_file_format = "{}_formatted.h5"
+        path = self._file_path(filename)
         
         try:  
+            # The open file is shared by all instances and closed by close_h5
+            type(self).h5_data = h5py.File(path, 'r')
             if self.read_from_formatted_h5:
-
-                filename = processed_file_format.format(filename)
-                self.h5_data = h5py.File(os.path.join(self.HDF5_folder_in, filename), 'r')
                 partitions = [key for key in self.h5_data['metadata'].keys()]
                 if self.partition_number > len(partitions):
                     self.logger.warning(f"\nYou have chosen to use metadata partition_number {self.partition_number}, "
@@ -99,8 +171,8 @@ class MetaData():
 
                 self.start_index = f"metadata/{partitions[self.partition_number]}/"
             else:
-                self.h5_data = h5py.File(os.path.join(self.HDF5_folder_in, filename), 'r')
                 self.start_index = "metadata/"
+            self._start_path = path
 
         except OSError:
             if self.read_from_formatted_h5:
@@ -118,6 +190,7 @@ class MetaData():
                                     "created by h5plexos.\n\nMarmot will now quit.")
                 sys.exit()     
 
+    @_memoize
     def generator_category(self, filename: str) -> pd.DataFrame:
         """Generator categories mapping.
         
@@ -134,12 +207,13 @@ class MetaData():
             except KeyError:
                 gen_category = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'objects/generators']))
             gen_category.rename(columns={'name':'gen_name','category':'tech'}, inplace=True)
-            gen_category = gen_category.applymap(lambda x: x.decode("utf-8") if isinstance(x, bytes) else x)   
+            gen_category = _decode_bytes(gen_category)   
         except KeyError:
             gen_category = pd.DataFrame()
 
         return gen_category
             
+    @_memoize
     def region_generators(self, filename: str) -> pd.DataFrame:
         """Region generators mapping.
         
@@ -156,13 +230,14 @@ class MetaData():
             except KeyError:
                 region_gen = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'relations/region_generators']))
             region_gen.rename(columns={'child':'gen_name','parent':'region'}, inplace=True)
-            region_gen = region_gen.applymap(lambda x: x.decode("utf-8") if isinstance(x, bytes) else x)
+            region_gen = _decode_bytes(region_gen)
             region_gen.drop_duplicates(subset=["gen_name"],keep='first',inplace=True) #For generators which belong to more than 1 region, drop duplicates.
         except KeyError:
             region_gen = pd.DataFrame()
         
         return region_gen
         
+    @_memoize
     def region_generator_category(self, filename: str) -> pd.DataFrame:
         """Region generators category mapping.
         
@@ -180,6 +255,7 @@ class MetaData():
 
         return region_gen_cat
         
+    @_memoize
     def zone_generators(self, filename: str) -> pd.DataFrame:
         """Zone generators mapping.
         
@@ -195,13 +271,14 @@ class MetaData():
             except KeyError:
                 zone_gen = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'relations/zone_generators']))    
             zone_gen.rename(columns={'child':'gen_name','parent':'zone'}, inplace=True)
-            zone_gen = zone_gen.applymap(lambda x: x.decode("utf-8") if isinstance(x, bytes) else x)
+            zone_gen = _decode_bytes(zone_gen)
             zone_gen.drop_duplicates(subset=["gen_name"],keep='first',inplace=True) #For generators which belong to more than 1 region, drop duplicates.
         except KeyError:
             zone_gen = pd.DataFrame()
         
         return zone_gen
         
+    @_memoize
     def zone_generator_category(self, filename: str) -> pd.DataFrame:
         """Zone generators category mapping.
         
@@ -221,6 +298,7 @@ class MetaData():
         
     # Generator storage has been updated so that only one of tail_storage & head_storage is required
     # If both are available, both are used
+    @_memoize
     def generator_storage(self, filename: str) -> pd.DataFrame:
         """Generator Storage mapping.
         
@@ -272,12 +350,13 @@ class MetaData():
             else:
                 gen_storage = generator_tailstorage 
             gen_storage.rename(columns={'child':'name','parent':'gen_name'}, inplace=True)
-            gen_storage = gen_storage.applymap(lambda x: x.decode("utf-8") if isinstance(x, bytes) else x)
+            gen_storage = _decode_bytes(gen_storage)
         except:
             gen_storage = pd.DataFrame()
         
         return gen_storage
     
+    @_memoize
     def node_region(self, filename: str) -> pd.DataFrame:
         """Node Region mapping.
         
@@ -293,13 +372,14 @@ class MetaData():
             except KeyError:
                 node_region = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'relations/node_region']))
             node_region.rename(columns={'child':'region','parent':'node'}, inplace=True)
-            node_region = node_region.applymap(lambda x: x.decode("utf-8") if isinstance(x, bytes) else x)
+            node_region = _decode_bytes(node_region)
             node_region = node_region.sort_values(by=['node']).set_index('region') 
         except:
             node_region = pd.DataFrame()
 
         return node_region
         
+    @_memoize
     def node_zone(self, filename: str) -> pd.DataFrame:
         """Node zone mapping.
         
@@ -315,13 +395,14 @@ class MetaData():
             except KeyError:
                 node_zone = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'relations/node_zone']))
             node_zone.rename(columns={'child':'zone','parent':'node'}, inplace=True)
-            node_zone = node_zone.applymap(lambda x: x.decode("utf-8") if isinstance(x, bytes) else x)
+            node_zone = _decode_bytes(node_zone)
             node_zone = node_zone.sort_values(by=['node']).set_index('zone')   
         except:
             node_zone = pd.DataFrame()
         
         return node_zone
     
+    @_memoize
     def generator_node(self, filename: str) -> pd.DataFrame:
         """generator node mapping.
         
@@ -337,13 +418,14 @@ class MetaData():
             except KeyError:
                 generator_node = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'relations/generator_nodes']))
             generator_node.rename(columns={'child':'node','parent':'gen_name'}, inplace=True)
-            generator_node = generator_node.applymap(lambda x: x.decode("utf-8") if isinstance(x, bytes) else x)
+            generator_node = _decode_bytes(generator_node)
             # generators_nodes = generators_nodes.sort_values(by=['generator'])   
         except:
             generator_node = pd.DataFrame()
 
         return generator_node
         
+    @_memoize
     def regions(self, filename: str) -> pd.DataFrame:
         """Region objects.
         
@@ -359,7 +441,7 @@ class MetaData():
                 regions = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'objects/regions']))
             except KeyError:
                 regions = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'objects/region']))
-            regions = regions.applymap(lambda x: x.decode("utf-8") if isinstance(x, bytes) else x)
+            regions = _decode_bytes(regions)
             regions.rename(columns={'name':'region'}, inplace=True)
             regions.sort_values(['category','region'],inplace=True)
         except KeyError:
@@ -368,6 +450,7 @@ class MetaData():
         
         return regions   
     
+    @_memoize
     def zones(self, filename: str) -> pd.DataFrame:
         """Zone objects.
         
@@ -382,13 +465,14 @@ class MetaData():
                 zones = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'objects/zones']))
             except KeyError:
                 zones = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'objects/zone']))
-            zones = zones.applymap(lambda x: x.decode("utf-8") if isinstance(x, bytes) else x)
+            zones = _decode_bytes(zones)
         except KeyError:
             self.logger.warning("Zonal data not included in h5plexos results")
             zones = pd.DataFrame()
 
         return zones
              
+    @_memoize
     def lines(self, filename: str) -> pd.DataFrame:
         """Line objects.
         
@@ -403,13 +487,14 @@ class MetaData():
                 lines=pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'objects/lines']))
             except KeyError:
                 lines=pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'objects/line']))
-            lines = lines.applymap(lambda x: x.decode("utf-8") if isinstance(x, bytes) else x)
+            lines = _decode_bytes(lines)
             lines.rename(columns={"name":"line_name"},inplace=True)
         except KeyError:
             self.logger.warning("Line data not included in h5plexos results")
 
         return lines
     
+    @_memoize
     def region_regions(self, filename: str) -> pd.DataFrame:
         """Region-region mapping.
         
@@ -421,12 +506,13 @@ class MetaData():
             self._read_data(filename)
         try:
             region_regions = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'relations/region_regions']))
-            region_regions = region_regions.applymap(lambda x: x.decode("utf-8") if isinstance(x, bytes) else x)
+            region_regions = _decode_bytes(region_regions)
         except KeyError:
             self.logger.warning("region_regions data not included in h5plexos results")
 
         return region_regions
     
+    @_memoize
     def region_interregionallines(self, filename: str) -> pd.DataFrame:
         """Region inter-regional lines mapping.
         
@@ -442,7 +528,7 @@ class MetaData():
             except KeyError:
                 region_interregionallines=pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'relations/region_interregionalline']))
             
-            region_interregionallines = region_interregionallines.applymap(lambda x: x.decode("utf-8") if isinstance(x, bytes) else x)
+            region_interregionallines = _decode_bytes(region_interregionallines)
             region_interregionallines.rename(columns={"parent":"region","child":"line_name"},inplace=True)
             if not self.Region_Mapping.empty:
                 region_interregionallines=pd.merge(region_interregionallines,self.Region_Mapping,how='left',on="region") 
@@ -452,6 +538,7 @@ class MetaData():
 
         return region_interregionallines
             
+    @_memoize
     def region_intraregionallines(self, filename: str) -> pd.DataFrame:
         """Region intra-regional lines mapping.
         
@@ -470,7 +557,7 @@ class MetaData():
                 except KeyError:
                     region_intraregionallines=pd.concat([pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'relations/region_importinglines'])),
                                                             pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'relations/region_exportinglines']))]).drop_duplicates()
-            region_intraregionallines = region_intraregionallines.applymap(lambda x: x.decode("utf-8") if isinstance(x, bytes) else x)
+            region_intraregionallines = _decode_bytes(region_intraregionallines)
             region_intraregionallines.rename(columns={"parent":"region","child":"line_name"},inplace=True)
             if not self.Region_Mapping.empty:
                 region_intraregionallines=pd.merge(region_intraregionallines,self.Region_Mapping,how='left',on="region")
@@ -480,6 +567,7 @@ class MetaData():
         
         return region_intraregionallines
       
+    @_memoize
     def region_exporting_lines(self, filename: str) -> pd.DataFrame:
         """Region exporting lines mapping.
         
@@ -494,7 +582,7 @@ class MetaData():
                 region_exportinglines = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'relations/region_exportinglines']))
             except KeyError:
                 region_exportinglines = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'relations/region_exportingline']))
-            region_exportinglines = region_exportinglines.applymap(lambda x: x.decode("utf-8") if isinstance(x, bytes) else x)
+            region_exportinglines = _decode_bytes(region_exportinglines)
             region_exportinglines = region_exportinglines.rename(columns={'parent':'region','child':'line_name'})
             if not self.Region_Mapping.empty:
                 region_exportinglines=pd.merge(region_exportinglines,self.Region_Mapping,how='left',on="region")
@@ -503,6 +591,7 @@ class MetaData():
 
         return region_exportinglines 
       
+    @_memoize
     def region_importing_lines(self, filename: str) -> pd.DataFrame:
         """Region importing lines mapping.
         
@@ -517,7 +606,7 @@ class MetaData():
                 region_importinglines = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'relations/region_importinglines']))
             except KeyError:
                 region_importinglines = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'relations/region_importingline']))
-            region_importinglines = region_importinglines.applymap(lambda x: x.decode("utf-8") if isinstance(x, bytes) else x)
+            region_importinglines = _decode_bytes(region_importinglines)
             region_importinglines = region_importinglines.rename(columns={'parent':'region','child':'line_name'})
             if not self.Region_Mapping.empty:
                 region_importinglines=pd.merge(region_importinglines,self.Region_Mapping,how='left',on="region")
@@ -526,6 +615,7 @@ class MetaData():
 
         return region_importinglines
 
+    @_memoize
     def zone_interzonallines(self, filename: str) -> pd.DataFrame:
         """Zone inter-zonal lines mapping.
         
@@ -541,7 +631,7 @@ class MetaData():
             except KeyError:
                 zone_interzonallines=pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'relations/zone_interzonalline']))
             
-            zone_interzonallines = zone_interzonallines.applymap(lambda x: x.decode("utf-8") if isinstance(x, bytes) else x)
+            zone_interzonallines = _decode_bytes(zone_interzonallines)
             zone_interzonallines.rename(columns={"parent":"region","child":"line_name"},inplace=True)
         except KeyError:      
             zone_interzonallines = pd.DataFrame()
@@ -549,6 +639,7 @@ class MetaData():
         
         return zone_interzonallines
                 
+    @_memoize
     def zone_intrazonallines(self, filename: str) -> pd.DataFrame:
         """Zone intra-zonal lines mapping.
         
@@ -563,7 +654,7 @@ class MetaData():
                 zone_intrazonallines=pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'relations/zone_intrazonallines']))
             except KeyError:
                 zone_intrazonallines=pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'relations/zone_intrazonalline']))
-            zone_intrazonallines = zone_intrazonallines.applymap(lambda x: x.decode("utf-8") if isinstance(x, bytes) else x)
+            zone_intrazonallines = _decode_bytes(zone_intrazonallines)
             zone_intrazonallines.rename(columns={"parent":"region","child":"line_name"},inplace=True)
         except KeyError:      
             zone_intrazonallines = pd.DataFrame()
@@ -571,6 +662,7 @@ class MetaData():
 
         return zone_intrazonallines
                  
+    @_memoize
     def zone_exporting_lines(self, filename: str) -> pd.DataFrame:
         """Zone exporting lines mapping.
         
@@ -585,7 +677,7 @@ class MetaData():
                 zone_exportinglines = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'relations/zone_exportinglines']))
             except KeyError:
                 zone_exportinglines = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'relations/zone_exportingline']))
-            zone_exportinglines = zone_exportinglines.applymap(lambda x: x.decode("utf-8") if isinstance(x, bytes) else x)
+            zone_exportinglines = _decode_bytes(zone_exportinglines)
             zone_exportinglines = zone_exportinglines.rename(columns={'parent':'region','child':'line_name'})
         except KeyError:
             self.logger.warning("zone exporting lines data not included in h5plexos results") 
@@ -593,6 +685,7 @@ class MetaData():
 
         return zone_exportinglines 
     
+    @_memoize
     def zone_importing_lines(self, filename: str) -> pd.DataFrame:
         """Zone importing lines mapping.
         
@@ -607,7 +700,7 @@ class MetaData():
                 zone_importinglines = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'relations/zone_importinglines']))
             except KeyError:
                 zone_importinglines = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'relations/zone_importingline']))
-            zone_importinglines = zone_importinglines.applymap(lambda x: x.decode("utf-8") if isinstance(x, bytes) else x)
+            zone_importinglines = _decode_bytes(zone_importinglines)
             zone_importinglines = zone_importinglines.rename(columns={'parent':'region','child':'line_name'})
         except KeyError:
             self.logger.warning("zone importing lines data not included in h5plexos results") 
@@ -615,6 +708,7 @@ class MetaData():
         
         return zone_importinglines 
 
+    @_memoize
     def interface_lines(self, filename: str) -> pd.DataFrame:
         """Interface to lines mapping.
         
@@ -629,13 +723,14 @@ class MetaData():
                 interface_lines = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'relations/interface_lines']))
             except KeyError:
                 interface_lines = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'relations/interfaces_lines']))
-            interface_lines = interface_lines.applymap(lambda x: x.decode("utf-8") if isinstance(x, bytes) else x)
+            interface_lines = _decode_bytes(interface_lines)
             interface_lines = interface_lines.rename(columns={'parent':'interface','child':'line'})
         except KeyError:
             self.logger.warning("Interface Lines data not included in h5plexos results")
 
         return interface_lines
 
+    @_memoize
     def region_lines(self, filename: str) -> pd.DataFrame:
         """Region to Lines mapping.
         
@@ -648,6 +743,7 @@ class MetaData():
         region_lines = pd.concat([region_interregionallines,region_intraregionallines])
         return region_lines
     
+    @_memoize
     def zone_lines(self, filename: str) -> pd.DataFrame:
         """Zone to Lines mapping.
         
@@ -661,6 +757,7 @@ class MetaData():
         zone_lines = zone_lines.rename(columns={'region':'zone'})
         return zone_lines
 
+    @_memoize
     def reserves(self, filename: str) -> pd.DataFrame:
         """Reserves objects.
         
@@ -675,12 +772,13 @@ class MetaData():
                 reserves = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'objects/reserves']))
             except KeyError:
                 reserves = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'objects/reserve']))
-            reserves = reserves.applymap(lambda x: x.decode("utf-8") if isinstance(x, bytes) else x)
+            reserves = _decode_bytes(reserves)
         except KeyError:
             self.logger.warning("Reserves data not included in h5plexos results") 
  
         return reserves 
             
+    @_memoize
     def reserves_generators(self, filename: str) -> pd.DataFrame:
         """Reserves to generators mapping.
         
@@ -695,7 +793,7 @@ class MetaData():
                 reserves_generators = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'relations/reserves_generators']))
             except KeyError:
                 reserves_generators = pd.DataFrame(np.asarray(self.h5_data[self.start_index + 'relations/reserve_generators']))
-            reserves_generators = reserves_generators.applymap(lambda x: x.decode("utf-8") if isinstance(x, bytes) else x)
+            reserves_generators = _decode_bytes(reserves_generators)
             reserves_generators = reserves_generators.rename(columns={'child':'gen_name'})
         except KeyError:
             self.logger.warning("Reserves data not included in h5plexos results") 
@@ -703,6 +801,7 @@ class MetaData():
         
         return reserves_generators 
 
+    @_memoize
     def reserves_regions(self, filename: str) -> pd.DataFrame:
         """Reserves to regions mapping.
         
@@ -724,6 +823,7 @@ class MetaData():
         reserves_regions.reset_index(drop=True,inplace=True)
         return reserves_regions
         
+    @_memoize
     def reserves_zones(self, filename: str) -> pd.DataFrame:
         """Reserves to zones mapping.
         
@@ -374,7 +374,7 @@ class MPlot(PlotDataHelper):
 
                 Cap = self["generator_Installed_Capacity"].get(scenario)
                 Cap = Cap.xs(zone_input,level = self.AGG_BY)
-                Caps = Cap.groupby('gen_name').mean()
+                Caps = Cap.groupby('gen_name',observed=True).mean()
                 Caps.reset_index()
                 Caps = Caps.rename(columns = {0: 'Installed Capacity (MW)'})
                 Min = pd.merge(Min,Caps, on = 'gen_name')
@@ -384,7 +384,7 @@ class MPlot(PlotDataHelper):
                 Gen = Gen.loc[Gen['Output (MWh)'] != 0]
                 online_gens = Gen.gen_name.unique()
                 Min = Min.loc[online_gens]
-                Min['hours_online'] = Gen.groupby('gen_name')['Output (MWh)'].count()
+                Min['hours_online'] = Gen.groupby('gen_name',observed=True)['Output (MWh)'].count()
                 Min['fraction_at_min'] = Min['Hours at Minimum'] / Min.hours_online
 
                 tech_names = Min.tech.unique()
@@ -16,6 +16,7 @@ import matplotlib.dates as mdates
 import marmot.plottingmodules.plotutils.plot_library as plotlib
 
 import marmot.config.mconfig as mconfig
+from marmot.formatterutils.storage import read_property
 from marmot.plottingmodules.plotutils.plot_data_helper import PlotDataHelper
 from marmot.plottingmodules.plotutils.plot_exceptions import (MissingInputData, 
             UnderDevelopment, MissingZoneData)
@@ -217,7 +218,7 @@ class MPlot(PlotDataHelper):
                 overall_avg = sum_ts.mean()
 
                #Subset to match dispatch time horizon.
-                Gen = pd.read_hdf(os.path.join(self. Marmot_Solutions_folder, scenario, "Processed_HDF5_folder", scenario+"_formatted.h5"),  "generator_Generation")
+                Gen = read_property(os.path.join(self. Marmot_Solutions_folder, scenario, "Processed_HDF5_folder", scenario+"_formatted.h5"),  "generator_Generation")
                 start = Gen.index.get_level_values('timestamp')[0]
                 end =  Gen.index.get_level_values('timestamp')[-1]
 
@@ -86,7 +86,7 @@ class MPlot(PlotDataHelper):
         
         # Runs get_formatted_data within PlotDataHelper to populate PlotDataHelper dictionary  
         # with all required properties, returns a 1 if required data is missing
-        check_input_data = self.get_formatted_data(properties)
+        check_input_data = self.get_formatted_data(properties, object_detail=False)
 
 
         if 1 in check_input_data:
@@ -249,7 +249,7 @@ class MPlot(PlotDataHelper):
         
         # Runs get_formatted_data within PlotDataHelper to populate PlotDataHelper dictionary  
         # with all required properties, returns a 1 if required data is missing
-        check_input_data = self.get_formatted_data(properties)
+        check_input_data = self.get_formatted_data(properties, object_detail=False)
 
 
         if 1 in check_input_data:
@@ -450,7 +450,7 @@ class MPlot(PlotDataHelper):
         
         # Runs get_formatted_data within PlotDataHelper to populate PlotDataHelper dictionary  
         # with all required properties, returns a 1 if required data is missing
-        check_input_data = self.get_formatted_data(properties)
+        check_input_data = self.get_formatted_data(properties, object_detail=False)
 
         if 1 in check_input_data:
             return MissingInputData()
@@ -621,7 +621,7 @@ class MPlot(PlotDataHelper):
         
         # Runs get_formatted_data within PlotDataHelper to populate PlotDataHelper dictionary  
         # with all required properties, returns a 1 if required data is missing
-        check_input_data = self.get_formatted_data(properties)
+        check_input_data = self.get_formatted_data(properties, object_detail=False)
 
 
         # Checks if all data required by plot is available, if 1 in list required data is missing
@@ -950,7 +950,7 @@ class MPlot(PlotDataHelper):
         
         # Runs get_formatted_data within PlotDataHelper to populate PlotDataHelper dictionary  
         # with all required properties, returns a 1 if required data is missing
-        check_input_data = self.get_formatted_data(properties)
+        check_input_data = self.get_formatted_data(properties, object_detail=False, resolution='hourly')
 
         if 1 in check_input_data:
             return MissingInputData()
@@ -990,6 +990,8 @@ class MPlot(PlotDataHelper):
                 
                 interval_count = PlotDataHelper.get_sub_hour_interval_count(re_curt)
                 re_curt = re_curt/interval_count
+                # Energy of each hour, so interval data and hourly rollups give the same values
+                re_curt = re_curt.groupby(re_curt.index.floor('H')).sum()
                 # Group data by hours and find mean across entire range 
                 re_curt = re_curt.groupby([re_curt.index.hour]).mean()
                 
@@ -112,7 +112,7 @@ class MPlot(PlotDataHelper):
                 # Rename generator technologies
                 emit = self.rename_gen_techs(emit)
                 # summarize annual emissions by pollutant and tech
-                emit = emit.groupby(['pollutant', 'tech']).sum()
+                emit = emit.groupby(['pollutant', 'tech'], observed=True).sum()
 
                 # rename column based on scenario
                 emit.rename(columns={0:scenario}, inplace=True)
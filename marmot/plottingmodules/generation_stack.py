@@ -279,7 +279,7 @@ class MPlot(PlotDataHelper):
 
             # Runs get_formatted_data within PlotDataHelper to populate PlotDataHelper dictionary  
         # with all required properties, returns a 1 if required data is missing
-            return self.get_formatted_data(properties)
+            return self.get_formatted_data(properties, object_detail=False)
 
         def setup_data(zone_input, scenario, Stacked_Gen):
 
@@ -780,7 +780,7 @@ class MPlot(PlotDataHelper):
 
         # Runs get_formatted_data within PlotDataHelper to populate PlotDataHelper dictionary  
         # with all required properties, returns a 1 if required data is missing
-        check_input_data = self.get_formatted_data(properties)
+        check_input_data = self.get_formatted_data(properties, object_detail=False)
 
         if 1 in check_input_data:
             outputs = MissingInputData()
@@ -17,6 +17,9 @@ import concurrent.futures
 from typing import Tuple
 
 import marmot.config.mconfig as mconfig
+from marmot.formatterutils.storage import read_property, formatted_keys
+from marmot.formatterutils.rollups import (spatial_rollup_key, temporal_rollup_key, 
+                                           TEMPORAL_ROLLUP_PERIODS)
 
 logger = logging.getLogger('marmot_plot.'+__name__)
 
@@ -60,38 +63,68 @@ class PlotDataHelper(dict):
         self.xlabels = xlabels
         self.gen_names_dict = gen_names_dict
         self.Region_Mapping = Region_Mapping
+        # (spatial, resolution) of data read from a rollup instead of the property, 
+        # keyed by (property, scenario)
+        self.rollup_data = {}
 
-    def get_formatted_data(self, properties: list) -> list:
+    def get_formatted_data(self, properties: list, object_detail: bool = True,
+                           resolution: str = None) -> list:
         """Get data from formatted h5 file.
         
-        Adds data to dictionary with scenario name as key
+        Adds data to dictionary with scenario name as key. 
+        Data read from a rollup is read again if a later plot needs more detail.
 
         Args:
             properties (list): list of tuples containing required 
                 plexos property information
+            object_detail (bool, optional): If False, the plot only uses generator 
+                properties summed by technology and AGG_BY, so the spatial rollup of 
+                each generator property is read instead of the property where it exists.
+                Defaults to True.
+            resolution (str, optional): Coarsest resolution the plot can use, 'hourly', 
+                'daily' or 'monthly'. If given, the plot only uses the energy of each 
+                period, so the coarsest temporal rollup saved for all the interval 
+                properties of a scenario is read instead of the interval data. 
+                Defaults to None, interval data is read.
 
         Returns:
             list: If 1 in list required data is missing .
         """
         check_input_data = []
         
+        # Key to read for each property and scenario, and the rollup it is, if any
+        read_keys = self._select_rollups(properties, object_detail, resolution)
+
         for prop in properties:
             required, plx_prop_name, scenario_list = prop
             if f"{plx_prop_name}" not in self:
                 self[f"{plx_prop_name}"] = {}
             
-            # Create new set of scenarios that are not yet in dictionary
+            # Create new set of scenarios that are not yet in dictionary, 
+            # or were read from a rollup without the detail needed
             scen_list = set(scenario_list) - set(self[f"{plx_prop_name}"].keys())
+            scen_list |= {scenario for scenario in scenario_list 
+                          if not self._rollup_satisfies(self.rollup_data.get((plx_prop_name, scenario)),
+                                                        read_keys[(plx_prop_name, scenario)][1])}
             
             # If set is not empty add data to dict
             if scen_list:
+                scen_list = list(scen_list)
                 #Read data in with multi threading
-                executor_func_setup = functools.partial(self.read_processed_h5file, plx_prop_name)
                 with concurrent.futures.ThreadPoolExecutor(max_workers=mconfig.parser("multithreading_workers")) as executor:
-                    data_files = executor.map(executor_func_setup, scen_list)
+                    data_files = executor.map(self.read_processed_h5file, 
+                                              [read_keys[(plx_prop_name, scenario)][0] 
+                                               for scenario in scen_list], 
+                                              scen_list)
                 # Save data to dict
                 for scenario, df in zip(scen_list, data_files):
                     self[f"{plx_prop_name}"][scenario] = df
+                    read_key, rollup = read_keys[(plx_prop_name, scenario)]
+                    if rollup is None:
+                        self.rollup_data.pop((plx_prop_name, scenario), None)
+                    else:
+                        logger.info(f"Using {read_key} for {scenario}")
+                        self.rollup_data[(plx_prop_name, scenario)] = rollup
 
             # If any of the dataframes are empty for given property log warning
             if True in [df.empty for df in self[f"{plx_prop_name}"].values()]:
@@ -100,9 +133,92 @@ class PlotDataHelper(dict):
                     check_input_data.append(1)
         return check_input_data
 
+    def _select_rollups(self, properties: list, object_detail: bool = True, 
+                        resolution: str = None) -> dict:
+        """Selects the formatted property to read for each property and scenario.
+
+        The temporal resolution is the same for all properties of a scenario, the
+        coarsest that is saved for every property with temporal rollups and is no 
+        coarser than resolution, so interval data is never combined with rollups.
+
+        Args:
+            properties (list): list of tuples containing required 
+                plexos property information
+            object_detail (bool, optional): If False, spatial rollups by AGG_BY 
+                are selected for generator properties. Defaults to True.
+            resolution (str, optional): Coarsest temporal rollup to select. 
+                Defaults to None, no temporal rollups are selected.
+
+        Returns:
+            dict: (key to read, (spatial, resolution) of the rollup or None), keyed 
+            by (property, scenario).
+        """
+        names = [prop[1] for prop in properties]
+        scenarios = set().union(*(prop[2] for prop in properties))
+        if object_detail and resolution is None:
+            return {(name, scenario): (name, None) for name in names for scenario in scenarios}
+
+        resolutions = list(TEMPORAL_ROLLUP_PERIODS)
+        if resolution is not None:
+            resolutions = resolutions[:resolutions.index(resolution) + 1]
+        read_keys = {}
+        for scenario in scenarios:
+            keys = set(formatted_keys(os.path.join(self.Marmot_Solutions_folder, "Processed_HDF5_folder", 
+                                                   f"{scenario}_formatted.h5")))
+            scenario_resolution = None
+            if resolution is not None:
+                rolled_up = [name for name in names 
+                             if any(temporal_rollup_key(name, r) in keys for r in TEMPORAL_ROLLUP_PERIODS)]
+                scenario_resolution = next((r for r in reversed(resolutions) if rolled_up 
+                                            and all(temporal_rollup_key(name, r) in keys 
+                                                    for name in rolled_up)), None)
+            for name in names:
+                candidates = []
+                spatial_key = spatial_rollup_key(name, self.AGG_BY)
+                spatial = not object_detail and name.startswith('generator_')
+                if scenario_resolution is not None:
+                    if spatial:
+                        candidates.append((temporal_rollup_key(spatial_key, scenario_resolution), 
+                                           (True, scenario_resolution)))
+                    candidates.append((temporal_rollup_key(name, scenario_resolution), 
+                                       (False, scenario_resolution)))
+                if spatial:
+                    candidates.append((spatial_key, (True, None)))
+                read_keys[(name, scenario)] = next(((key, rollup) for key, rollup in candidates 
+                                                    if key in keys), (name, None))
+        return read_keys
+
+    @staticmethod
+    def _rollup_satisfies(loaded: tuple, needed: tuple) -> bool:
+        """Checks if data read from a rollup has the detail a plot needs.
+
+        Args:
+            loaded (tuple): (spatial, resolution) of the loaded data, 
+                None if it is the property.
+            needed (tuple): (spatial, resolution) of the selected rollup, 
+                None if the property is needed.
+
+        Returns:
+            bool: True if the loaded data can be used.
+        """
+        loaded_spatial, loaded_resolution = loaded or (False, None)
+        needed_spatial, needed_resolution = needed or (False, None)
+        if loaded_spatial and not needed_spatial:
+            return False
+        # Interval data and temporal rollups are not combined, as they are summed differently
+        if (loaded_resolution is None) != (needed_resolution is None):
+            return False
+        if loaded_resolution is not None:
+            periods = list(TEMPORAL_ROLLUP_PERIODS)
+            return periods.index(loaded_resolution) <= periods.index(needed_resolution)
+        return True
+
     def read_processed_h5file(self, plx_prop_name: str, scenario: str) -> pd.DataFrame:
         """Reads Data from processed h5file.
 
+        Properties saved in the wide layout are returned as the long frame.
+        The tech, gen_name, region and zone levels are returned as categoricals.
+
         Args:
             plx_prop_name (str): Name of property, e.g generator_Generation
             scenario (str): Name of scenario.
@@ -111,15 +227,17 @@ class PlotDataHelper(dict):
             pd.DataFrame: Requested dataframe.
         """
         try:
-            with pd.HDFStore(os.path.join(self.Marmot_Solutions_folder, "Processed_HDF5_folder", 
-                                            f"{scenario}_formatted.h5"), 'r') as file:
-                return file[plx_prop_name]
+            return read_property(os.path.join(self.Marmot_Solutions_folder, "Processed_HDF5_folder", 
+                                              f"{scenario}_formatted.h5"), plx_prop_name,
+                                 categorical=True)
         except KeyError:
             return pd.DataFrame()
         
     def rename_gen_techs(self, df: pd.DataFrame) -> pd.DataFrame:
         """Renames generator technologies based on the gen_names.csv file.
 
+        Only the unique technologies are renamed, the codes of each row are remapped.
+
         Args:
             df (pd.DataFrame): Dataframe to process.
 
@@ -128,30 +246,31 @@ class PlotDataHelper(dict):
         """
         # If tech is a column name
         if 'tech' in df.columns:
-            original_tech_index = df.tech.unique()
-            # Checks if all generator tech categories have been identified and matched. If not, lists categories that need a match
-            unmapped_techs = set(original_tech_index) - set(self.gen_names_dict.keys())
-            df['tech'] = pd.CategoricalIndex(df.tech.map(lambda x: self.gen_names_dict.get(x, 'Other')))
+            used_techs = df.tech.dropna().unique()
+            techs = df.tech.astype('category').cat
+            original_tech_index = techs.categories
+            renamed_techs = original_tech_index.map(lambda x: self.gen_names_dict.get(x, 'Other'))
+            tech_codes, tech_categories = pd.factorize(np.asarray(renamed_techs), sort=True)
+            df['tech'] = pd.Categorical.from_codes(
+                np.where(techs.codes == -1, -1, tech_codes[techs.codes]), categories=tech_categories)
         
         # If tech is in the index 
         elif 'tech' in df.index.names:
-            original_tech_index = df.index.get_level_values(level='tech')
-            # Checks if all generator tech categories have been identified and matched. If not, lists categories that need a match
-            unmapped_techs = set(original_tech_index) - set(self.gen_names_dict.keys())
-        
-            tech_index = pd.CategoricalIndex(original_tech_index.map(lambda x: self.gen_names_dict.get(x, 'Other')))
-            df.reset_index(level='tech', drop=True, inplace=True)
-
-            idx_map = pd.MultiIndex(levels=df.index.levels + [tech_index.categories],
-                                        codes=df.index.codes + [tech_index.codes],
-                                        names=df.index.names + tech_index.names)
-
-            df = pd.DataFrame(data=df.values.reshape(-1), index=idx_map)
-            # Move tech back to position 1
-            index_labels = list(df.index.names)
-            index_labels.insert(1, index_labels.pop(index_labels.index("tech")))
-            df = df.reorder_levels(index_labels, axis=0)
-
+            level = df.index.names.index('tech')
+            # Levels can hold techs of rows that were filtered out
+            used_techs = df.index.unique('tech').dropna()
+            original_tech_index = df.index.levels[level]
+            renamed_techs = original_tech_index.map(lambda x: self.gen_names_dict.get(x, 'Other'))
+            tech_codes, tech_categories = pd.factorize(np.asarray(renamed_techs), sort=True)
+            codes = list(df.index.codes)
+            codes[level] = np.where(codes[level] == -1, -1, tech_codes[codes[level]])
+            levels = list(df.index.levels)
+            levels[level] = pd.CategoricalIndex(tech_categories, categories=tech_categories, name='tech')
+            df = df.set_axis(pd.MultiIndex(levels=levels, codes=codes, names=df.index.names,
+                                           verify_integrity=False))
+
+        # Checks if all generator tech categories have been identified and matched. If not, lists categories that need a match
+        unmapped_techs = set(used_techs) - set(self.gen_names_dict.keys())
         if unmapped_techs:
             logger.warning(f"The following Generators could not be re-classified, they wil be renamed 'Other': {unmapped_techs}")
         return df
@@ -467,6 +586,9 @@ class PlotDataHelper(dict):
             int: Number of intervals per 60 minutes.
         """
         timestamps = df.index.get_level_values('timestamp').unique()
+        if len(timestamps) < 2:
+            # A single period, e.g a monthly rollup of a month long model
+            return 1
         time_delta = timestamps[1] - timestamps[0]
         # Finds intervals in 60 minute period
         intervals_per_hour = 60/(time_delta/np.timedelta64(1, 'm'))
@@ -81,7 +81,7 @@ class MPlot(PlotDataHelper):
         
         # Runs get_formatted_data within PlotDataHelper to populate PlotDataHelper dictionary  
         # with all required properties, returns a 1 if required data is missing
-        check_input_data = self.get_formatted_data(properties)
+        check_input_data = self.get_formatted_data(properties, object_detail=False, resolution='monthly')
         
         # Checks if all data required by plot is available, if 1 in list required data is missing
         if 1 in check_input_data:
@@ -223,7 +223,7 @@ class MPlot(PlotDataHelper):
         
         # Runs get_formatted_data within PlotDataHelper to populate PlotDataHelper dictionary  
         # with all required properties, returns a 1 if required data is missing
-        check_input_data = self.get_formatted_data(properties)
+        check_input_data = self.get_formatted_data(properties, object_detail=False, resolution='monthly')
         
         # Checks if all data required by plot is available, if 1 in list required data is missing
         if 1 in check_input_data:
@@ -522,7 +522,7 @@ class MPlot(PlotDataHelper):
         
         # Runs get_formatted_data within PlotDataHelper to populate PlotDataHelper dictionary  
         # with all required properties, returns a 1 if required data is missing
-        check_input_data = self.get_formatted_data(properties)
+        check_input_data = self.get_formatted_data(properties, object_detail=False, resolution='monthly')
         
         # Checks if all data required by plot is available, if 1 in list required data is missing
         if 1 in check_input_data:
@@ -635,7 +635,7 @@ class MPlot(PlotDataHelper):
         
         # Runs get_formatted_data within PlotDataHelper to populate PlotDataHelper dictionary  
         # with all required properties, returns a 1 if required data is missing
-        check_input_data = self.get_formatted_data(properties)
+        check_input_data = self.get_formatted_data(properties, object_detail=False, resolution='monthly')
 
         # Checks if all data required by plot is available, if 1 in list required data is missing
         if 1 in check_input_data:
@@ -754,7 +754,7 @@ class MPlot(PlotDataHelper):
         
         # Runs get_formatted_data within PlotDataHelper to populate PlotDataHelper dictionary  
         # with all required properties, returns a 1 if required data is missing
-        check_input_data = self.get_formatted_data(properties)
+        check_input_data = self.get_formatted_data(properties, object_detail=False, resolution='monthly')
         # Checks if all data required by plot is available, if 1 in list required data is missing
         if 1 in check_input_data:
             return MissingInputData()
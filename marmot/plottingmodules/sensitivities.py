@@ -13,6 +13,7 @@ import matplotlib as mpl
 from matplotlib.patches import Patch
 
 import marmot.config.mconfig as mconfig
+from marmot.formatterutils.storage import read_property
 from marmot.plottingmodules.plotutils.plot_data_helper import PlotDataHelper
 from marmot.plottingmodules.plotutils.plot_exceptions import (MissingInputData,
             UnderDevelopment, InputSheetError)
@@ -154,7 +155,7 @@ class MPlot(PlotDataHelper):
         diff_csv_perc = pd.DataFrame(index = bc_tech.index.get_level_values('timestamp').unique())
 
         #Add net interchange difference to icing plot.
-        bc_int = pd.read_hdf(os.path.join(self.Marmot_Solutions_folder, "Processed_HDF5_folder", self.Scenario_Diff[0] + "_formatted.h5"),"region_Net_Interchange")
+        bc_int = read_property(os.path.join(self.Marmot_Solutions_folder, "Processed_HDF5_folder", self.Scenario_Diff[0] + "_formatted.h5"),"region_Net_Interchange")
         bc_int = self.adjust_for_leapday(self["region_Net_Interchange"].get(self.Scenario_Diff[0]))
         scen_int = self.adjust_for_leapday(self["region_Net_Interchange"].get(self.Scenario_Diff[1]))
 
@@ -115,7 +115,8 @@ class MPlot(PlotDataHelper):
 
         # Runs get_formatted_data within PlotDataHelper to populate PlotDataHelper dictionary  
         # with all required properties, returns a 1 if required data is missing
-        check_input_data = self.get_formatted_data(properties)
+        check_input_data = self.get_formatted_data(properties, object_detail=False,
+                                                    resolution='monthly' if pd.isna(start_date_range) else 'hourly')
 
         if 1 in check_input_data:
             outputs = MissingInputData()
@@ -350,7 +351,8 @@ class MPlot(PlotDataHelper):
 
         # Runs get_formatted_data within PlotDataHelper to populate PlotDataHelper dictionary  
         # with all required properties, returns a 1 if required data is missing
-        check_input_data = self.get_formatted_data(properties)
+        check_input_data = self.get_formatted_data(properties, object_detail=False,
+                                                    resolution='monthly' if pd.isna(start_date_range) else 'hourly')
 
         if 1 in check_input_data:
             outputs = MissingInputData()
@@ -568,7 +570,7 @@ class MPlot(PlotDataHelper):
 
         # Runs get_formatted_data within PlotDataHelper to populate PlotDataHelper dictionary  
         # with all required properties, returns a 1 if required data is missing
-        check_input_data = self.get_formatted_data(properties)
+        check_input_data = self.get_formatted_data(properties, object_detail=False, resolution='monthly')
 
         if 1 in check_input_data:
             outputs = MissingInputData()
@@ -863,7 +865,7 @@ class MPlot(PlotDataHelper):
 
         # Runs get_formatted_data within PlotDataHelper to populate PlotDataHelper dictionary  
         # with all required properties, returns a 1 if required data is missing
-        check_input_data = self.get_formatted_data(properties)
+        check_input_data = self.get_formatted_data(properties, object_detail=False, resolution='monthly')
 
         if 1 in check_input_data:
             outputs = MissingInputData()
@@ -76,7 +76,7 @@ class MPlot(PlotDataHelper):
 
         # Runs get_data to populate mplot_data_dict with all required properties,
         # returns a 1 if required data is missing
-        check_input_data = self.get_formatted_data(properties)
+        check_input_data = self.get_formatted_data(properties, object_detail=False)
 
         # Checks if all data required by plot is available, if 1 in list required data is missing
         if 1 in check_input_data:
@@ -178,7 +178,7 @@ class MPlot(PlotDataHelper):
 
         # Runs get_formatted_data within PlotDataHelper to populate PlotDataHelper dictionary  
         # with all required properties, returns a 1 if required data is missing
-        check_input_data = self.get_formatted_data(properties)
+        check_input_data = self.get_formatted_data(properties, object_detail=False)
 
         # Checks if all data required by plot is available, if 1 in list required data is missing
         if 1 in check_input_data:
@@ -113,10 +113,10 @@ class MPlot(PlotDataHelper):
                 Ava = df_process_gen_ind_inputs(Ava,self)
 
                 #Gen = Gen/interval_count
-                Total_Gen = Gen.groupby(["tech"],as_index=True).sum() #axis=0)
+                Total_Gen = Gen.groupby(["tech"],as_index=True,observed=True).sum() #axis=0)
     #            Total_Gen.rename(scenario, inplace = True)
 
-                Total_Ava= Ava.groupby(["tech"],as_index=True).sum() #axis=0)
+                Total_Ava= Ava.groupby(["tech"],as_index=True,observed=True).sum() #axis=0)
     #            Total_Ava.rename(scenario,inplace=True)
 
                 Gen=pd.merge(Gen,Ava,on=['tech','timestamp'])
@@ -222,7 +222,7 @@ class MPlot(PlotDataHelper):
                 #Ava.index.get_level_values(level='gen_name').unique()                                      #Count number of gens as a check
                 Gen['Interval CF']= Gen['0_x']/Gen['0_y']                                                       #Hourly CF individual generators
     #            Gen=Gen.reset_index().set_index(["gen_name","timestamp","tech"])
-                thermal_generator_cf=Gen.groupby(["gen_name","tech"]).mean()                                #Calculate annual average of generator's hourly CF
+                thermal_generator_cf=Gen.groupby(["gen_name","tech"],observed=True).mean()                                #Calculate annual average of generator's hourly CF
                 thermal_generator_cf=thermal_generator_cf[(thermal_generator_cf['Interval CF'].isna())==False]  #Remove na's for categories that don't match gens Add check that the same number of entries is found?
 
                 m=0
@@ -249,7 +249,7 @@ class MPlot(PlotDataHelper):
                 n=n+1
                 thermal_generator_cf.rename(columns={"Interval CF":scenario}, inplace = True)
                 thermal_generator_cf=thermal_generator_cf[scenario]
-                thermal_generator_cf=pd.DataFrame(thermal_generator_cf.groupby("tech").mean())
+                thermal_generator_cf=pd.DataFrame(thermal_generator_cf.groupby("tech",observed=True).mean())
                 th_gen_chunk.append(thermal_generator_cf)
 
                 del Gen, thermal_generator_cf
@@ -321,10 +321,10 @@ class MPlot(PlotDataHelper):
 
 
                 #Gen = Gen/interval_count
-                Total_Gen = Gen.groupby(["tech"],as_index=True).sum() #axis=0)
+                Total_Gen = Gen.groupby(["tech"],as_index=True,observed=True).sum() #axis=0)
     #            Total_Gen.rename(scenario, inplace = True)
 
-                Total_Ava= Ava.groupby(["tech"],as_index=True).sum() #axis=0)
+                Total_Ava= Ava.groupby(["tech"],as_index=True,observed=True).sum() #axis=0)
     #            Total_Ava.rename(scenario,inplace=True)
 
                 Gen=pd.merge(Gen,Ava,on=['tech','timestamp'])
@@ -419,7 +419,7 @@ class MPlot(PlotDataHelper):
                 Gen = df_process_gen_ind_inputs(Gen,self)
 
 
-                Total_Gen = Gen.groupby(["tech"],as_index=True).sum() #axis=0)
+                Total_Gen = Gen.groupby(["tech"],as_index=True,observed=True).sum() #axis=0)
                 Total_Gen.rename(scenario, inplace = True)
                 total_gen_chunks.append(Total_Gen)
 
@@ -16,7 +16,8 @@ setup(name='marmot',
       url='https://github.nrel.gov/PCM/Marmot',
       packages=['marmot',
                 'marmot.config',
-                'marmot.plottingmodules'],
+                'marmot.plottingmodules',
+                'marmot.formatterutils'],
 
       install_requires=['numpy',
                         'pandas',
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""Shared fixtures of the Marmot tests.
+
+A small h5plexos scenario is written with h5py, following the layout of
+h5plexos v0.6 files: object and relation metadata, timestamps and one
+dataset per class and property. The partitions overlap by one day, as
+PLEXOS runs with a look ahead do.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+import h5py
+import pytest
+
+SCENARIO = 'Base'
+GENERATORS = [f'gen_{i:02d}' for i in range(12)]
+TECHS = ['Gas-CC', 'Wind', 'PV', 'Coal']
+REGIONS = ['p1', 'p2', 'p3']
+ZONES = ['z1', 'z2']
+REGION_ZONE = {'p1': 'z1', 'p2': 'z1', 'p3': 'z2'}
+PARTITION_STARTS = ['2024-01-01', '2024-01-03', '2024-01-05']
+PARTITION_HOURS = 72
+
+PLEXOS_PROPERTIES = pd.DataFrame({
+    'group': ['generator', 'generator', 'generator', 'region', 'region', 'zone'],
+    'data_set': ['Generation', 'Available Capacity', 'Pump Load', 'Load',
+                 'Unserved Energy', 'Load'],
+    'data_type': ['interval'] * 6,
+    'collect_data': [True] * 6})
+
+PROPERTY_KEYS = [f"{group}_{data_set.replace(' ', '_')}" for group, data_set
+                 in zip(PLEXOS_PROPERTIES['group'], PLEXOS_PROPERTIES['data_set'])]
+
+REGION_MAPPING = pd.DataFrame({'region': REGIONS, 'Interconnect': ['East', 'East', 'West']})
+
+# Settings passed explicitly, so the tests do not depend on the local config.yml
+FORMATTER_SETTINGS = dict(num_workers=1, streaming=False, storage_layout='long',
+                          storage_backend='hdf5', storage_profile='archive',
+                          incremental=False, native_reader=False, memory_budget=None,
+                          performance_report=False, spatial_rollups=False,
+                          temporal_rollups=[])
+
+
+def _compound(**columns) -> np.ndarray:
+    """Creates a h5plexos metadata table of fixed width byte strings."""
+    table = np.zeros(len(next(iter(columns.values()))),
+                     dtype=[(name, 'S64') for name in columns])
+    for name, values in columns.items():
+        table[name] = np.array(values, dtype='S')
+    return table
+
+
+def write_partition(path: str, start: str, seed: int) -> None:
+    """Writes a h5plexos partition with hourly interval results.
+
+    Generators are written out of name order, so readers have to sort the
+    objects by category and name. Pump Load has two bands.
+
+    Args:
+        path (str): Path of the h5 file.
+        start (str): First timestamp of the partition.
+        seed (int): Seed of the random property values.
+    """
+    rng = np.random.default_rng(seed)
+    generators = GENERATORS[::-1]
+    techs = [TECHS[i % len(TECHS)] for i in range(len(generators))]
+    gen_regions = [REGIONS[i % len(REGIONS)] for i in range(len(generators))]
+    times = pd.date_range(start, periods=PARTITION_HOURS, freq='H')
+    with h5py.File(path, 'w') as f:
+        f.attrs['h5plexos'] = 'v0.6.2'
+        f['metadata/objects/generators'] = _compound(name=generators, category=techs)
+        f['metadata/objects/regions'] = _compound(name=REGIONS, category=['Region'] * len(REGIONS))
+        f['metadata/objects/zones'] = _compound(name=ZONES, category=['Zone'] * len(ZONES))
+        f['metadata/relations/regions_generators'] = _compound(parent=gen_regions, child=generators)
+        f['metadata/relations/zones_generators'] = _compound(
+            parent=[REGION_ZONE[region] for region in gen_regions], child=generators)
+        f['metadata/times/interval'] = np.array(times.strftime('%Y-%m-%dT%H:%M:%S'), dtype='S')
+        datasets = {('generators', 'Generation'): (len(generators), 1),
+                    ('generators', 'Available Capacity'): (len(generators), 1),
+                    ('generators', 'Pump Load'): (len(generators), 2),
+                    ('regions', 'Load'): (len(REGIONS), 1),
+                    ('regions', 'Unserved Energy'): (len(REGIONS), 1),
+                    ('zones', 'Load'): (len(ZONES), 1)}
+        for (plexos_class, prop), (n_objects, n_bands) in datasets.items():
+            dset = f.create_dataset(f'data/ST/interval/{plexos_class}/{prop}',
+                                    data=rng.random((n_objects, len(times), n_bands)) * 100)
+            dset.attrs['units'] = np.bytes_(b'MW')
+            dset.attrs['period_offset'] = 0
+
+
+def write_scenario(folder: str, seeds: list = None) -> str:
+    """Writes the partitions of the test scenario.
+
+    Args:
+        folder (str): PLEXOS solutions folder.
+        seeds (list, optional): Seed of each partition. Defaults to None,
+            seeds 0, 1, 2.
+
+    Returns:
+        str: Scenario folder.
+    """
+    seeds = range(len(PARTITION_STARTS)) if seeds is None else seeds
+    scenario_folder = os.path.join(folder, SCENARIO)
+    os.makedirs(scenario_folder, exist_ok=True)
+    for i, (start, seed) in enumerate(zip(PARTITION_STARTS, seeds)):
+        write_partition(os.path.join(scenario_folder, f'Model_{SCENARIO}_P{i + 1}.h5'),
+                        start, seed)
+    return scenario_folder
+
+
+@pytest.fixture(scope='session')
+def solutions_folder(tmp_path_factory) -> str:
+    """PLEXOS solutions folder holding the test scenario."""
+    folder = str(tmp_path_factory.mktemp('plexos_solutions'))
+    write_scenario(folder)
+    REGION_MAPPING.to_csv(os.path.join(folder, 'Region_Mapping.csv'), index=False)
+    return folder
+
+
+@pytest.fixture
+def format_scenario(solutions_folder, tmp_path):
+    """Formats the test scenario, returning the path of the formatted file.
+
+    Settings default to FORMATTER_SETTINGS, any MarmotFormat argument can be
+    passed to override them, along with the output folder name.
+    """
+    marmot_h5_formatter = pytest.importorskip("marmot.marmot_h5_formatter")
+
+    def run(output: str = 'output', **kwargs) -> str:
+        settings = dict(FORMATTER_SETTINGS, **kwargs)
+        plexos_folder = settings.pop('PLEXOS_Solutions_folder', solutions_folder)
+        region_mapping = settings.pop('Region_Mapping', 
+                                      os.path.join(solutions_folder, 'Region_Mapping.csv'))
+        output_folder = os.path.join(str(tmp_path), output)
+        formatter = marmot_h5_formatter.MarmotFormat(
+            SCENARIO, plexos_folder, PLEXOS_PROPERTIES.copy(),
+            Marmot_Solutions_folder=output_folder, Region_Mapping=region_mapping,
+            **settings)
+        formatter.run_formatter()
+        return os.path.join(output_folder, 'Processed_HDF5_folder', f'{SCENARIO}_formatted.h5')
+    return run
+
+
+def assert_formatted_equal(file_name: str, other_file_name: str) -> None:
+    """Checks two formatted files hold the same properties, in the same order,
+    including every property of PLEXOS_PROPERTIES.
+
+    Args:
+        file_name (str): Path to formatted hdf5 file.
+        other_file_name (str): Path to the formatted hdf5 file to compare to.
+    """
+    from marmot.formatterutils.storage import formatted_keys, read_property
+    keys = sorted(key for key in formatted_keys(file_name) if key not in ('metadata', 'dims'))
+    other_keys = sorted(key for key in formatted_keys(other_file_name)
+                        if key not in ('metadata', 'dims'))
+    assert keys == other_keys
+    assert set(PROPERTY_KEYS) <= set(keys)
+    for key in keys:
+        pd.testing.assert_frame_equal(read_property(file_name, key),
+                                      read_property(other_file_name, key),
+                                      check_column_type=False)
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Derived properties calculated by DerivedPropertyGraph."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from marmot.formatterutils.derived import (DERIVED_PROPERTIES, DerivedPropertyGraph,
+                                           base_inputs, derived_order, register_derived_property)
+from marmot.formatterutils.storage import HDF5Backend
+
+
+def _generator_property(values) -> pd.DataFrame:
+    idx = pd.MultiIndex.from_product([pd.date_range('2024-01-01', periods=3, freq='H'),
+                                      ['gen_a', 'gen_b'], ['MW']],
+                                     names=['timestamp', 'gen_name', 'units'])
+    return pd.DataFrame({0: np.asarray(values, dtype=float)}, index=idx)
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return HDF5Backend(str(tmp_path / 'Base_formatted.h5'))
+
+
+def test_graph_calculates_derived_properties_from_added_properties(backend):
+    available = _generator_property(np.arange(6) + 10)
+    generation = _generator_property(np.arange(6))
+    graph = DerivedPropertyGraph(['generator_Curtailment', 'generator_Upward_Available_Capacity'],
+                                 backend)
+    graph.add('generator_Available_Capacity', available)
+    assert graph.pending == ['generator_Curtailment', 'generator_Upward_Available_Capacity']
+    graph.add('generator_Generation', generation)
+    assert graph.pending == []
+    assert graph.frames == {}
+    pd.testing.assert_frame_equal(backend.read('generator_Curtailment'), available - generation)
+    pd.testing.assert_frame_equal(backend.read('generator_Upward_Available_Capacity'),
+                                  available - generation)
+
+
+def test_finish_reads_inputs_saved_by_a_previous_run(backend):
+    unserved_energy = _generator_property(np.arange(6))
+    backend.save(unserved_energy, 'region_Unserved_Energy')
+    graph = DerivedPropertyGraph(['region_Cost_Unserved_Energy'], backend, VoLL=100)
+    graph.finish()
+    pd.testing.assert_frame_equal(backend.read('region_Cost_Unserved_Energy'),
+                                  unserved_energy * 100)
+
+
+def test_finish_links_aliases_without_reading(backend, monkeypatch):
+    curtailment = _generator_property(np.arange(6))
+    backend.save(curtailment, 'generator_Curtailment')
+
+    def read(key):
+        raise AssertionError(f"{key} was read")
+    monkeypatch.setattr(backend, 'read', read)
+    graph = DerivedPropertyGraph(['generator_Upward_Available_Capacity'], backend)
+    graph.finish()
+    assert graph.pending == []
+    monkeypatch.undo()
+    pd.testing.assert_frame_equal(backend.read('generator_Upward_Available_Capacity'), curtailment)
+
+
+def test_finish_skips_aliases_of_missing_properties(backend):
+    graph = DerivedPropertyGraph(['generator_Upward_Available_Capacity'], backend)
+    graph.finish()
+    assert graph.pending == []
+    assert 'generator_Upward_Available_Capacity' not in backend.keys()
+
+
+def test_registry_of_a_run_is_separate():
+    registry = dict(DERIVED_PROPERTIES)
+    register_derived_property('region_Net_Load', ['region_Load', 'generator_Curtailment'],
+                              lambda load, curtailment, **kwargs: load, registry=registry)
+    assert 'region_Net_Load' not in DERIVED_PROPERTIES
+    assert base_inputs('region_Net_Load', registry) == {'region_Load',
+                                                        'generator_Available_Capacity',
+                                                        'generator_Generation'}
+    order = derived_order(['region_Net_Load', 'generator_Curtailment'], registry)
+    assert order == ['generator_Curtailment', 'region_Net_Load']
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""MarmotFormat.run_formatter behaviour."""
+
+import pytest
+
+from marmot.meta_data import MetaData
+
+
+def test_partitions_are_closed_if_formatting_fails(format_scenario, monkeypatch):
+    marmot_h5_formatter = pytest.importorskip("marmot.marmot_h5_formatter")
+    closed = []
+    close = marmot_h5_formatter.SolutionPool.close
+
+    def record_close(pool, partition=None):
+        closed.append(partition)
+        close(pool, partition)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("formatting failed")
+    monkeypatch.setattr(marmot_h5_formatter.SolutionPool, 'close', record_close)
+    monkeypatch.setattr(marmot_h5_formatter.MarmotFormat, '_iter_processed_properties', fail)
+    with pytest.raises(RuntimeError, match="formatting failed"):
+        format_scenario()
+    assert None in closed
+    assert MetaData.h5_data is None
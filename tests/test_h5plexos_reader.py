@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""Parity of H5PlexosReader with h5plexos PLEXOSSolution."""
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import SCENARIO, assert_formatted_equal
+from marmot.formatterutils.h5plexos_reader import H5PlexosReader
+
+query = pytest.importorskip("h5plexos.query")
+
+
+def _reader_series(db: H5PlexosReader, plexos_class: str, prop: str) -> pd.Series:
+    """Gets a property read by H5PlexosReader as a Series."""
+    arrays = db.query_property(plexos_class, prop)
+    idx = pd.MultiIndex(levels=arrays.levels, codes=arrays.codes, names=arrays.names)
+    return pd.Series(arrays.values, index=idx)
+
+
+def _object_order(series: pd.Series) -> list:
+    """Gets the order of the (category, name) objects of a property."""
+    return list(pd.unique(pd.Series(list(zip(series.index.get_level_values('category'),
+                                                 series.index.get_level_values('name'))))))
+
+
+@pytest.mark.parametrize('prop, n_bands', [('Generation', 1), ('Pump Load', 2)])
+def test_query_property_matches_plexos_solution(solutions_folder, prop, n_bands):
+    path = os.path.join(solutions_folder, SCENARIO, f'Model_{SCENARIO}_P1.h5')
+    db = H5PlexosReader(path)
+    solution = query.PLEXOSSolution(path)
+    try:
+        native = _reader_series(db, 'generator', prop)
+        expected = solution.query_object_property('generator', prop)
+    finally:
+        db.close()
+        solution.close()
+
+    assert _object_order(native) == _object_order(expected)
+    assert ('band' in native.index.names) == (n_bands > 1)
+
+    # Compare values on the levels both readers report
+    expected = expected.droplevel('property')
+    if n_bands == 1:
+        expected = expected.droplevel('band')
+    else:
+        expected.index = expected.index.set_levels(
+            expected.index.levels[expected.index.names.index('band')].astype(int), level='band')
+    expected = expected.reorder_levels(native.index.names).sort_index()
+    native = native.sort_index()
+    assert native.index.equals(expected.index)
+    np.testing.assert_array_equal(native.to_numpy(), expected.to_numpy())
+
+
+def test_native_reader_formats_same_output(format_scenario):
+    plexos_solution = format_scenario('plexos_solution', native_reader=False)
+    native = format_scenario('native', native_reader=True)
+    assert_formatted_equal(native, plexos_solution)
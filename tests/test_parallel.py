@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+"""Formatting with worker processes gives the same output as a sequential run."""
+
+import pytest
+
+from conftest import assert_formatted_equal
+
+
+@pytest.mark.parametrize('settings', [dict(native_reader=False), dict(native_reader=True)])
+def test_num_workers_matches_sequential_run(format_scenario, settings):
+    sequential = format_scenario('sequential', num_workers=1, **settings)
+    parallel = format_scenario('parallel', num_workers=2, **settings)
+    assert_formatted_equal(parallel, sequential)
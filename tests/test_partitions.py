@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""Overlapping and duplicated periods of h5plexos partitions."""
+
+import logging
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import PARTITION_HOURS, PARTITION_STARTS
+from marmot.formatterutils.storage import read_property
+
+marmot_h5_formatter = pytest.importorskip("marmot.marmot_h5_formatter")
+Process = marmot_h5_formatter.Process
+
+logger = logging.getLogger('marmot_format')
+
+
+def _partition(start: str, periods: int = 4) -> pd.DataFrame:
+    """Processed data of a partition, in the object major order of the formatter."""
+    idx = pd.MultiIndex.from_product([['gen_a', 'gen_b'],
+                                      pd.date_range(start, periods=periods, freq='H')],
+                                     names=['gen_name', 'timestamp'])
+    idx = idx.reorder_levels(['timestamp', 'gen_name'])
+    return pd.DataFrame({0: np.arange(len(idx), dtype='float32')}, index=idx)
+
+
+def test_partition_time_range_ignores_unused_levels():
+    df = _partition('2024-01-01 00:00')
+    df = df[df.index.get_level_values('timestamp') > '2024-01-01 00:00']
+    assert Process.partition_time_range(df) == (pd.Timestamp('2024-01-01 01:00'),
+                                                pd.Timestamp('2024-01-01 03:00'))
+
+
+def test_trim_partition_overlap(caplog):
+    df = _partition('2024-01-01 02:00')
+    with caplog.at_level(logging.INFO, logger='marmot_format'):
+        trimmed = Process.trim_partition_overlap(df, pd.Timestamp('2024-01-01 03:00'),
+                                                 'Model_P2', logger)
+    pd.testing.assert_frame_equal(
+        trimmed, df[df.index.get_level_values('timestamp') > '2024-01-01 03:00'])
+    assert 'removed 4 rows' in caplog.text
+
+
+def test_trim_partition_without_overlap():
+    df = _partition('2024-01-01 02:00')
+    assert Process.trim_partition_overlap(df, pd.Timestamp('2024-01-01 01:00'),
+                                          'Model_P2', logger) is df
+
+
+def test_drop_partition_duplicates():
+    df = _partition('2024-01-01')
+    assert Process.drop_partition_duplicates(df, 'Model_P1', logger) is df
+    duplicated = pd.concat([df, df.iloc[:3] + 100])
+    pd.testing.assert_frame_equal(Process.drop_partition_duplicates(duplicated, 'Model_P1', logger),
+                                  df)
+
+
+@pytest.mark.parametrize('settings', [dict(), dict(streaming=True)], ids=['in_memory', 'streaming'])
+def test_formatted_property_has_each_period_once(format_scenario, settings):
+    df = read_property(format_scenario(**settings), 'generator_Generation')
+    assert df.index.is_unique
+    timestamps = df.index.unique('timestamp')
+    expected = pd.date_range(PARTITION_STARTS[0], pd.Timestamp(PARTITION_STARTS[-1])
+                             + pd.Timedelta(hours=PARTITION_HOURS - 1), freq='H')
+    pd.testing.assert_index_equal(timestamps.sort_values(), expected, check_names=False,
+                                  exact=False)
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""PlotDataHelper data preparation."""
+
+import logging
+import pandas as pd
+import pytest
+
+pytest.importorskip("matplotlib")
+from marmot.plottingmodules.plotutils.plot_data_helper import PlotDataHelper
+
+GEN_NAMES = {'Gas-CC': 'Gas', 'Coal': 'Coal', 'PV': 'Solar'}
+
+
+def _helper() -> PlotDataHelper:
+    return PlotDataHelper('.', 'region', ['Coal', 'Gas', 'Solar', 'Other'], {}, ['Base'],
+                          [], [], GEN_NAMES)
+
+
+def _generation() -> pd.DataFrame:
+    idx = pd.MultiIndex.from_product([pd.date_range('2024-01-01', periods=2, freq='H'),
+                                      ['Gas-CC', 'Coal', 'PV', 'Wind'], ['p1', 'p2']],
+                                     names=['timestamp', 'tech', 'region'])
+    return pd.DataFrame({0: range(len(idx))}, index=idx, dtype=float)
+
+
+def test_rename_gen_techs_index(caplog):
+    df = _generation()
+    renamed = _helper().rename_gen_techs(df)
+    expected = df.rename(index=lambda x: GEN_NAMES.get(x, 'Other'), level='tech')
+    pd.testing.assert_frame_equal(renamed.reset_index().astype({'tech': object}),
+                                  expected.reset_index())
+    assert "{'Wind'}" in caplog.text
+
+
+def test_rename_gen_techs_column():
+    df = _generation().reset_index()
+    renamed = _helper().rename_gen_techs(df.copy())
+    assert renamed['tech'].astype(object).tolist() == [GEN_NAMES.get(tech, 'Other')
+                                                       for tech in df['tech']]
+
+
+def test_rename_gen_techs_warns_only_for_used_techs(caplog):
+    # Wind remains in the index levels after its rows are filtered out
+    df = _generation()
+    df = df[df.index.get_level_values('tech') != 'Wind']
+    with caplog.at_level(logging.WARNING):
+        _helper().rename_gen_techs(df)
+    assert 'could not be re-classified' not in caplog.text
@@ -0,0 +1,535 @@
+# -*- coding: utf-8 -*-
+"""Each PROCESS_SPECS entry formats the same frame as the Process method it replaced."""
+
+import logging
+import numpy as np
+import pandas as pd
+import h5py
+import pytest
+
+from conftest import _compound
+
+marmot_h5_formatter = pytest.importorskip("marmot.marmot_h5_formatter")
+from marmot.meta_data import MetaData
+
+Process = marmot_h5_formatter.Process
+PROCESS_SPECS = marmot_h5_formatter.PROCESS_SPECS
+
+MODEL = 'Model_Base_P1.h5'
+TIMES = pd.date_range('2024-01-01', periods=4, freq='H')
+
+GENERATORS = pd.DataFrame({'name': ['gen_a', 'gen_b', 'gen_c', 'gen_d', 'gen_e'],
+                           'category': ['Coal', 'Coal', 'Gas-CC', 'PV', 'Storage']})
+GEN_REGION = {'gen_a': 'p1', 'gen_b': 'p2', 'gen_c': 'p1', 'gen_d': 'p3', 'gen_e': 'p2'}
+REGION_ZONE = {'p1': 'z1', 'p2': 'z1', 'p3': 'z2'}
+NODE_REGION = {'n1': 'p1', 'n2': 'p2', 'n3': 'p3'}
+# reserve_1 spans generators of two regions
+RESERVE_GENERATORS = [('reserve_1', 'gen_a'), ('reserve_1', 'gen_b'),
+                      ('reserve_2', 'gen_d')]
+REGION_MAPPING = pd.DataFrame({'region': ['p1', 'p2', 'p3'],
+                               'Interconnect': ['East', 'East', 'West']})
+EMIT_NAMES = pd.DataFrame({'Original': ['CO2_coal', 'CO2_gas', 'NOx'],
+                           'New': ['CO2', 'CO2', 'NOx']})
+
+# Objects and relations of each class, as (index names, [(first, second) ...])
+CLASS_OBJECTS = {
+    'generator': (['category', 'name'], list(zip(GENERATORS['category'], GENERATORS['name']))),
+    'region': (['category', 'name'], [('Region', 'p1'), ('Region', 'p2'), ('Region', 'p3')]),
+    'zone': (['category', 'name'], [('Zone', 'z1'), ('Zone', 'z2')]),
+    'line': (['category', 'name'], [('AC', 'l1'), ('AC', 'l2'), ('DC', 'l3')]),
+    'interface': (['category', 'name'], [('Interfaces', 'i1'), ('Interfaces', 'i2')]),
+    'reserve': (['category', 'name'], [('Raise', 'reserve_1'), ('Raise', 'reserve_2')]),
+    'reserves_generators': (['parent', 'child'], RESERVE_GENERATORS),
+    'fuel': (['category', 'name'], [('Fuels', 'coal'), ('Fuels', 'gas')]),
+    'constraint': (['category', 'name'], [('Limits', 'c1'), ('Limits', 'c2')]),
+    'emission': (['category', 'name'], [('Emissions', 'CO2_coal'), ('Emissions', 'NOx')]),
+    'emissions_generators': (['parent', 'child'], [('CO2_coal', 'gen_a'), ('CO2_gas', 'gen_c'),
+                                                   ('NOx', 'gen_a'), ('NOx', 'gen_c')]),
+    'storage': (['category', 'name'], [('Storages', 'head_e')]),
+    'region_regions': (['parent', 'child'], [('p1', 'p2'), ('p2', 'p1'), ('p2', 'p3')]),
+    'node': (['category', 'name'], [('Nodes', 'n1'), ('Nodes', 'n2'), ('Nodes', 'n3')]),
+    'abatement': (['category', 'name'], [('Abatements', 'a1')]),
+    'batterie': (['category', 'name'], [('Batteries', 'b1'), ('Batteries', 'b2')]),
+}
+
+
+@pytest.fixture(scope='module')
+def metadata(tmp_path_factory):
+    """MetaData of a h5plexos partition holding the objects and relations of CLASS_OBJECTS."""
+    folder = tmp_path_factory.mktemp('process')
+    gens = GENERATORS['name']
+    with h5py.File(folder / MODEL, 'w') as f:
+        f['metadata/objects/generators'] = _compound(name=gens, category=GENERATORS['category'])
+        f['metadata/objects/regions'] = _compound(name=list(REGION_ZONE),
+                                                  category=['Region'] * len(REGION_ZONE))
+        f['metadata/relations/regions_generators'] = _compound(
+            parent=[GEN_REGION[gen] for gen in gens], child=gens)
+        f['metadata/relations/zones_generators'] = _compound(
+            parent=[REGION_ZONE[GEN_REGION[gen]] for gen in gens], child=gens)
+        f['metadata/relations/reserves_generators'] = _compound(
+            parent=[reserve for reserve, _ in RESERVE_GENERATORS],
+            child=[gen for _, gen in RESERVE_GENERATORS])
+        f['metadata/relations/generators_headstorage'] = _compound(parent=['gen_e'],
+                                                                   child=['head_e'])
+        f['metadata/relations/nodes_region'] = _compound(parent=list(NODE_REGION),
+                                                         child=list(NODE_REGION.values()))
+        f['metadata/relations/nodes_zone'] = _compound(
+            parent=list(NODE_REGION), child=[REGION_ZONE[r] for r in NODE_REGION.values()])
+    yield MetaData(str(folder), read_from_formatted_h5=False, Region_Mapping=REGION_MAPPING)
+    MetaData.close_h5()
+
+
+def _h5plexos_series(plexos_class: str) -> pd.Series:
+    """A property of the class, laid out as h5plexos query results."""
+    names, objects = CLASS_OBJECTS[plexos_class]
+    first, second = zip(*objects)
+    n_times = len(TIMES)
+    idx = pd.MultiIndex.from_arrays([np.repeat(first, n_times), np.repeat(second, n_times),
+                                     ['Prop'] * len(objects) * n_times,
+                                     ['1'] * len(objects) * n_times,
+                                     np.tile(TIMES, len(objects))],
+                                    names=names + ['property', 'band', 'timestamp'])
+    values = np.random.default_rng(len(plexos_class)).random(len(idx)) * 100
+    return pd.Series(values, index=idx)
+
+
+def _as_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Index levels as columns, so frames are compared independent of level codes."""
+    return df.reset_index().astype({0: 'float64'})
+
+
+@pytest.mark.parametrize('region_mapping', [REGION_MAPPING, pd.DataFrame()],
+                         ids=['Region_Mapping', 'no_Region_Mapping'])
+@pytest.mark.parametrize('plexos_class', list(PROCESS_SPECS))
+def test_spec_matches_previous_method(metadata, plexos_class, region_mapping):
+    df = _h5plexos_series(plexos_class)
+    logger = logging.getLogger('marmot_format')
+    spec_df = Process(df, metadata, MODEL, region_mapping, EMIT_NAMES, logger).process(plexos_class)
+    wrapper_df = getattr(Process(df, metadata, MODEL, region_mapping, EMIT_NAMES, logger),
+                         f'df_process_{plexos_class}')()
+    previous_df = getattr(PreviousProcess(df, metadata, MODEL, region_mapping, EMIT_NAMES, logger),
+                          f'df_process_{plexos_class}')()
+
+    assert list(spec_df.index.names) == list(previous_df.index.names)
+    pd.testing.assert_frame_equal(_as_columns(spec_df), _as_columns(previous_df),
+                                  check_dtype=False)
+    pd.testing.assert_frame_equal(wrapper_df, spec_df)
+
+
+class PreviousProcess(Process):
+    """The class specific methods of Process before PROCESS_SPECS, kept verbatim as reference."""
+
+    def df_process_generator(self) -> pd.DataFrame:
+        """Format PLEXOS Generator Class data.
+
+        Returns:
+            pd.DataFrame: Processed output, single value column with multiindex.
+        """
+        df = self.df.droplevel(level=["band", "property"])
+        df.index.rename(['tech', 'gen_name'], level=['category', 'name'], inplace=True)
+
+        if self.metadata.region_generator_category(self.model).empty is False:
+            region_gen_idx = pd.CategoricalIndex(self.metadata.region_generator_category(self.model)
+                                                     .index.get_level_values(0))
+            region_gen_idx = region_gen_idx.repeat(len(df.index.get_level_values('timestamp').unique()))
+
+            idx_region = pd.MultiIndex(levels=df.index.levels + [region_gen_idx.categories],
+                                       codes=df.index.codes + [region_gen_idx.codes],
+                                       names=df.index.names + region_gen_idx.names)
+        else:
+            idx_region = df.index
+
+        if self.metadata.zone_generator_category(self.model).empty is False:
+            zone_gen_idx = pd.CategoricalIndex(self.metadata.zone_generator_category(self.model)
+                                                   .index.get_level_values(0))
+            zone_gen_idx = zone_gen_idx.repeat(len(df.index.get_level_values('timestamp').unique()))
+
+            idx_zone = pd.MultiIndex(levels=idx_region.levels + [zone_gen_idx.categories],
+                                     codes=idx_region.codes + [zone_gen_idx.codes],
+                                     names=idx_region.names + zone_gen_idx.names)
+        else:
+            idx_zone = idx_region
+
+        if not self.Region_Mapping.empty:
+            region_gen_mapping_idx = pd.MultiIndex.from_frame(self.metadata.region_generator_category(self.model)
+                                                              .merge(self.Region_Mapping,
+                                                                     how="left",
+                                                                     on='region')
+                                                              .sort_values(by=['tech', 'gen_name'])
+                                                              .drop(['region', 'tech', 'gen_name'], axis=1)
+                                                              )
+            region_gen_mapping_idx = region_gen_mapping_idx.repeat(len(df.index.get_level_values('timestamp').unique()))
+
+            idx_map = pd.MultiIndex(levels=idx_zone.levels + region_gen_mapping_idx.levels,
+                                    codes=idx_zone.codes + region_gen_mapping_idx.codes,
+                                    names=idx_zone.names + region_gen_mapping_idx.names)
+        else:
+            idx_map = idx_zone
+
+        df = pd.DataFrame(data=df.values.reshape(-1), index=idx_map)
+        df_col = list(df.index.names)  # Gets names of all columns in df and places in list
+        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
+        df = df.reorder_levels(df_col, axis=0)
+        df[0] = pd.to_numeric(df[0], downcast='float')
+
+        return df
+
+    def df_process_region(self) -> pd.DataFrame:
+        """Format PLEXOS Region Class data.
+
+        Returns:
+            pd.DataFrame: Processed output, single value column with multiindex.
+        """
+        df = self.df.droplevel(level=["band", "property", "category"])
+        df.index.rename('region', level='name', inplace=True)
+        # checks if Region_Mapping contains data to merge, skips if empty
+        if not self.Region_Mapping.empty:  
+            mapping_idx = pd.MultiIndex.from_frame(self.metadata.regions(self.model)
+                                                   .merge(self.Region_Mapping,
+                                                          how="left",
+                                                          on='region')
+                                                   .drop(['region', 'category'], axis=1)
+                                                   )
+            mapping_idx = mapping_idx.repeat(len(df.index.get_level_values('timestamp').unique()))
+
+            idx = pd.MultiIndex(levels=df.index.levels + mapping_idx.levels,
+                                codes=df.index.codes + mapping_idx.codes,
+                                names=df.index.names + mapping_idx.names)
+        else:
+            idx = df.index
+        df = pd.DataFrame(data=df.values.reshape(-1), index=idx)
+        df_col = list(df.index.names)  # Gets names of all columns in df and places in list
+        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # Move timestamp to start of df
+        df = df.reorder_levels(df_col, axis=0)
+        df[0] = pd.to_numeric(df[0], downcast='float')
+        return df
+
+    def df_process_zone(self) -> pd.DataFrame:
+        """Format PLEXOS Zone Class data.
+
+        Returns:
+            pd.DataFrame: Processed output, single value column with multiindex.
+        """
+        df = self.df.droplevel(level=["band", "property", "category"])
+        df.index.rename('zone', level='name', inplace=True)
+        df = pd.DataFrame(data=df.values.reshape(-1), index=df.index)
+        df_col = list(df.index.names)  # Gets names of all columns in df and places in list
+        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
+        df = df.reorder_levels(df_col, axis=0)
+        df[0] = pd.to_numeric(df[0], downcast='float')
+        return df
+
+    def df_process_line(self) -> pd.DataFrame:
+        """Format PLEXOS Line Class data.
+
+        Returns:
+            pd.DataFrame: Processed output, single value column with multiindex.
+        """
+        df = self.df.droplevel(level=["band", "property", "category"])
+        df.index.rename('line_name', level='name', inplace=True)
+        df = pd.DataFrame(data=df.values.reshape(-1), index=df.index)
+        df_col = list(df.index.names)  # Gets names of all columns in df and places in list
+        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
+        df = df.reorder_levels(df_col, axis=0)
+        df[0] = pd.to_numeric(df[0], downcast='float')
+        return df
+
+    def df_process_interface(self) -> pd.DataFrame:
+        """Format PLEXOS PLEXOS Interface Class data.
+
+        Returns:
+            pd.DataFrame: Processed output, single value column with multiindex.
+        """
+        df = self.df.droplevel(level=["band", "property"])
+        df.index.rename(['interface_name', 'interface_category'], 
+                            level=['name', 'category'], inplace=True)
+        df = pd.DataFrame(data=df.values.reshape(-1), index=df.index)
+        df_col = list(df.index.names)  # Gets names of all columns in df and places in list
+        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
+        df = df.reorder_levels(df_col, axis=0)
+        df[0] = pd.to_numeric(df[0], downcast='float')
+        return df
+
+    def df_process_reserve(self) -> pd.DataFrame:
+        """Format PLEXOS Reserve Class data.
+
+        Returns:
+            pd.DataFrame: Processed output, single value column with multiindex.
+        """
+        df = self.df.droplevel(level=["band", "property"])
+        df.index.rename(['parent', 'Type'], level=['name', 'category'], inplace=True)
+        df = df.reset_index()  # unzip the levels in index
+        if self.metadata.reserves_regions(self.model).empty is False:
+            # Merges in regions where reserves are located
+            df = df.merge(self.metadata.reserves_regions(self.model), 
+                            how='left', on='parent')  
+        if self.metadata.reserves_zones(self.model).empty is False:
+            # Merges in zones where reserves are located
+            df = df.merge(self.metadata.reserves_zones(self.model), 
+                            how='left', on='parent')  
+        df_col = list(df.columns)  # Gets names of all columns in df and places in list
+        df_col.remove(0)
+        # move timestamp to start of df
+        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  
+        df.set_index(df_col, inplace=True)
+        df[0] = pd.to_numeric(df[0], downcast='float')
+        return df
+
+    def df_process_reserves_generators(self) -> pd.DataFrame:
+        """Format PLEXOS Reserve_Generators Relational Class data.
+
+        Returns:
+            pd.DataFrame: Processed output, single value column with multiindex.
+        """
+        df = self.df.droplevel(level=["band", "property"])
+        df.index.rename(['gen_name'], level=['child'], inplace=True)
+        df = df.reset_index()  # unzip the levels in index
+        df = df.merge(self.metadata.generator_category(self.model), 
+                        how='left', on='gen_name')
+
+        # merging in generator region/zones first prevents double 
+        # counting in cases where multiple model regions are within a reserve region
+        if self.metadata.region_generators(self.model).empty is False:
+            df = df.merge(self.metadata.region_generators(self.model), 
+                            how='left', on='gen_name')
+        if self.metadata.zone_generators(self.model).empty is False:
+            df = df.merge(self.metadata.zone_generators(self.model), 
+                            how='left', on='gen_name')
+
+        # now merge in reserve regions/zones
+        if self.metadata.reserves_regions(self.model).empty is False:
+            # Merges in regions where reserves are located
+            df = df.merge(self.metadata.reserves_regions(self.model), 
+                            how='left', on=['parent', 'region'])  
+        if self.metadata.reserves_zones(self.model).empty is False:
+            # Merges in zones where reserves are located
+            df = df.merge(self.metadata.reserves_zones(self.model), 
+                            how='left', on=['parent', 'zone'])  
+
+        df_col = list(df.columns)  # Gets names of all columns in df and places in list
+        df_col.remove(0)
+        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
+        df.set_index(df_col, inplace=True)
+        df[0] = pd.to_numeric(df[0], downcast='float')
+        return df
+
+    def df_process_fuel(self) -> pd.DataFrame:
+        """Format PLEXOS Fuel Class data.
+
+        Returns:
+            pd.DataFrame: Processed output, single value column with multiindex.
+        """
+        df = self.df.droplevel(level=["band", "property", "category"])
+        df.index.rename('fuel_type', level='name', inplace=True)
+        df = pd.DataFrame(data=df.values.reshape(-1), index=df.index)
+        df_col = list(df.index.names)  # Gets names of all columns in df and places in list
+        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
+        df = df.reorder_levels(df_col, axis=0)
+        df[0] = pd.to_numeric(df[0], downcast='float')
+        return df
+
+    def df_process_constraint(self) -> pd.DataFrame:
+        """Format PLEXOS Constraint Class data.
+
+        Returns:
+            pd.DataFrame: Processed output, single value column with multiindex.
+        """
+        df = self.df.droplevel(level=["band", "property"])
+        df.index.rename(['constraint_category', 'constraint'], 
+                            level=['category', 'name'], inplace=True)
+        df = pd.DataFrame(data=df.values.reshape(-1), index=df.index)
+        df_col = list(df.index.names)  # Gets names of all columns in df and places in list
+        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
+        df = df.reorder_levels(df_col, axis=0)
+        df[0] = pd.to_numeric(df[0], downcast='float')
+        return df
+
+    def df_process_emission(self) -> pd.DataFrame:
+        """Format PLEXOS Emission Class data.
+
+        Returns:
+            pd.DataFrame: Processed output, single value column with multiindex.
+        """
+        df = self.df.droplevel(level=["band", "property"])
+        df.index.rename('emission_type', level='name', inplace=True)
+        df = pd.DataFrame(data=df.values.reshape(-1), index=df.index)
+        df_col = list(df.index.names)  # Gets names of all columns in df and places in list
+        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
+        df = df.reorder_levels(df_col, axis=0)
+        df[0] = pd.to_numeric(df[0], downcast='float')
+        return df
+
+    def df_process_emissions_generators(self) -> pd.DataFrame:
+        """Format PLEXOS Emissions_Generators Relational Class data.
+
+        Returns:
+            pd.DataFrame: Processed output, single value column with multiindex.
+        """
+        df = self.df.droplevel(level=["band", "property"])
+        df.index.rename(['gen_name'], level=['child'], inplace=True)
+        df.index.rename(['pollutant'], level=['parent'], inplace=True)
+
+        df = df.reset_index()  # unzip the levels in index
+        # merge in tech information
+        df = df.merge(self.metadata.generator_category(self.model), 
+                        how='left', on='gen_name') 
+        # merge in region and zone information
+        if self.metadata.region_generator_category(self.model).empty is False:
+            # merge in region information
+            df = df.merge(self.metadata.region_generator_category(self.model).reset_index(), 
+                                how='left', on=['gen_name', 'tech'])
+        if self.metadata.zone_generator_category(self.model).empty is False:
+            # Merges in zones where reserves are located
+            df = df.merge(self.metadata.zone_generator_category(self.model).reset_index(), 
+                                how='left', on=['gen_name', 'tech'])  
+        if not self.Region_Mapping.empty:
+            df = df.merge(self.Region_Mapping, how="left", on="region")
+
+        if not self.emit_names.empty:
+            # reclassify emissions as specified by user in mapping
+            df['pollutant'] = pd.Categorical(df['pollutant'].map(lambda x: self.emit_names_dict.get(x, x)))
+
+        # remove categoricals (otherwise h5 save will fail)
+        df = df.astype({'tech': 'object', 'pollutant': 'object'})
+
+        # Checks if all emissions categories have been identified and matched. 
+        # If not, lists categories that need a match
+        if not self.emit_names.empty:
+            if self.emit_names_dict != {} and (set(df['pollutant'].unique()).issubset(self.emit_names["New"].unique())) is False:
+                missing_emit_cat = list((set(df['pollutant'].unique())) - (set(self.emit_names["New"].unique())))
+                self.logger.warning(f"The following emission objects do not have a correct category mapping: {missing_emit_cat}\n")
+
+        df_col = list(df.columns)  # Gets names of all columns in df and places in list
+        df_col.remove(0)
+        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
+        df.set_index(df_col, inplace=True)
+        # downcast values to save on memory
+        df[0] = pd.to_numeric(df[0].values, downcast='float')
+        # convert to range index (otherwise h5 save will fail)
+        df.columns = pd.RangeIndex(0, 1, step=1)
+        return df
+
+    def df_process_storage(self) -> pd.DataFrame:
+        """Format PLEXOS Storage Class data.
+
+        Returns:
+            pd.DataFrame: Processed output, single value column with multiindex.
+        """
+        df = self.df.droplevel(level=["band", "property", "category"])
+        df = df.reset_index()  # unzip the levels in index
+        df = df.merge(self.metadata.generator_storage(self.model), 
+                        how='left', on='name')
+        if self.metadata.region_generators(self.model).empty is False:
+            # Merges in regions where generators are located
+            df = df.merge(self.metadata.region_generators(self.model),
+                            how='left', on='gen_name')  
+        if self.metadata.zone_generators(self.model).empty is False:
+            # Merges in zones where generators are located
+            df = df.merge(self.metadata.zone_generators(self.model), 
+                            how='left', on='gen_name')  
+        # checks if Region_Maping contains data to merge, skips if empty (Default)
+        if not self.Region_Mapping.empty:
+            # Merges in all Region Mappings
+            df = df.merge(self.Region_Mapping, how='left', on='region')  
+        df.rename(columns={'name': 'storage_resource'}, inplace=True)
+        df_col = list(df.columns)  # Gets names of all columns in df and places in list
+        df_col.remove(0)  # Removes 0, the data column from the list
+        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
+        df.set_index(df_col, inplace=True)
+        df[0] = pd.to_numeric(df[0], downcast='float')
+        return df
+
+    def df_process_region_regions(self) -> pd.DataFrame:
+        """Format PLEXOS Region_Regions Relational Class data.
+
+        Returns:
+            pd.DataFrame: Processed output, single value column with multiindex.
+        """
+        df = self.df.droplevel(level=["band", "property"])
+        df = pd.DataFrame(data=df.values.reshape(-1), index=df.index)
+        df_col = list(df.index.names)  # Gets names of all columns in df and places in list
+        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
+        df = df.reorder_levels(df_col, axis=0)
+        df[0] = pd.to_numeric(df[0], downcast='float')
+        return df
+
+    def df_process_node(self) -> pd.DataFrame:
+        """Format PLEXOS Node Class data.
+
+        Returns:
+            pd.DataFrame: Processed output, single value column with multiindex.
+        """
+        df = self.df.droplevel(level=["band", "property", "category"])
+        df.index.rename('node', level='name', inplace=True)
+        df.sort_index(level=['node'], inplace=True)
+        if self.metadata.node_region(self.model).empty is False:
+            node_region_idx = pd.CategoricalIndex(self.metadata.node_region(self.model).index.get_level_values(0))
+            node_region_idx = node_region_idx.repeat(len(df.index.get_level_values('timestamp').unique()))
+            idx_region = pd.MultiIndex(levels=df.index.levels + [node_region_idx.categories],
+                                       codes=df.index.codes + [node_region_idx.codes],
+                                       names=df.index.names + node_region_idx.names)
+        else:
+            idx_region = df.index
+        if self.metadata.node_zone(self.model).empty is False:
+            node_zone_idx = pd.CategoricalIndex(self.metadata.node_zone(self.model).index.get_level_values(0))
+            node_zone_idx = node_zone_idx.repeat(len(df.index.get_level_values('timestamp').unique()))
+            idx_zone = pd.MultiIndex(levels=idx_region.levels + [node_zone_idx.categories],
+                                     codes=idx_region.codes + [node_zone_idx.codes],
+                                     names=idx_region.names + node_zone_idx.names)
+        else:
+            idx_zone = idx_region
+        if not self.Region_Mapping.empty:
+            region_mapping_idx = pd.MultiIndex.from_frame(self.metadata.node_region(self.model)
+                                                          .merge(self.Region_Mapping,
+                                                                 how="left",
+                                                                 on='region')
+                                                          .drop(['region', 'node'], axis=1)
+                                                          )
+            region_mapping_idx = region_mapping_idx.repeat(len(df.index.get_level_values('timestamp').unique()))
+
+            idx_map = pd.MultiIndex(levels=idx_zone.levels + region_mapping_idx.levels,
+                                    codes=idx_zone.codes + region_mapping_idx.codes,
+                                    names=idx_zone.names + region_mapping_idx.names)
+        else:
+            idx_map = idx_zone
+
+        df = pd.DataFrame(data=df.values.reshape(-1), index=idx_map)
+        df_col = list(df.index.names)  # Gets names of all columns in df and places in list
+        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
+        df = df.reorder_levels(df_col, axis=0)
+        df[0] = pd.to_numeric(df[0], downcast='float')
+        return df
+
+    def df_process_abatement(self):
+        """Format PLEXOS Abatement Class data.
+
+        Returns:
+            pd.DataFrame: Processed output, single value column with multiindex.
+        """
+        df = self.df.droplevel(level=["band", "property"])
+        df.index.rename('abatement_name', level='name', inplace=True)
+        df = pd.DataFrame(data=df.values.reshape(-1), index=df.index)
+        df_col = list(df.index.names)  # Gets names of all columns in df and places in list
+        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
+        df = df.reorder_levels(df_col, axis=0)
+        df[0] = pd.to_numeric(df[0], downcast='float')
+        return df
+
+    def df_process_batterie(self):
+        """
+        Method for formatting data which comes form the PLEXOS Batteries Class
+
+        Returns
+        -------
+        df : pd.DataFrame
+            Processed Output, single value column with multiindex.
+
+        """
+        df = self.df.droplevel(level=["band", "property"])
+        df.index.rename('battery_name', level='name', inplace=True)
+        df = pd.DataFrame(data=df.values.reshape(-1), index=df.index)
+        df_col = list(df.index.names)  # Gets names of all columns in df and places in list
+        df_col.insert(0, df_col.pop(df_col.index("timestamp")))  # move timestamp to start of df
+        df = df.reorder_levels(df_col, axis=0)
+        df[0] = pd.to_numeric(df[0], downcast='float')
+        return df
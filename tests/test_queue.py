@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""Formatting through the distributed work queue with local workers."""
+
+import os
+import concurrent.futures
+import multiprocessing
+import pytest
+
+from conftest import FORMATTER_SETTINGS, PLEXOS_PROPERTIES, SCENARIO, assert_formatted_equal
+
+marmot_h5_formatter = pytest.importorskip("marmot.marmot_h5_formatter")
+from marmot.formatterutils.work_queue import WorkQueue
+
+CLAIM_TIMEOUT = 600
+
+
+def test_queue_workers_match_sequential_run(format_scenario, solutions_folder, tmp_path):
+    sequential = format_scenario('sequential')
+
+    queue_folder = str(tmp_path / 'queue')
+    output_folder = str(tmp_path / 'queue_output')
+    published = marmot_h5_formatter.publish_scenarios(
+        [SCENARIO], solutions_folder, PLEXOS_PROPERTIES.copy(), queue_folder,
+        Marmot_Solutions_folder=output_folder,
+        Region_Mapping=os.path.join(solutions_folder, 'Region_Mapping.csv'),
+        **FORMATTER_SETTINGS)
+    assert published > 0
+
+    # Workers run in their own processes, as on the nodes of a cluster
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=2, mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = [executor.submit(marmot_h5_formatter.run_queue_worker, queue_folder,
+                                   CLAIM_TIMEOUT) for _ in range(2)]
+        completed = [future.result() for future in futures]
+    assert sum(completed) == published
+    assert WorkQueue(queue_folder, CLAIM_TIMEOUT).status() == dict(done=published, failed=0,
+                                                                   claimed=0, pending=0)
+
+    marmot_h5_formatter.merge_queue(queue_folder, CLAIM_TIMEOUT)
+    assert_formatted_equal(os.path.join(output_folder, 'Processed_HDF5_folder',
+                                        f'{SCENARIO}_formatted.h5'),
+                           sequential)
+    # Units, shards and settings of the merged scenario are removed
+    assert WorkQueue(queue_folder, CLAIM_TIMEOUT).jobs() == []
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""Spatial and temporal rollups of formatted properties."""
+
+import os
+import pandas as pd
+
+from conftest import REGIONS
+from marmot.formatterutils.derived import DERIVED_PROPERTIES
+from marmot.formatterutils.storage import formatted_keys, read_property
+
+
+def test_rollups_are_registered_per_run(format_scenario, tmp_path):
+    registered = dict(DERIVED_PROPERTIES)
+    with_rollups = format_scenario('with_rollups', spatial_rollups=True,
+                                   temporal_rollups=['daily'])
+    assert DERIVED_PROPERTIES == registered
+    keys = formatted_keys(with_rollups)
+    assert 'generator_Generation_by_Interconnect' in keys
+    assert 'generator_Generation_by_Interconnect_daily' in keys
+    assert 'region_Load_daily' in keys
+
+    # A scenario formatted next in the same process, without the Interconnect 
+    # aggregation or temporal rollups
+    country_mapping = os.path.join(str(tmp_path), 'Country_Mapping.csv')
+    pd.DataFrame({'region': REGIONS, 'Country': ['A', 'B', 'B']}).to_csv(country_mapping,
+                                                                          index=False)
+    next_scenario = format_scenario('next_scenario', spatial_rollups=True,
+                                    Region_Mapping=country_mapping)
+    keys = formatted_keys(next_scenario)
+    assert 'generator_Generation_by_Country' in keys
+    assert not [key for key in keys if 'Interconnect' in key or key.endswith('_daily')]
+
+    without_rollups = format_scenario('without_rollups')
+    assert not [key for key in formatted_keys(without_rollups) if '_by_' in key]
+
+
+def test_spatial_rollup_sums_generators(format_scenario):
+    formatted = format_scenario(spatial_rollups=True)
+    generation = read_property(formatted, 'generator_Generation')
+    expected = generation.groupby(level=['timestamp', 'tech', 'zone', 'units']).sum()
+    rollup = read_property(formatted, 'generator_Generation_by_zone')
+    pd.testing.assert_frame_equal(rollup.reorder_levels(expected.index.names).sort_index(),
+                                  expected, check_column_type=False)
+
+
+def test_temporal_rollup_converts_power_to_energy(format_scenario):
+    formatted = format_scenario(temporal_rollups=['daily'])
+    load = read_property(formatted, 'region_Load')
+    expected = load.groupby([load.index.get_level_values('timestamp').floor('D'),
+                             load.index.get_level_values('region')]).sum()
+    rollup = read_property(formatted, 'region_Load_daily')
+    assert set(rollup.index.unique('units')) == {'MWh'}
+    rollup = rollup.groupby(level=['timestamp', 'region']).sum()
+    # Hourly intervals, so the energy of each day is the sum of its MW values
+    pd.testing.assert_frame_equal(rollup, expected, check_names=False, check_column_type=False)
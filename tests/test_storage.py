@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""Saving and reading formatted properties with the storage backends."""
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from marmot.formatterutils import storage
+from marmot.formatterutils.storage import (ParquetBackend, formatted_keys, get_backend,
+                                           read_property)
+
+requires_pyarrow = pytest.mark.skipif(storage.pa is None, reason='requires pyarrow')
+BACKENDS = ['hdf5', pytest.param('parquet', marks=requires_pyarrow)]
+
+
+def _property(generators: list, start: str = '2024-01-01', periods: int = 3) -> pd.DataFrame:
+    """A long formatted generator property, in the object major order of the formatter."""
+    idx = pd.MultiIndex.from_product([generators, ['Gas-CC'],
+                                      pd.date_range(start, periods=periods, freq='H'), ['MW']],
+                                     names=['gen_name', 'tech', 'timestamp', 'units'])
+    idx = idx.reorder_levels(['timestamp', 'tech', 'gen_name', 'units'])
+    return pd.DataFrame({0: np.arange(len(idx), dtype='float32')}, index=idx)
+
+
+@pytest.fixture
+def file_name(tmp_path):
+    return str(tmp_path / 'Base_formatted.h5')
+
+
+@pytest.mark.parametrize('layout', ['long', 'wide'])
+@pytest.mark.parametrize('backend_name', BACKENDS)
+def test_save_and_read(file_name, backend_name, layout):
+    # The last cell is missing, so wide layouts keep a mask of the present cells
+    df = _property(['gen_a', 'gen_b']).iloc[:-1]
+    backend = get_backend(backend_name, file_name, layout=layout)
+    backend.save(df, 'generator_Generation')
+    # Wide layouts save the object dimensions in the dims group
+    assert [key for key in formatted_keys(file_name) if key != 'dims'] == ['generator_Generation']
+    pd.testing.assert_frame_equal(read_property(file_name, 'generator_Generation'), df)
+    pd.testing.assert_frame_equal(backend.read('generator_Generation'), df)
+
+
+@pytest.mark.parametrize('backend_name', BACKENDS)
+def test_append_partitions(file_name, backend_name):
+    backend = get_backend(backend_name, file_name)
+    # Names of the second partition are longer than the columns of the first
+    partitions = [_property(['gen_a']), _property(['gen_with_a_longer_name'], '2024-01-02')]
+    for df in partitions:
+        backend.append(df, 'generator_Generation')
+    assert 'generator_Generation' not in formatted_keys(file_name)
+    backend.finalize('generator_Generation')
+    df = read_property(file_name, 'generator_Generation')
+    pd.testing.assert_frame_equal(df.reset_index(), pd.concat(partitions).reset_index(),
+                                  check_dtype=False)
+
+
+@requires_pyarrow
+@pytest.mark.parametrize('backend_name, other_name', [('hdf5', 'parquet'), ('parquet', 'hdf5')])
+def test_saving_with_another_backend_removes_copy(file_name, backend_name, other_name):
+    old = _property(['gen_a'])
+    new = _property(['gen_b'])
+    get_backend(backend_name, file_name).save(old, 'generator_Generation')
+    other = get_backend(other_name, file_name)
+    other.save(new, 'generator_Generation')
+    assert get_backend(backend_name, file_name).keys() == []
+    assert formatted_keys(file_name) == ['generator_Generation']
+    pd.testing.assert_frame_equal(read_property(file_name, 'generator_Generation'), new)
+    other.remove('generator_Generation')
+    assert formatted_keys(file_name) == []
+
+
+@pytest.mark.parametrize('backend_name', BACKENDS)
+def test_link(file_name, backend_name):
+    df = _property(['gen_a'])
+    backend = get_backend(backend_name, file_name)
+    backend.save(df, 'generator_Curtailment')
+    backend.link('generator_Curtailment', 'generator_Upward_Available_Capacity')
+    assert sorted(formatted_keys(file_name)) == ['generator_Curtailment',
+                                                 'generator_Upward_Available_Capacity']
+    pd.testing.assert_frame_equal(read_property(file_name, 'generator_Upward_Available_Capacity'),
+                                  df)
+
+
+def test_read_missing_property(file_name):
+    get_backend('hdf5', file_name).save(_property(['gen_a']), 'generator_Generation')
+    assert not os.path.isdir(ParquetBackend.dataset_dir(file_name))
+    with pytest.raises(KeyError):
+        read_property(file_name, 'generator_Curtailment')